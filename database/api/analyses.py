@@ -0,0 +1,152 @@
+# database/api/analyses.py
+
+"""
+Single-flight registry of in-progress weekly analyses.
+
+Opening /weekly_alternatives/stream on two devices (or refreshing the page)
+used to start a second Dedalus run for the same (user, week). The registry
+keeps one running analysis per key; every subscriber gets a replay of the
+events emitted so far, then the live events, from the same run.
+
+  - the analysis runs in its own task, decoupled from any one connection, so
+    a subscriber disconnecting never cancels it for the others (and a page
+    refresh re-attaches to the run instead of starting over)
+  - events are numbered from 0; a subscriber can resume after a given event
+  - the entry is dropped when the run finishes, so the next request after
+    that starts a fresh analysis
+
+State is per process (one event loop); the API runs a single worker.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+EventSource = Callable[[], AsyncIterator[Dict[str, Any]]]
+
+
+class Analysis:
+    """One running analysis: its event log and a condition to wait for more."""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.events: List[Dict[str, Any]] = []
+        self.done = False
+        self.subscribers = 0
+        self.started_at = datetime.now()
+        self._changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    async def _append(self, event: Dict[str, Any]) -> None:
+        async with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    async def _finish(self) -> None:
+        async with self._changed:
+            self.done = True
+            self._changed.notify_all()
+
+    async def events_after(self, last_event_id: int = -1) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yield (event_id, event) for events after `last_event_id`: first the
+        replay of what is already logged, then live events until the run ends.
+        """
+        index = last_event_id + 1
+        while True:
+            async with self._changed:
+                while index >= len(self.events) and not self.done:
+                    await self._changed.wait()
+                if index >= len(self.events):
+                    return
+                pending = self.events[index:]
+            for event in pending:
+                yield index, event
+                index += 1
+
+
+class AnalysisRegistry:
+    """
+    In-flight analyses by key, e.g. (user_id, week_start).
+
+    Usage:
+        async for event_id, event in registry.subscribe(key, lambda: stream(user_id, week)):
+            ...
+    """
+
+    def __init__(self):
+        self._running: Dict[Hashable, Analysis] = {}
+        self.started = 0
+        self.attached = 0
+
+    def get(self, key: Hashable) -> Optional[Analysis]:
+        """The running analysis for `key`, if any."""
+        return self._running.get(key)
+
+    def start(self, key: Hashable, source: EventSource) -> Tuple[Analysis, bool]:
+        """
+        Get the running analysis for `key`, or start `source()` as a new one.
+
+        Returns:
+            (analysis, started) - started is False when an existing run was joined
+        """
+        analysis = self._running.get(key)
+        if analysis is not None:
+            self.attached += 1
+            return analysis, False
+
+        analysis = Analysis(key)
+        self._running[key] = analysis
+        analysis.task = asyncio.ensure_future(self._run(analysis, source))
+        self.started += 1
+        return analysis, True
+
+    async def _run(self, analysis: Analysis, source: EventSource) -> None:
+        try:
+            async for event in source():
+                await analysis._append(event)
+        except Exception as e:
+            await analysis._append({
+                "event": "error",
+                "message": f"Unexpected error: {str(e)}",
+                "timestamp": datetime.now().isoformat()
+            })
+        finally:
+            # Later requests start a new run; current subscribers drain the log
+            if self._running.get(analysis.key) is analysis:
+                del self._running[analysis.key]
+            await analysis._finish()
+
+    async def subscribe(
+        self,
+        key: Hashable,
+        source: EventSource,
+        last_event_id: int = -1,
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Attach to the analysis for `key` (starting it if needed) and yield
+        (event_id, event): replay first, then live events until it ends.
+        """
+        analysis, _ = self.start(key, source)
+        analysis.subscribers += 1
+        try:
+            async for item in analysis.events_after(last_event_id):
+                yield item
+        finally:
+            analysis.subscribers -= 1
+
+    def running(self) -> List[Dict[str, Any]]:
+        """Snapshot of in-flight analyses (for debugging/metrics)."""
+        return [
+            {
+                "key": list(a.key) if isinstance(a.key, tuple) else a.key,
+                "events": len(a.events),
+                "subscribers": a.subscribers,
+                "started_at": a.started_at.isoformat(),
+            }
+            for a in self._running.values()
+        ]
+
+
+# Process-wide registry used by the streaming endpoint
+registry = AnalysisRegistry()
@@ -1,4 +1,7 @@
 import os
+import queue
+import threading
+import time
 from contextlib import contextmanager
 from typing import Dict, Any, Iterable, List
 
@@ -32,13 +35,124 @@ def _conn_kwargs() -> Dict[str, str]:
     )
 
 
+# Idle connections kept open between requests (0 = connect per call)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+# Connections opened by init_pool() at startup
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", "2"))
+# Idle connections older than this are closed instead of reused: Snowflake
+# expires idle sessions server-side (4h by default) while is_closed() still
+# reports them open
+DB_POOL_MAX_IDLE_SECONDS = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "1800"))
+
+
+class ConnectionPool:
+    """
+    Small pool of idle Snowflake connections.
+
+    Every get_conn() used to pay a full Snowflake login. Connections are now
+    borrowed from a LIFO queue and returned after use; at most `size` stay
+    idle, extra ones opened under load are closed on return. A connection
+    that raised during use, that the server closed, or that sat idle longer
+    than `max_idle` seconds (its session may have expired) is discarded
+    instead of being handed out again.
+    """
+
+    def __init__(self, size: int = DB_POOL_SIZE, max_idle: float = DB_POOL_MAX_IDLE_SECONDS):
+        self.size = size
+        self.max_idle = max_idle
+        # (connection, monotonic time it was returned)
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.expired = 0
+
+    def _connect(self):
+        conn = sfc.connect(**_conn_kwargs())
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def acquire(self):
+        while True:
+            try:
+                conn, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - released_at > self.max_idle:
+                with self._lock:
+                    self.expired += 1
+                self._close(conn)
+                continue
+            if conn.is_closed():
+                continue
+            with self._lock:
+                self.reused += 1
+            return conn
+
+    def release(self, conn, healthy: bool = True) -> None:
+        if healthy and not conn.is_closed() and self._idle.qsize() < self.size:
+            self._idle.put((conn, time.monotonic()))
+            return
+        self._close(conn)
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def warm(self, count: int) -> int:
+        """Open connections until `count` (at most `size`) are idle; returns idle count."""
+        while self._idle.qsize() < min(count, self.size):
+            self._idle.put((self._connect(), time.monotonic()))
+        return self._idle.qsize()
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": self.size, "idle": self._idle.qsize(), "opened": self.opened,
+                "reused": self.reused, "expired": self.expired}
+
+
+pool = ConnectionPool(DB_POOL_SIZE)
+
+
+def init_pool(warm: int = DB_POOL_WARM) -> int:
+    """Open `warm` connections ahead of the first request (no-op when pooling is off)."""
+    if pool.size <= 0:
+        return 0
+    return pool.warm(warm)
+
+
+def close_pool() -> None:
+    pool.close()
+
+
 @contextmanager
 def get_conn():
-    conn = sfc.connect(**_conn_kwargs())
+    if pool.size <= 0:
+        conn = sfc.connect(**_conn_kwargs())
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    conn = pool.acquire()
+    healthy = False
     try:
         yield conn
+        healthy = True
     finally:
-        conn.close()
+        pool.release(conn, healthy)
 
 
 def fetch_all(sql: str, params: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
@@ -66,4 +180,25 @@ def execute_many(sql: str, params_list: List[Dict[str, Any]]) -> int:
     with get_conn() as conn, conn.cursor() as cur:
         cur.executemany(sql, params_list)
         conn.commit()
-        return cur.rowcount
\ No newline at end of file
+        return cur.rowcount
+
+
+def execute_transaction(statements: List[tuple]) -> None:
+    """
+    Execute several statements atomically on one connection.
+
+    Expected input: List of (sql, params) tuples
+    Expected output: None (all statements committed, or none on error)
+    """
+    if not statements:
+        return
+
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("BEGIN")
+        try:
+            for sql, params in statements:
+                cur.execute(sql, params or {})
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
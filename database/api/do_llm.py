@@ -1,6 +1,7 @@
 # database/api/do_llm.py
 
 import os
+import sys
 from typing import Optional
 
 try:
@@ -8,10 +9,34 @@ try:
 except ImportError:
     requests = None  # we'll handle this gracefully
 
+# Add src to path for imports (shared LLM call metrics)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from services.llm_metrics import track_llm_call
 
 DO_API_KEY = os.getenv("DO_API_KEY")
 # You can change this to the exact model slug you enable on DigitalOcean
 DO_LLM_MODEL = os.getenv("DO_LLM_MODEL", "gpt-4o-mini")
+# OpenAI-compatible chat completions URL (point at scripts/fake_llm_server.py offline)
+DO_LLM_URL = os.getenv("DO_LLM_URL", "https://api.digitalocean.com/v2/ai/openai/chat/completions")
+
+# One keep-alive session per process instead of a new TLS handshake per call
+_session = None
+
+
+def get_session():
+    """Long-lived requests.Session for the DO endpoint (None without requests)."""
+    global _session
+    if _session is None and requests is not None:
+        _session = requests.Session()
+    return _session
+
+
+def close_session() -> None:
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
 
 
 def call_do_llm(system_prompt: str, user_prompt: str) -> str:
@@ -29,7 +54,7 @@ def call_do_llm(system_prompt: str, user_prompt: str) -> str:
             "so I can generate smarter, personalized coaching messages."
         )
 
-    url = "https://api.digitalocean.com/v2/ai/openai/chat/completions"
+    url = DO_LLM_URL
 
     headers = {
         "Authorization": f"Bearer {DO_API_KEY}",
@@ -47,11 +72,16 @@ def call_do_llm(system_prompt: str, user_prompt: str) -> str:
     }
 
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        # OpenAI-style response structure
-        return data["choices"][0]["message"]["content"]
+        # Tracked as the "coach" call site (latency, tokens, outcome)
+        with track_llm_call("coach", DO_LLM_MODEL, system_prompt + "\n" + user_prompt) as call:
+            resp = get_session().post(url, headers=headers, json=payload, timeout=30)
+            call.ttft = resp.elapsed.total_seconds()
+            resp.raise_for_status()
+            data = resp.json()
+            # OpenAI-style response structure
+            content = data["choices"][0]["message"]["content"]
+            call.set_output(data, text=content)
+        return content
     except Exception as e:
         # Don't crash the app; just return a fallback message
         return (
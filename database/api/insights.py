@@ -0,0 +1,192 @@
+# database/api/insights.py
+
+"""
+Precomputed spending insights with a per-user result store.
+
+Computing insights runs SQL_FIND_OVERSPENDING, SQL_CATEGORY_TRENDS and
+SQL_CANCELLATION_CANDIDATES (window functions over category_spending_summary).
+The result is stored in user_insights, keyed by user_id, so serving
+/api/user/{user_id}/insights is one key lookup.
+
+Entries expire after a per-user TTL (ttl_seconds column, falling back to
+INSIGHTS_TTL_SECONDS) and are invalidated when new purchases land.
+scripts/refresh_insights.py recomputes expired entries on a schedule.
+
+Security: Uses parameterized queries to prevent SQL injection
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import prediction_queries as PQ
+from .db import fetch_all, execute
+
+DB = os.getenv("SNOWFLAKE_DATABASE", "SNOWFLAKE_LEARNING_DB")
+SC = os.getenv("SNOWFLAKE_SCHEMA", "BALANCEIQ_CORE")
+
+T_INSIGHTS = f"{DB}.{SC}.user_insights"
+
+DEFAULT_TTL_SECONDS = int(os.getenv("INSIGHTS_TTL_SECONDS", str(6 * 60 * 60)))
+
+
+def compute_user_insights(user_id: str) -> Dict[str, Any]:
+    """
+    Run the insight queries for one user.
+
+    Returns:
+        {"user_id", "overspending", "category_trends",
+         "cancellation_candidates", "computed_at"}
+    """
+    params = {"user_id": user_id}
+    return {
+        "user_id": user_id,
+        "overspending": fetch_all(PQ.SQL_FIND_OVERSPENDING, params),
+        "category_trends": fetch_all(PQ.SQL_CATEGORY_TRENDS, params),
+        "cancellation_candidates": fetch_all(PQ.SQL_CANCELLATION_CANDIDATES, params),
+        "computed_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def store_user_insights(
+    user_id: str,
+    insights: Dict[str, Any],
+    ttl_seconds: Optional[int] = None,
+) -> None:
+    """
+    Upsert a user's insights into the result store.
+
+    The stored per-user TTL is kept unless `ttl_seconds` overrides it.
+    """
+    # Decimals / datetimes from Snowflake rows are stored as strings
+    insights_json = json.dumps(insights, default=str)
+
+    sql = f"""
+        MERGE INTO {T_INSIGHTS} AS target
+        USING (
+            SELECT
+                %s AS user_id,
+                PARSE_JSON(%s) AS insights_json,
+                %s AS ttl_seconds
+        ) AS source
+        ON target.user_id = source.user_id
+        WHEN MATCHED THEN UPDATE SET
+            target.insights_json = source.insights_json,
+            target.ttl_seconds = COALESCE(source.ttl_seconds, target.ttl_seconds),
+            target.computed_at = CURRENT_TIMESTAMP(),
+            target.expires_at = DATEADD(
+                'second',
+                COALESCE(source.ttl_seconds, target.ttl_seconds, %s),
+                CURRENT_TIMESTAMP()
+            )
+        WHEN NOT MATCHED THEN INSERT (
+            user_id, insights_json, ttl_seconds, computed_at, expires_at
+        ) VALUES (
+            source.user_id, source.insights_json, source.ttl_seconds,
+            CURRENT_TIMESTAMP(),
+            DATEADD('second', COALESCE(source.ttl_seconds, %s), CURRENT_TIMESTAMP())
+        )
+    """
+
+    execute(sql, (user_id, insights_json, ttl_seconds, DEFAULT_TTL_SECONDS, DEFAULT_TTL_SECONDS))
+
+
+def refresh_user_insights(user_id: str, ttl_seconds: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Recompute and store a user's insights. Returns the fresh insights.
+    """
+    insights = compute_user_insights(user_id)
+    store_user_insights(user_id, insights, ttl_seconds=ttl_seconds)
+    return insights
+
+
+def get_user_insights(user_id: str) -> Dict[str, Any]:
+    """
+    Serve a user's insights from the result store.
+
+    A fresh entry costs one key lookup. A missing or expired entry is
+    recomputed on the spot (and stored) so the endpoint never returns
+    stale data; the scheduled job keeps that path rare.
+    """
+    sql = f"""
+        SELECT
+            insights_json,
+            computed_at,
+            expires_at,
+            expires_at > CURRENT_TIMESTAMP() AS is_fresh
+        FROM {T_INSIGHTS}
+        WHERE user_id = %s
+    """
+
+    rows = fetch_all(sql, (user_id,))
+
+    if rows and rows[0].get("IS_FRESH"):
+        row = rows[0]
+        insights = row.get("INSIGHTS_JSON") or {}
+        # Snowflake returns VARIANT as a JSON string through the connector
+        if isinstance(insights, str):
+            insights = json.loads(insights)
+        insights["cached"] = True
+        insights["expires_at"] = row.get("EXPIRES_AT")
+        return insights
+
+    insights = refresh_user_insights(user_id)
+    insights["cached"] = False
+    return insights
+
+
+def invalidation_statement(user_ids: Iterable[str]) -> Optional[tuple]:
+    """
+    (sql, params) expiring stored insights for `user_ids`, or None if empty.
+
+    Returned as a statement so callers can run it inside their own
+    transaction (see rollups.refresh_rollups_for_items).
+    """
+    ids: List[str] = sorted(set(u for u in user_ids if u))
+    if not ids:
+        return None
+
+    placeholders = ", ".join(["%s"] * len(ids))
+    sql = f"""
+        UPDATE {T_INSIGHTS}
+        SET expires_at = CURRENT_TIMESTAMP()
+        WHERE user_id IN ({placeholders})
+    """
+    return sql, tuple(ids)
+
+
+def invalidate_user_insights(user_ids: Iterable[str]) -> int:
+    """
+    Expire stored insights for the given users (e.g. after new purchases).
+
+    Returns the number of user ids invalidated.
+    """
+    statement = invalidation_statement(user_ids)
+    if statement is None:
+        return 0
+
+    sql, params = statement
+    execute(sql, params)
+    return len(params)
+
+
+def get_users_needing_refresh(limit: int = 1000) -> List[str]:
+    """
+    Users whose stored insights are expired, plus users with spending
+    rollups but no stored insights yet.
+    """
+    sql = f"""
+        SELECT user_id FROM {T_INSIGHTS}
+        WHERE expires_at <= CURRENT_TIMESTAMP()
+        UNION
+        SELECT DISTINCT s.user_id
+        FROM {DB}.{SC}.category_spending_summary s
+        LEFT JOIN {T_INSIGHTS} i ON i.user_id = s.user_id
+        WHERE i.user_id IS NULL
+        ORDER BY 1
+        LIMIT %s
+    """
+
+    rows = fetch_all(sql, (limit,))
+    return [row["USER_ID"] for row in rows]
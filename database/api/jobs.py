@@ -0,0 +1,318 @@
+# database/api/jobs.py
+
+"""
+Background job queue for weekly analyses.
+
+The streaming endpoint used to run the analysis inside the HTTP response
+generator, so a dropped connection threw the work away. Jobs decouple the
+two: POST creates a job and returns its id, a bounded pool of workers runs
+it, and every event is appended to a persistent event log. Clients poll the
+job or (re)subscribe to its SSE stream from the last event id they saw.
+
+Storage is a local SQLite file (ANALYSIS_JOBS_DB) next to the API process
+that owns the queue, not Snowflake: every event is a small write and only
+this process reads them back.
+
+  analysis_jobs        one row per job (status, timestamps, report_id, error)
+  analysis_job_events  (job_id, event_id) -> event JSON, event_id from 0
+
+Statuses: queued -> running -> done | failed. Jobs left queued/running by a
+previous process are re-queued when the queue starts and run again from
+scratch: their old events are replaced by one "restarted" event, and event
+ids keep increasing so a client resuming with Last-Event-ID never sees an
+event twice.
+
+SQLite calls are blocking, so the queue makes them through asyncio.to_thread.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+JOBS_DB_PATH = os.getenv(
+    "ANALYSIS_JOBS_DB",
+    os.path.join(os.path.dirname(__file__), "analysis_jobs.sqlite3"),
+)
+JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "2"))
+
+ACTIVE = ("queued", "running")
+TERMINAL = ("done", "failed")
+
+# (user_id, week_start, refresh) -> async iterator of analysis events
+JobSource = Callable[[str, str, bool], AsyncIterator[Dict[str, Any]]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    job_id      TEXT PRIMARY KEY,
+    user_id     TEXT NOT NULL,
+    week_start  TEXT NOT NULL,
+    refresh     INTEGER NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    started_at  TEXT,
+    finished_at TEXT,
+    report_id   TEXT,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS analysis_jobs_user_week ON analysis_jobs (user_id, week_start, status);
+CREATE TABLE IF NOT EXISTS analysis_job_events (
+    job_id     TEXT NOT NULL,
+    event_id   INTEGER NOT NULL,
+    event_json TEXT NOT NULL,
+    PRIMARY KEY (job_id, event_id)
+);
+"""
+
+
+class JobStore:
+    """SQLite-backed job table and per-job event log (thread-safe)."""
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def create(self, user_id: str, week_start: str, refresh: bool = False) -> Dict[str, Any]:
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "week_start": week_start,
+            "refresh": int(refresh),
+            "status": "queued",
+            "created_at": datetime.now().isoformat(),
+        }
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO analysis_jobs (job_id, user_id, week_start, refresh, status, created_at) "
+                "VALUES (:job_id, :user_id, :week_start, :refresh, :status, :created_at)",
+                job,
+            )
+        return self.get(job["job_id"])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT j.*, (SELECT COUNT(*) FROM analysis_job_events e WHERE e.job_id = j.job_id) AS events "
+                "FROM analysis_jobs j WHERE j.job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["refresh"] = bool(job["refresh"])
+        return job
+
+    def find_active(self, user_id: str, week_start: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Queued or running job for (user, week), if any; with `refresh`, only refresh jobs."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id FROM analysis_jobs WHERE user_id = ? AND week_start = ? "
+                "AND status IN ('queued', 'running') AND refresh >= ? ORDER BY created_at LIMIT 1",
+                (user_id, week_start, int(refresh)),
+            ).fetchone()
+        return self.get(row["job_id"]) if row else None
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Jobs a previous process left queued or running, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM analysis_jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self.get(row["job_id"]) for row in rows]
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE analysis_jobs SET {assignments} WHERE job_id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def append_event(self, job_id: str, event: Dict[str, Any]) -> int:
+        """Append an event; returns its event_id."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(event_id), -1) + 1 FROM analysis_job_events WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            event_id = row[0]
+            self._conn.execute(
+                "INSERT INTO analysis_job_events (job_id, event_id, event_json) VALUES (?, ?, ?)",
+                (job_id, event_id, json.dumps(event, default=str)),
+            )
+        return event_id
+
+    def restart_events(self, job_id: str) -> int:
+        """
+        Replace a job's events with a single "restarted" event, numbered
+        after the last one so resuming clients still move forward; returns
+        its event_id.
+        """
+        event = {"event": "restarted", "timestamp": datetime.now().isoformat()}
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(event_id), -1) + 1 FROM analysis_job_events WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            event_id = row[0]
+            self._conn.execute("DELETE FROM analysis_job_events WHERE job_id = ?", (job_id,))
+            self._conn.execute(
+                "INSERT INTO analysis_job_events (job_id, event_id, event_json) VALUES (?, ?, ?)",
+                (job_id, event_id, json.dumps(event)),
+            )
+        return event_id
+
+    def last_event(self, job_id: str) -> Optional[tuple]:
+        """(event_id, event) of the job's latest event, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT event_id, event_json FROM analysis_job_events "
+                "WHERE job_id = ? ORDER BY event_id DESC LIMIT 1",
+                (job_id,),
+            ).fetchone()
+        return (row["event_id"], json.loads(row["event_json"])) if row else None
+
+    def events_after(self, job_id: str, last_event_id: int = -1) -> List[tuple]:
+        """[(event_id, event)] after `last_event_id`, in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT event_id, event_json FROM analysis_job_events "
+                "WHERE job_id = ? AND event_id > ? ORDER BY event_id",
+                (job_id, last_event_id),
+            ).fetchall()
+        return [(row["event_id"], json.loads(row["event_json"])) for row in rows]
+
+
+class JobQueue:
+    """
+    Bounded pool of asyncio workers running analysis jobs from a JobStore.
+
+    Args:
+        store: Persistent job table / event log
+        source: Produces the analysis events for a job (see JobSource)
+        workers: Jobs run concurrently
+    """
+
+    def __init__(self, store: JobStore, source: JobSource, workers: int = JOB_WORKERS):
+        self.store = store
+        self.source = source
+        self.workers = max(1, workers)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._changed: Dict[str, asyncio.Condition] = {}
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Start workers on the running loop and re-queue unfinished jobs (idempotent)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        for job in self.store.unfinished():
+            if job["events"]:
+                # The analysis runs again from scratch: drop its partial
+                # events before any subscriber can be served them
+                self.store.restart_events(job["job_id"])
+            self._queue.put_nowait(job["job_id"])
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, user_id: str, week_start: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Queue an analysis and return its job. An active job for the same
+        (user, week) is returned instead of queuing a duplicate; with
+        `refresh`, only an active refresh job counts (a plain one may just
+        replay the saved report).
+        """
+        self.start()
+        active = await asyncio.to_thread(self.store.find_active, user_id, week_start, refresh)
+        if active is not None:
+            return active
+        job = await asyncio.to_thread(self.store.create, user_id, week_start, refresh)
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    def _condition(self, job_id: str) -> asyncio.Condition:
+        if job_id not in self._changed:
+            self._changed[job_id] = asyncio.Condition()
+        return self._changed[job_id]
+
+    async def _notify(self, job_id: str) -> None:
+        condition = self._condition(job_id)
+        async with condition:
+            condition.notify_all()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job["status"] in TERMINAL:
+            return
+        await asyncio.to_thread(self.store.update, job_id, status="running", started_at=datetime.now().isoformat())
+        await self._notify(job_id)
+
+        status, error, report_id = "done", None, None
+        try:
+            async for event in self.source(job["user_id"], job["week_start"], job["refresh"]):
+                await asyncio.to_thread(self.store.append_event, job_id, event)
+                if event.get("event") == "complete":
+                    report_id = event.get("report_id")
+                elif event.get("event") == "error":
+                    status, error = "failed", event.get("message")
+                await self._notify(job_id)
+        except Exception as e:
+            status, error = "failed", str(e)
+            await asyncio.to_thread(self.store.append_event, job_id, {
+                "event": "error",
+                "message": f"Unexpected error: {str(e)}",
+                "timestamp": datetime.now().isoformat()
+            })
+
+        await asyncio.to_thread(
+            self.store.update, job_id, status=status, error=error, report_id=report_id,
+            finished_at=datetime.now().isoformat()
+        )
+        await self._notify(job_id)
+        self._changed.pop(job_id, None)
+
+    async def events(self, job_id: str, last_event_id: int = -1) -> AsyncIterator[tuple]:
+        """
+        Yield (event_id, event) after `last_event_id`: stored events first,
+        then live ones until the job finishes.
+        """
+        while True:
+            condition = self._condition(job_id)
+            async with condition:
+                pending = await asyncio.to_thread(self.store.events_after, job_id, last_event_id)
+                job = await asyncio.to_thread(self.store.get, job_id)
+                if not pending:
+                    if job is None or job["status"] in TERMINAL or not self.started:
+                        self._changed.pop(job_id, None)
+                        return
+                    await condition.wait()
+                    continue
+            for event_id, event in pending:
+                yield event_id, event
+                last_event_id = event_id
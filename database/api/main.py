@@ -1,19 +1,139 @@
 # database/api/main.py
 
-from typing import List, Dict, Any
-
-from fastapi import FastAPI, HTTPException, Query
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Dict, Any, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.responses import JSONResponse, StreamingResponse
 
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
 from . import queries as Q
-from .db import fetch_all, execute
+from .db import fetch_all, execute, init_pool, close_pool, pool as db_pool
 from .models import TransactionInsert, UserReply
 from .semantic import search_similar_items
-from .predictor import predict_next_purchases
-from .do_llm import call_do_llm
-from .suggestions import get_weekly_report, get_recent_reports
+from .predictor import predict_next_purchases, predict_levels, LEVELS
+from .do_llm import call_do_llm, get_session as get_llm_session, close_session as close_llm_session
+from services.llm_metrics import get_llm_metrics
+from .suggestions import (
+    get_weekly_report,
+    get_recent_reports,
+    get_report_summaries,
+    upsert_weekly_report,
+    report_is_fresh,
+    warm_report_cache,
+)
+from .insights import get_user_insights, invalidate_user_insights
+from .overspending import detector as overspending_detector, load_user_history
+from .analyses import registry as analysis_registry
+from .jobs import JobQueue, JobStore
+
+
+# ----------------------------------------------------------------------
+# Startup warm-up and readiness
+# ----------------------------------------------------------------------
+
+# Warm-up steps in order; the app is ready once the required ones are "ok"
+WARMUP_STEPS = ("modules", "db_pool", "llm_clients", "report_cache", "job_queue")
+REQUIRED_STEPS = ("modules", "db_pool")
+WARM_REPORT_CACHE = os.getenv("WARM_REPORT_CACHE", "true").lower() == "true"
+
+warmup_state: Dict[str, Any] = {
+    "started_at": None,
+    "finished_at": None,
+    "steps": {name: {"status": "pending"} for name in WARMUP_STEPS},
+}
+
+
+async def _warm_step(name: str, action) -> None:
+    """Run one warm-up step (sync actions in a thread) and record its outcome."""
+    started = time.perf_counter()
+    try:
+        result = action()
+        if asyncio.iscoroutine(result):
+            result = await result
+        step = {"status": "ok", "detail": result}
+    except Exception as e:
+        print(f"Warm-up {name} failed:", repr(e))
+        step = {"status": "failed", "error": str(e)}
+    step["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    warmup_state["steps"][name] = step
+
+
+def _warm_db() -> Dict[str, Any]:
+    """Open the pool's first connections and prove they work."""
+    init_pool()
+    fetch_all(Q.SQL_HEALTH)
+    return db_pool.stats()
+
+
+async def warm_up() -> None:
+    """
+    Prepare everything the first requests would otherwise pay for: the
+    streaming suggester import, Snowflake connections, the LLM HTTP session,
+    last week's reports, and the analysis job workers.
+    """
+    warmup_state["started_at"] = datetime.now().isoformat()
+    await _warm_step("modules", lambda: asyncio.to_thread(lambda: _load_stream_module().__name__))
+    await _warm_step("db_pool", lambda: asyncio.to_thread(_warm_db))
+    await _warm_step("llm_clients", _warm_llm_clients)
+    if WARM_REPORT_CACHE and warmup_state["steps"]["db_pool"]["status"] == "ok":
+        await _warm_step("report_cache", lambda: asyncio.to_thread(
+            lambda: {"reports": warm_report_cache(_last_week_start())}))
+    else:
+        warmup_state["steps"]["report_cache"] = {"status": "skipped"}
+    await _warm_step("job_queue", _start_job_queue)
+    warmup_state["finished_at"] = datetime.now().isoformat()
 
-app = FastAPI(title="BalanceIQ Core API", version="0.1.0")
+
+def _warm_llm_clients() -> Dict[str, Any]:
+    """Build the shared Dedalus client (this loop) and the DO HTTP session."""
+    clients = _load_stream_module().get_llm_clients()
+    clients.client()
+    return dict(clients.stats(), do_session=get_llm_session() is not None)
+
+
+def _start_job_queue() -> Dict[str, Any]:
+    """Start the analysis workers (re-queues jobs a previous process left)."""
+    queue = get_job_queue()
+    queue.start()
+    return {"workers": queue.workers}
+
+
+def is_ready() -> bool:
+    steps = warmup_state["steps"]
+    return warmup_state["finished_at"] is not None and all(
+        steps[name]["status"] == "ok" for name in REQUIRED_STEPS
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in the background (see /ready), release pooled resources on shutdown."""
+    warmup_task = asyncio.ensure_future(warm_up())
+    yield
+    warmup_task.cancel()
+    await asyncio.gather(warmup_task, return_exceptions=True)
+    if _job_queue is not None:
+        await _job_queue.stop()
+    close_pool()
+    close_llm_session()
+    # May be half-imported if shutdown interrupted warm-up
+    get_clients = getattr(sys.modules.get(STREAM_MODULE_NAME), 'get_llm_clients', None)
+    if get_clients is not None:
+        await get_clients().aclose()
+
+
+app = FastAPI(title="BalanceIQ Core API", version="0.1.0", lifespan=lifespan)
 
 
 # ----------------------------------------------------------------------
@@ -34,12 +154,42 @@ def health():
         raise HTTPException(status_code=500, detail="Health check failed")
 
 
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe: 200 once startup warm-up has finished and its required
+    steps (modules, db_pool) succeeded, 503 until then. The body lists every
+    warm-up step with its status and duration.
+    """
+    body = dict(warmup_state, ready=is_ready())
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+@app.get("/metrics/llm")
+def llm_metrics(reset: bool = Query(False, description="Start a new window after reading")):
+    """
+    LLM call metrics for this process, per call site and model: calls by
+    outcome, retries, tokens, estimated cost and histograms of wall time,
+    time to first token and token counts.
+    """
+    return get_llm_metrics().snapshot(reset=reset)
+
+
 @app.get("/feed")
-def feed(user_id: str, limit: int = Query(20, ge=1, le=100)):
+def feed(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    days: Optional[int] = Query(None, ge=1, le=3650, description="Only look back this many days"),
+):
     """
     Recent transactions feed for a given user (from TRANSACTIONS table).
+
+    With `days`, reads a bounded (user_id, occurred_at) range of the
+    materialized TRANSACTIONS rollup instead of the user's whole history.
     """
-    return fetch_all(Q.SQL_FEED, {"user_id": user_id, "limit": limit})
+    if days is None:
+        return fetch_all(Q.SQL_FEED, {"user_id": user_id, "limit": limit})
+    return fetch_all(Q.SQL_FEED_SINCE, {"user_id": user_id, "limit": limit, "days": days})
 
 
 @app.get("/stats/category")
@@ -64,7 +214,25 @@ def upsert_transaction(txn: TransactionInsert):
     Upsert a single transaction into TRANSACTIONS via MERGE.
     """
     execute(Q.SQL_MERGE_TXN, txn.model_dump())
-    return {"status": "ok", "id": txn.id}
+
+    # Best effort: the write is committed, so a failure here must not turn
+    # it into a 500 (the client would retry a write that already happened)
+    try:
+        invalidate_user_insights([txn.user_id])
+    except Exception as e:
+        print("Insights: invalidation error", repr(e))
+
+    # Real-time overspending check (no warehouse query once the user is seeded)
+    alert = None
+    try:
+        load_user_history(overspending_detector, txn.user_id)  # no query once seeded
+        alert = overspending_detector.ingest(
+            txn.user_id, txn.category, txn.occurred_at, txn.amount_cents / 100.0
+        )
+    except Exception as e:
+        print("Overspending: detector error", repr(e))
+
+    return {"status": "ok", "id": txn.id, "overspending_alert": alert}
 
 
 @app.post("/reply")
@@ -164,19 +332,46 @@ def get_user_transactions(
 def api_predict(
     user_id: str = Query(..., description="User ID"),
     limit: int = Query(5, ge=1, le=20, description="Max number of predictions"),
-) -> List[Dict[str, Any]]:
+    history: Optional[int] = Query(
+        None, ge=1, le=100, description="Only use the last N intervals per item"
+    ),
+    decay: Optional[float] = Query(
+        None, gt=0, le=1, description="Exponential decay factor for older intervals"
+    ),
+    level: str = Query(
+        "item",
+        pattern="^(item|category|merchant|all)$",
+        description="Prediction granularity: item, category, merchant or all",
+    ),
+) -> Any:
     """
     Behavioral prediction endpoint (uses PURCHASE_ITEMS_TEST).
 
-    Uses predictor.predict_next_purchases() which:
-      - Groups by (item_name, category)
+    Uses predictor.predict_levels() which:
+      - Groups by (item_name, category), category or merchant
       - Looks at historical TS times
       - Estimates an average interval between purchases
       - Predicts next_time = last_time + avg_interval
       - Computes a confidence score
+
+    Optional bounded-history mode:
+      - history=N: only the last N intervals per item are considered
+      - decay=0.5: decayed average, newest interval weighs the most
+
+    level=item|category|merchant returns a list for that level;
+    level=all returns {"item": [...], "category": [...], "merchant": [...]},
+    computed from a single history fetch.
     """
+    levels = list(LEVELS) if level == "all" else [level]
     try:
-        return predict_next_purchases(user_id=user_id, limit=limit)
+        result = predict_levels(
+            user_id=user_id,
+            levels=levels,
+            limit=limit,
+            max_intervals=history,
+            decay=decay,
+        )
+        return result if level == "all" else result[level]
     except Exception as e:
         print("Prediction error:", repr(e))
         raise HTTPException(status_code=500, detail="Prediction failed")
@@ -276,6 +471,48 @@ def api_coach(
     }
 
 
+# ----------------------------------------------------------------------
+# Spending Insights (precomputed per user)
+# ----------------------------------------------------------------------
+
+
+@app.get("/api/user/{user_id}/insights")
+def api_user_insights(user_id: str) -> Dict[str, Any]:
+    """
+    Get overspending alerts, category trends and cancellation candidates.
+
+    Served from the user_insights result store (one key lookup). Entries
+    are refreshed by scripts/refresh_insights.py and expire after the
+    user's TTL or when new purchases arrive; a missing or expired entry is
+    recomputed on this request.
+
+    Returns:
+        {
+            "user_id": "test_user_001",
+            "overspending": [...],
+            "category_trends": [...],
+            "cancellation_candidates": [...],
+            "computed_at": "2024-01-27T10:30:00+00:00",
+            "cached": true
+        }
+    """
+    try:
+        return get_user_insights(user_id)
+    except Exception as e:
+        print("Insights: error", repr(e))
+        raise HTTPException(status_code=500, detail="Failed to load insights")
+
+
+@app.get("/api/user/{user_id}/overspending_alerts")
+def api_overspending_alerts(user_id: str) -> List[Dict[str, Any]]:
+    """
+    Overspending events emitted in real time as this user's purchases were
+    ingested (newest first). Same rule as SQL_FIND_OVERSPENDING: a week's
+    category total above 1.5x the average of the previous 4 weeks.
+    """
+    return overspending_detector.recent_events(user_id)
+
+
 # ----------------------------------------------------------------------
 # Weekly Alternative Suggestions
 # ----------------------------------------------------------------------
@@ -351,6 +588,11 @@ def api_weekly_alternatives(
 def api_weekly_alternatives_history(
     user_id: str,
     limit: int = Query(4, ge=1, le=12, description="Number of recent reports to return"),
+    fields: str = Query(
+        "full",
+        pattern="^(full|summary)$",
+        description="'summary' returns only savings totals per week (no findings)",
+    ),
 ) -> List[Dict[str, Any]]:
     """
     Get recent weekly alternative suggestions history for a user.
@@ -358,6 +600,11 @@ def api_weekly_alternatives_history(
     Returns up to `limit` recent reports, ordered by week_start descending.
     Default is 4 reports (approximately 1 month of history).
 
+    With fields=summary only the scalar columns are read (week_start,
+    week_end, items_analyzed, items_with_alternatives,
+    total_potential_savings); load a week's findings with
+    /weekly_alternatives?week=YYYY-MM-DD.
+
     Returns:
         [
             {
@@ -373,6 +620,9 @@ def api_weekly_alternatives_history(
             ...
         ]
     """
+    if fields == "summary":
+        return get_report_summaries(user_id, limit=limit)
+
     reports = get_recent_reports(user_id, limit=limit)
 
     if not reports:
@@ -382,10 +632,118 @@ def api_weekly_alternatives_history(
     return reports
 
 
+# ----------------------------------------------------------------------
+# Weekly analyses: live stream and background jobs
+# ----------------------------------------------------------------------
+
+
+STREAM_MODULE_NAME = "services.weekly_suggester_stream"
+_stream_module_lock = threading.Lock()
+
+
+def _load_stream_module():
+    """
+    Load the streaming suggester once per process (src/ is not a package).
+
+    Reuses an already imported services.weekly_suggester_stream, so the API
+    and anything importing it normally share one module, its clients and
+    caches. Loaded at startup by warm_up().
+    """
+    with _stream_module_lock:
+        stream_module = sys.modules.get(STREAM_MODULE_NAME)
+        if stream_module is None:
+            stream_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src', 'services', 'weekly_suggester_stream.py')
+            spec = importlib.util.spec_from_file_location(STREAM_MODULE_NAME, stream_path)
+            stream_module = importlib.util.module_from_spec(spec)
+            sys.modules[STREAM_MODULE_NAME] = stream_module
+            try:
+                spec.loader.exec_module(stream_module)
+            except Exception:
+                del sys.modules[STREAM_MODULE_NAME]
+                raise
+        return stream_module
+
+
+def _last_week_start() -> str:
+    """Monday of last week (YYYY-MM-DD)."""
+    today = datetime.now()
+    days_since_monday = today.weekday()
+    last_monday = today - timedelta(days=days_since_monday + 7)
+    return last_monday.strftime('%Y-%m-%d')
+
+
+async def weekly_analysis_events(
+    user_id: str,
+    week: str,
+    refresh: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Events of a weekly analysis, from the cheapest source available.
+
+    A fresh saved report (weekly_suggestions_reports, see report_is_fresh) is
+    replayed instantly as items_loaded / found / complete events marked
+    "cached": true, unless `refresh` is set or a run is already going.
+    Otherwise the caller joins the single-flight run for (user, week), whose
+    report is saved when it completes. A failed run is only saved when there
+    is no good report for the week; otherwise its error event carries the
+    previous report_id.
+    """
+    stream_module = _load_stream_module()
+    key = (user_id, week)
+
+    if not refresh and analysis_registry.get(key) is None:
+        cached_report = None
+        try:
+            cached_report = await asyncio.to_thread(get_weekly_report, user_id, week)
+        except Exception as e:
+            print("Stream report lookup error:", repr(e))
+        if report_is_fresh(cached_report):
+            async for event_data in stream_module.replay_report_events(cached_report):
+                yield event_data
+            return
+
+    async def save_report(report: Dict[str, Any]) -> str:
+        # A failed run (e.g. unparseable model output) shares the report's
+        # (user_id, week_start) key: never let it replace a good report
+        if report.get('error'):
+            previous = await asyncio.to_thread(get_weekly_report, user_id, week)
+            if previous and not previous.get('error'):
+                return previous.get('report_id')
+        return await asyncio.to_thread(upsert_weekly_report, user_id, week, report)
+
+    def run_analysis():
+        return stream_module.generate_weekly_suggestions_stream(user_id, week, on_complete=save_report)
+
+    async for _, event_data in analysis_registry.subscribe(key, run_analysis):
+        yield event_data
+
+
+def _sse(event_data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Format one SSE message: [id: n\n]data: {json}\n\n"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}data: {json.dumps(event_data, default=str)}\n\n"
+
+
+def _error_event(message: str) -> Dict[str, Any]:
+    return {
+        "event": "error",
+        "message": message,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Disable nginx buffering
+}
+
+
 @app.get("/api/user/{user_id}/weekly_alternatives/stream")
 async def stream_weekly_alternatives(
     user_id: str,
     week: str = Query(None, description="ISO week start date (YYYY-MM-DD). If not provided, uses last week."),
+    refresh: bool = Query(False, description="Re-run the analysis even if a saved report exists"),
 ):
     """
     Stream weekly alternative suggestions with real-time progress (Server-Sent Events).
@@ -396,6 +754,7 @@ async def stream_weekly_alternatives(
     Query Parameters:
         - week: Optional ISO week start date (YYYY-MM-DD)
           If not provided, uses last week
+        - refresh: If true, ignore a saved report and re-run the AI
 
     Returns:
         Server-Sent Events (text/event-stream) with progress updates:
@@ -416,49 +775,134 @@ async def stream_weekly_alternatives(
         ```
 
     Performance: Real-time streaming (5-10 seconds total)
-    """
-    import importlib.util
-    import os
-    import json
 
-    # Dynamically load streaming module
-    stream_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src', 'services', 'weekly_suggester_stream.py')
-    spec = importlib.util.spec_from_file_location("weekly_suggester_stream", stream_path)
-    stream_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(stream_module)
+    A fresh saved report (weekly_suggestions_reports, see report_is_fresh) is
+    replayed instantly as items_loaded / found / complete events marked
+    "cached": true. Otherwise the AI runs and its report is saved when it
+    completes, so the next request is served from the store.
 
+    Concurrent requests for the same (user, week) share one analysis: a
+    second device or a page refresh gets the events so far, then live ones.
+    """
     # Determine week to process
     if not week:
-        from datetime import datetime, timedelta
         # Default to last week
-        today = datetime.now()
-        days_since_monday = today.weekday()
-        last_monday = today - timedelta(days=days_since_monday + 7)
-        week = last_monday.strftime('%Y-%m-%d')
+        week = _last_week_start()
 
     async def event_generator():
-        """Generate SSE events from streaming suggester"""
+        """Generate SSE events from a saved report or the (shared) streaming suggester run"""
         try:
-            async for event_data in stream_module.generate_weekly_suggestions_stream(user_id, week):
+            async for event_data in weekly_analysis_events(user_id, week, refresh):
                 # Format as SSE: data: {json}\n\n
-                yield f"data: {json.dumps(event_data)}\n\n"
+                yield _sse(event_data)
 
         except Exception as e:
             # Send error event
-            error_event = {
-                "event": "error",
-                "message": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
-            yield f"data: {json.dumps(error_event)}\n\n"
+            yield _sse(_error_event(str(e)))
 
     return StreamingResponse(
         event_generator(),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",  # Disable nginx buffering
-        }
+        headers=SSE_HEADERS
     )
 
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide analysis job queue (job table opened on first use)."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(JobStore(), weekly_analysis_events)
+    return _job_queue
+
+
+@app.post("/api/user/{user_id}/weekly_alternatives/jobs", status_code=202)
+async def create_weekly_alternatives_job(
+    user_id: str,
+    week: str = Query(None, description="ISO week start date (YYYY-MM-DD). If not provided, uses last week."),
+    refresh: bool = Query(False, description="Re-run the analysis even if a saved report exists"),
+) -> Dict[str, Any]:
+    """
+    Start a weekly analysis in the background and return its job.
+
+    The analysis keeps running if the client disconnects. Follow it with
+    GET /api/jobs/{job_id} (poll) or GET /api/jobs/{job_id}/stream (SSE,
+    resumable with Last-Event-ID). An analysis already queued or running
+    for the same (user, week) is returned instead of starting another
+    (with refresh=true, only one that is itself a refresh).
+
+    Returns:
+        {"job_id": "...", "status": "queued", "stream_url": "...", ...}
+    """
+    if not week:
+        week = _last_week_start()
+    try:
+        datetime.strptime(week, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid week format: {week}. Expected YYYY-MM-DD")
+
+    job = await get_job_queue().submit(user_id, week, refresh)
+    job["stream_url"] = f"/api/jobs/{job['job_id']}/stream"
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+def get_analysis_job(job_id: str) -> Dict[str, Any]:
+    """
+    Poll a background analysis job.
+
+    Returns:
+        Job row (status: queued | running | done | failed, report_id, error,
+        events count) plus the final event once the job has finished.
+    """
+    queue = get_job_queue()
+    job = queue.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["status"] in ("done", "failed"):
+        last = queue.store.last_event(job_id)
+        if last is not None:
+            job["result"] = last[1]
+    return job
+
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_analysis_job(
+    job_id: str,
+    last_event_id: Optional[int] = Query(None, description="Resume after this event id"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Stream a background job's events (Server-Sent Events) with ids.
+
+    Replays stored events after the last event id (query parameter, or the
+    Last-Event-ID header EventSource sends when it reconnects), then live
+    events until the job finishes.
+    """
+    queue = get_job_queue()
+    if await asyncio.to_thread(queue.store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    after = -1
+    if last_event_id is not None:
+        after = last_event_id
+    elif last_event_id_header and last_event_id_header.strip().lstrip('-').isdigit():
+        after = int(last_event_id_header)
+
+    # Jobs from a previous process are re-queued once the queue runs here
+    queue.start()
+
+    async def event_generator():
+        try:
+            async for event_id, event_data in queue.events(job_id, after):
+                yield _sse(event_data, event_id)
+        except Exception as e:
+            yield _sse(_error_event(str(e)))
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
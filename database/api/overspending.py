@@ -0,0 +1,320 @@
+# database/api/overspending.py
+
+"""
+Streaming overspending detector.
+
+Same rule as SQL_FIND_OVERSPENDING, evaluated in-process as purchases are
+ingested instead of with window functions in the warehouse:
+
+  - weekly totals per (user, category), weeks starting Monday
+  - baseline = the previous 4 weeks that have spending (ROWS BETWEEN
+    4 PRECEDING AND 1 PRECEDING), mean and sample stddev
+  - alert when the current week's total > baseline mean * 1.5
+  - z_score = (total - mean) / stddev (None when stddev is 0 or undefined)
+
+Each (user, category) keeps a ring buffer of its last 4 completed weekly
+totals with running sum / sum of squares, so an update is O(1). An event is
+emitted the moment a week crosses the threshold (once per crossing).
+
+State is per process; seed it from category_spending_summary with
+load_user_history() so alerts work right after a restart. At most
+MAX_USERS users are tracked; the least recently active are evicted (and
+re-seeded from the warehouse if they come back).
+"""
+
+import math
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .db import fetch_all
+from .rollups import week_start_of
+
+DB = os.getenv("SNOWFLAKE_DATABASE", "SNOWFLAKE_LEARNING_DB")
+SC = os.getenv("SNOWFLAKE_SCHEMA", "BALANCEIQ_CORE")
+
+WINDOW_WEEKS = 4
+THRESHOLD = 1.5  # 50% above average, as in SQL_FIND_OVERSPENDING
+MAX_EVENTS_PER_USER = 50
+MAX_USERS = int(os.getenv("OVERSPENDING_MAX_USERS", "10000"))
+
+
+class _CategoryWindow:
+    """Current week total plus a ring buffer of previous weekly totals."""
+
+    def __init__(self, window: int = WINDOW_WEEKS):
+        self.previous: Deque[Tuple[str, float]] = deque(maxlen=window)
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.week_start: Optional[str] = None
+        self.total = 0.0
+        self.alerted = False
+
+    def _push(self, week_start: str, total: float) -> None:
+        if len(self.previous) == self.previous.maxlen:
+            _, evicted = self.previous[0]
+            self.sum -= evicted
+            self.sum_sq -= evicted * evicted
+        self.previous.append((week_start, total))
+        self.sum += total
+        self.sum_sq += total * total
+
+    def add(self, week_start: str, amount: float) -> bool:
+        """
+        Add spend to a week. Returns False for weeks older than the buffer.
+        """
+        if self.week_start is None or week_start > self.week_start:
+            if self.week_start is not None:
+                self._push(self.week_start, self.total)
+            self.week_start = week_start
+            self.total = 0.0
+            self.alerted = False
+
+        if week_start == self.week_start:
+            self.total += amount
+            return True
+
+        # Late purchase for a week already in the baseline
+        for i, (week, total) in enumerate(self.previous):
+            if week == week_start:
+                self.previous[i] = (week, total + amount)
+                self.sum += amount
+                self.sum_sq += (total + amount) ** 2 - total * total
+                return True
+        return False
+
+    def mean(self) -> Optional[float]:
+        n = len(self.previous)
+        return self.sum / n if n else None
+
+    def stddev(self) -> Optional[float]:
+        """Sample standard deviation (STDDEV in Snowflake), None below 2 weeks."""
+        n = len(self.previous)
+        if n < 2:
+            return None
+        variance = (self.sum_sq - self.sum * self.sum / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class OverspendingDetector:
+    """
+    Per-(user, category) rolling detector.
+
+    Usage:
+        detector = OverspendingDetector()
+        detector.subscribe(lambda event: print(event))
+        detector.ingest("u1", "Coffee", "2024-01-24T08:00:00Z", 12.50)
+    """
+
+    def __init__(self, window: int = WINDOW_WEEKS, threshold: float = THRESHOLD,
+                 max_users: int = MAX_USERS):
+        self.window = window
+        self.threshold = threshold
+        self.max_users = max(1, max_users)
+        # user -> {category: window}, least recently active user first
+        self._users: "OrderedDict[str, Dict[Optional[str], _CategoryWindow]]" = OrderedDict()
+        self._seeded_users: Set[str] = set()
+        self._events: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Register a callback invoked with each overspending event."""
+        self._listeners.append(listener)
+
+    def _user_windows(self, user_id: str) -> Dict[Optional[str], _CategoryWindow]:
+        """A user's windows, marked most recently active (call under _lock)."""
+        windows = self._users.get(user_id)
+        if windows is None:
+            windows = self._users[user_id] = {}
+            while len(self._users) > self.max_users:
+                evicted, _ = self._users.popitem(last=False)
+                self._seeded_users.discard(evicted)
+                self._events.pop(evicted, None)
+        else:
+            self._users.move_to_end(user_id)
+        return windows
+
+    def ingest(
+        self,
+        user_id: str,
+        category: Optional[str],
+        ts: Any,
+        amount: float,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Add one purchase (or item) and return an event if its week just
+        crossed the threshold, else None.
+
+        Negative amounts (refunds) are accepted; a week that drops back
+        below the threshold can alert again if it crosses a second time.
+        """
+        week_start = week_start_of(ts)
+
+        with self._lock:
+            windows = self._user_windows(user_id)
+            win = windows.get(category)
+            if win is None:
+                win = windows[category] = _CategoryWindow(self.window)
+
+            if not win.add(week_start, float(amount)) or week_start != win.week_start:
+                return None
+
+            event = self._evaluate(user_id, category, win)
+            if event is not None:
+                self._events.setdefault(
+                    user_id, deque(maxlen=MAX_EVENTS_PER_USER)
+                ).append(event)
+
+        if event is not None:
+            for listener in self._listeners:
+                listener(event)
+        return event
+
+    def _evaluate(
+        self,
+        user_id: str,
+        category: Optional[str],
+        win: _CategoryWindow,
+    ) -> Optional[Dict[str, Any]]:
+        avg = win.mean()
+        over = avg is not None and win.total > avg * self.threshold
+
+        if not over:
+            win.alerted = False
+            return None
+        if win.alerted:
+            return None
+
+        win.alerted = True
+        stddev = win.stddev()
+        z_score = (win.total - avg) / stddev if stddev else None
+
+        return {
+            "user_id": user_id,
+            "category": category,
+            "week_start": win.week_start,
+            "total_spend": round(win.total, 2),
+            "avg_last_4_weeks": round(avg, 2),
+            "z_score": round(z_score, 2) if z_score is not None else None,
+        }
+
+    def _merge_history(
+        self,
+        windows: Dict[Optional[str], _CategoryWindow],
+        category: Optional[str],
+        weekly_totals: List[Tuple[str, float]],
+    ) -> None:
+        """
+        Rebuild a category's window from history plus whatever was ingested
+        live before the history arrived (call under _lock).
+        """
+        totals: Dict[str, float] = {}
+        for week_start, total in weekly_totals:
+            totals[week_start] = totals.get(week_start, 0.0) + float(total)
+        live = windows.get(category)
+        if live is not None:
+            for week_start, total in live.previous:
+                totals[week_start] = totals.get(week_start, 0.0) + total
+            if live.week_start is not None:
+                totals[live.week_start] = totals.get(live.week_start, 0.0) + live.total
+
+        win = _CategoryWindow(self.window)
+        for week_start in sorted(totals):
+            win.add(week_start, totals[week_start])
+        # A week already over the threshold has been reported by the
+        # warehouse query (or by a live alert); only new crossings should alert.
+        avg = win.mean()
+        win.alerted = avg is not None and win.total > avg * self.threshold
+        windows[category] = win
+
+    def seed(
+        self,
+        user_id: str,
+        category: Optional[str],
+        weekly_totals: List[Tuple[str, float]],
+    ) -> None:
+        """
+        Load historical weekly totals (any order) without emitting events,
+        merged with spend already ingested for the category.
+        """
+        with self._lock:
+            self._merge_history(self._user_windows(user_id), category, weekly_totals)
+
+    def seed_user(
+        self,
+        user_id: str,
+        history: Dict[Optional[str], List[Tuple[str, float]]],
+    ) -> bool:
+        """
+        Seed a user's history ({category: weekly totals}) once. The seeded
+        check and the merge happen under one lock, so a concurrent seed is
+        dropped and concurrent ingests are kept.
+
+        Returns False if the user was already seeded.
+        """
+        with self._lock:
+            if user_id in self._seeded_users:
+                return False
+            windows = self._user_windows(user_id)
+            for category, weekly_totals in history.items():
+                self._merge_history(windows, category, weekly_totals)
+            self._seeded_users.add(user_id)
+            return True
+
+    def recent_events(self, user_id: str) -> List[Dict[str, Any]]:
+        """Events emitted for a user since process start, newest first."""
+        with self._lock:
+            return list(reversed(self._events.get(user_id, ())))
+
+    def is_seeded(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._seeded_users
+
+
+def load_user_history(detector: OverspendingDetector, user_id: str) -> int:
+    """
+    Seed `detector` with a user's recent weekly totals from
+    category_spending_summary (subcategories summed, like the SQL query).
+
+    No query once the user is seeded. Two first requests for a user may
+    both query; seed_user() keeps only the first.
+
+    Returns the number of categories seeded.
+    """
+    if detector.is_seeded(user_id):
+        return 0
+
+    sql = f"""
+        SELECT
+          category,
+          TO_VARCHAR(week_start::DATE) AS week_start,
+          SUM(total_spend) AS total_spend
+        FROM {DB}.{SC}.category_spending_summary
+        WHERE user_id = %s
+          AND week_start >= DATEADD('week', -%s, CURRENT_DATE())
+        GROUP BY category, week_start
+    """
+
+    # Window + current week, with slack for weeks without spend
+    rows = fetch_all(sql, (user_id, (detector.window + 1) * 4))
+
+    by_category: Dict[Optional[str], List[Tuple[str, float]]] = {}
+    for row in rows:
+        by_category.setdefault(row["CATEGORY"], []).append(
+            (row["WEEK_START"], float(row["TOTAL_SPEND"] or 0))
+        )
+
+    # Keep only the weeks the ring buffer can hold
+    history = {
+        category: sorted(totals)[-(detector.window + 1):]
+        for category, totals in by_category.items()
+    }
+    if not detector.seed_user(user_id, history):
+        return 0
+    return len(history)
+
+
+# Process-wide detector used by the API
+detector = OverspendingDetector()
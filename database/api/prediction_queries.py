@@ -26,7 +26,7 @@ SELECT
   category,
   subcategory,
   week_start,
-  COUNT(DISTINCT purchase_id) AS purchases_per_week,
+  SUM(purchase_count) AS purchases_per_week,
   SUM(total_spend) AS weekly_spend,
   SUM(need_spend) AS need_spend,
   SUM(want_spend) AS want_spend,
@@ -39,8 +39,20 @@ ORDER BY category, week_start DESC
 """
 
 # Find overspending categories (for insights)
+# Subcategory buckets are summed first so each (category, week) is one row
+# in the rolling window.
 SQL_FIND_OVERSPENDING = f"""
-WITH spending_stats AS (
+WITH weekly AS (
+  SELECT
+    user_id,
+    category,
+    week_start,
+    SUM(total_spend) AS total_spend
+  FROM {DB}.{SC}.category_spending_summary
+  WHERE user_id = %(user_id)s
+  GROUP BY user_id, category, week_start
+),
+spending_stats AS (
   SELECT
     user_id,
     category,
@@ -56,8 +68,7 @@ WITH spending_stats AS (
       ORDER BY week_start
       ROWS BETWEEN 4 PRECEDING AND 1 PRECEDING
     ) AS stddev_last_4_weeks
-  FROM {DB}.{SC}.category_spending_summary
-  WHERE user_id = %(user_id)s
+  FROM weekly
 )
 SELECT
   category,
@@ -99,7 +110,7 @@ SELECT
   week_start,
   SUM(total_spend) AS weekly_spend,
   SUM(want_spend) / NULLIF(SUM(total_spend), 0) AS want_ratio,
-  COUNT(DISTINCT purchase_id) AS purchase_frequency
+  SUM(purchase_count) AS purchase_frequency
 FROM {DB}.{SC}.category_spending_summary
 WHERE user_id = %(user_id)s
   AND week_start >= DATEADD('week', -12, CURRENT_TIMESTAMP())
@@ -108,12 +119,13 @@ ORDER BY category, week_start
 """
 
 # Find cancellation candidates (recurring wants with high spend)
+# category_spending_summary has no merchant column, so candidates are
+# reported per (category, subcategory).
 SQL_CANCELLATION_CANDIDATES = f"""
 WITH recurring_wants AS (
   SELECT
     category,
     subcategory,
-    merchant,
     COUNT(DISTINCT week_start) AS weeks_purchased,
     SUM(total_spend) AS total_spend,
     AVG(total_spend) AS avg_weekly_spend,
@@ -121,12 +133,11 @@ WITH recurring_wants AS (
   FROM {DB}.{SC}.category_spending_summary
   WHERE user_id = %(user_id)s
     AND week_start >= DATEADD('week', -8, CURRENT_TIMESTAMP())
-  GROUP BY category, subcategory, merchant
+  GROUP BY category, subcategory
 )
 SELECT
   category,
   subcategory,
-  merchant,
   weeks_purchased,
   total_spend,
   avg_weekly_spend,
@@ -2,8 +2,8 @@
 
 from __future__ import annotations
 
-from typing import List, Dict, Any, Tuple
-from collections import defaultdict
+from typing import List, Dict, Any, Tuple, Optional
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 import math
 
@@ -47,59 +47,98 @@ def _compute_confidence(num_purchases: int, intervals_sec: List[float]) -> float
     return round(confidence, 3)
 
 
-def predict_next_purchases(user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+def _average_interval(intervals_sec: List[float], decay: Optional[float] = None) -> float:
     """
-    Predict the next purchase times for a given user,
-    based purely on PURCHASE_ITEMS_TEST.
+    Average of the purchase intervals, oldest first.
 
-    Logic:
-      - Fetch all rows for the user (ITEM_NAME, CATEGORY, TS).
-      - Group by (ITEM_NAME, CATEGORY).
-      - For each group with at least 2 timestamps:
-          * sort timestamps
-          * compute intervals (seconds) between consecutive purchases
-          * average interval → avg_interval_sec
-          * next_time = last_ts + avg_interval_sec
-          * confidence = _compute_confidence(num_purchases, intervals)
-      - Sort predictions by soonest next_time and return top `limit`.
+    With `decay` set (0 < decay <= 1), the newest interval has weight 1,
+    the one before it `decay`, then `decay**2`, ... so recent habits
+    dominate the estimate. Without it, every interval counts equally.
     """
+    if decay is None:
+        return sum(intervals_sec) / len(intervals_sec)
 
-    # 1) Pull history for this user from PURCHASE_ITEMS_TEST
-    rows = fetch_all(
-        """
+    weight = 1.0
+    weighted_sum = 0.0
+    total_weight = 0.0
+    for delta in reversed(intervals_sec):
+        weighted_sum += weight * delta
+        total_weight += weight
+        weight *= decay
+    return weighted_sum / total_weight
+
+
+# Prediction granularities: SQL partition columns used for the bounded-history
+# push-down, and the output fields each group key maps to.
+LEVELS: Dict[str, Tuple[str, ...]] = {
+    "item": ("ITEM_NAME", "CATEGORY"),
+    "category": ("CATEGORY",),
+    "merchant": ("MERCHANT",),
+}
+
+_LEVEL_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "item": ("item", "category"),
+    "category": ("category",),
+    "merchant": ("merchant",),
+}
+
+
+def _group_key(level: str, row: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+    """Group key for a history row at the given level (None = skip row)."""
+    if level == "item":
+        if row.get("ITEM_NAME") is None:
+            return None
+        return (row["ITEM_NAME"], row.get("CATEGORY") or "")
+    if level == "category":
+        return (row["CATEGORY"],) if row.get("CATEGORY") else None
+    if level == "merchant":
+        return (row["MERCHANT"],) if row.get("MERCHANT") else None
+    raise ValueError(f"Unknown prediction level: {level}")
+
+
+def _history_sql(levels: List[str], max_intervals: Optional[int]) -> str:
+    """
+    SQL for a user's purchase history.
+
+    When `max_intervals` is set, a row is kept only if its timestamp is among
+    the last `max_intervals + 1` distinct timestamps of its group at any
+    requested level, so the warehouse does the trimming in the same single
+    scan and we never pull a heavy user's whole history over the wire.
+    Timestamps are ranked (DENSE_RANK), not rows: the items of one order
+    share a timestamp and count as one visit.
+    """
+    window_filter = ""
+    if max_intervals is not None:
+        conditions = [
+            f"""DENSE_RANK() OVER (
+            PARTITION BY {', '.join(LEVELS[level])}
+            ORDER BY TS DESC
+          ) <= {int(max_intervals) + 1}"""
+            for level in levels
+        ]
+        window_filter = "\n        QUALIFY " + "\n          OR ".join(conditions)
+
+    return f"""
         SELECT
           ITEM_NAME,
           CATEGORY,
+          MERCHANT,
           TS
         FROM SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.PURCHASE_ITEMS_TEST
-        WHERE USER_ID = %s
+        WHERE USER_ID = %s{window_filter}
         ORDER BY TS ASC
-        """,
-        (user_id,),
-    )
-
-    if len(rows) < 2:
-        # Not enough history to say anything meaningful
-        return []
-
-    # 2) Group timestamps by (item_name, category)
-    series: Dict[Tuple[str, str], List[datetime]] = defaultdict(list)
-
-    for r in rows:
-        item_name = r.get("ITEM_NAME")
-        category = r.get("CATEGORY")
-        ts = r.get("TS")
-
-        if item_name is None or ts is None:
-            continue
+        """
 
-        key = (item_name, category or "")
-        series[key].append(ts)
 
+def _predict_series(
+    level: str,
+    series: Dict[Tuple[str, ...], deque],
+    decay: Optional[float],
+) -> List[Dict[str, Any]]:
+    """Turn grouped timestamps into predictions, soonest first."""
     predictions: List[Dict[str, Any]] = []
 
-    # 3) For each group with at least 2 purchases, compute prediction
-    for (item_name, category), times in series.items():
+    for key, times in series.items():
         if len(times) < 2:
             continue
 
@@ -116,23 +155,127 @@ def predict_next_purchases(user_id: str, limit: int = 5) -> List[Dict[str, Any]]
         if not intervals_sec:
             continue
 
-        avg_interval_sec = sum(intervals_sec) / len(intervals_sec)
+        avg_interval_sec = _average_interval(intervals_sec, decay)
         last_time = times_sorted[-1]
         predicted_time = last_time + timedelta(seconds=avg_interval_sec)
 
         num_purchases = len(times_sorted)
         confidence = _compute_confidence(num_purchases, intervals_sec)
 
-        predictions.append(
+        prediction: Dict[str, Any] = dict(zip(_LEVEL_FIELDS[level], key))
+        prediction.update(
             {
-                "item": item_name,
-                "category": category,
+                "level": level,
                 "next_time": predicted_time,
                 "confidence": confidence,
                 "samples": num_purchases,
             }
         )
+        predictions.append(prediction)
 
-    # 4) Sort by soonest predicted time & truncate
     predictions.sort(key=lambda p: p["next_time"])
-    return predictions[:limit]
+    return predictions
+
+
+def predict_levels(
+    user_id: str,
+    levels: List[str],
+    limit: int = 5,
+    max_intervals: Optional[int] = None,
+    decay: Optional[float] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Predict next purchases at several granularities from one history fetch.
+
+    Levels:
+      - item:     (ITEM_NAME, CATEGORY), e.g. "next Oat Milk Latte"
+      - category: CATEGORY, e.g. "next coffee-shop visit"
+      - merchant: MERCHANT, e.g. "next Amazon order"
+
+    A single query is issued and every row is routed into the series of
+    each requested level in one pass. Items bought together share a
+    timestamp, so at category/merchant level they count as one visit; at
+    item level every row is a purchase, as before levels existed.
+
+    Returns {level: predictions[:limit]} for each requested level.
+    """
+    for level in levels:
+        if level not in LEVELS:
+            raise ValueError(f"Unknown prediction level: {level}")
+    if max_intervals is not None and max_intervals < 1:
+        raise ValueError("max_intervals must be >= 1")
+    if decay is not None and not 0.0 < decay <= 1.0:
+        raise ValueError("decay must be in (0, 1]")
+
+    # 1) Pull history for this user from PURCHASE_ITEMS_TEST (one scan)
+    rows = fetch_all(_history_sql(levels, max_intervals), (user_id,))
+
+    if len(rows) < 2:
+        # Not enough history to say anything meaningful
+        return {level: [] for level in levels}
+
+    # 2) Group timestamps per level; rows arrive oldest first, so a bounded
+    #    deque keeps exactly the most recent window of each group.
+    window = max_intervals + 1 if max_intervals is not None else None
+    series_by_level: Dict[str, Dict[Tuple[str, ...], deque]] = {
+        level: defaultdict(lambda: deque(maxlen=window)) for level in levels
+    }
+
+    for r in rows:
+        ts = r.get("TS")
+        if ts is None:
+            continue
+
+        for level in levels:
+            key = _group_key(level, r)
+            if key is None:
+                continue
+            times = series_by_level[level][key]
+            # Several items in one order share a timestamp: one visit
+            if level != "item" and times and times[-1] == ts:
+                continue
+            times.append(ts)
+
+    # 3) Predict per level, soonest first, truncated
+    return {
+        level: _predict_series(level, series_by_level[level], decay)[:limit]
+        for level in levels
+    }
+
+
+def predict_next_purchases(
+    user_id: str,
+    limit: int = 5,
+    max_intervals: Optional[int] = None,
+    decay: Optional[float] = None,
+    level: str = "item",
+) -> List[Dict[str, Any]]:
+    """
+    Predict the next purchase times for a given user,
+    based purely on PURCHASE_ITEMS_TEST.
+
+    Logic:
+      - Fetch rows for the user (ITEM_NAME, CATEGORY, MERCHANT, TS).
+      - Group by the requested level (default: (ITEM_NAME, CATEGORY)).
+      - For each group with at least 2 timestamps:
+          * sort timestamps
+          * compute intervals (seconds) between consecutive purchases
+          * average interval → avg_interval_sec
+          * next_time = last_ts + avg_interval_sec
+          * confidence = _compute_confidence(num_purchases, intervals)
+      - Sort predictions by soonest next_time and return top `limit`.
+
+    Bounded-history options (both optional, can be combined):
+      - max_intervals: only the last N intervals per group are used.
+        The cap is applied in SQL and again while grouping, so CPU and
+        memory per call stay flat no matter how long the history is.
+      - decay: exponentially decayed average (0 < decay <= 1) instead of
+        a plain mean; smaller values adapt faster to changing habits.
+    """
+    return predict_levels(
+        user_id,
+        [level],
+        limit=limit,
+        max_intervals=max_intervals,
+        decay=decay,
+    )[level]
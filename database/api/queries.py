@@ -10,14 +10,29 @@ T_PRED = f'{DB}.{SC}.PREDICTIONS'
 # ---------- READS ----------
 SQL_HEALTH = "SELECT CURRENT_USER() U, CURRENT_ROLE() R, CURRENT_WAREHOUSE() W, CURRENT_DATABASE() D, CURRENT_SCHEMA() S"
 
+_FEED_COLUMNS = """
+  ID, USER_ID, TRANSACTION_ID, MERCHANT, AMOUNT_CENTS, CURRENCY,
+  CATEGORY, NEED_OR_WANT, CONFIDENCE, OCCURRED_AT, CREATED_AT"""
+
 SQL_FEED = f"""
-SELECT *
+SELECT{_FEED_COLUMNS}
 FROM {T_TXN}
 WHERE USER_ID = %(user_id)s
 ORDER BY OCCURRED_AT DESC
 LIMIT %(limit)s
 """
 
+# Range read on the (USER_ID, OCCURRED_AT) cluster key so only recent
+# micro-partitions of the user's TRANSACTIONS rollup are scanned.
+SQL_FEED_SINCE = f"""
+SELECT{_FEED_COLUMNS}
+FROM {T_TXN}
+WHERE USER_ID = %(user_id)s
+  AND OCCURRED_AT >= DATEADD('day', -%(days)s, CURRENT_TIMESTAMP())
+ORDER BY OCCURRED_AT DESC
+LIMIT %(limit)s
+"""
+
 SQL_STATS_BY_CATEGORY = f"""
 SELECT
   CATEGORY,
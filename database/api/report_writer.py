@@ -0,0 +1,133 @@
+# database/api/report_writer.py
+
+"""
+Buffered writer for weekly suggestion reports.
+
+The weekly job finishes one report per user. Instead of one MERGE (and one
+connection) per user, reports are buffered and flushed with a single
+multi-row MERGE (suggestions.upsert_weekly_reports) every `batch_size`
+reports or every `flush_interval` seconds, whichever comes first.
+
+A failed batch is retried with backoff. If it still fails, each report is
+written on its own so one bad row cannot sink the batch; reports that fail
+even then are kept in `failed` for the caller to log or retry later.
+Completed reports are never dropped from the buffer before they are written.
+"""
+
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .suggestions import upsert_weekly_report, upsert_weekly_reports
+
+PendingReport = Tuple[str, str, Dict[str, Any]]  # user_id, week_start, report
+
+
+class ReportWriter:
+    """
+    Usage:
+        writer = ReportWriter(batch_size=25, flush_interval=10)
+        report_id = writer.add(user_id, week_start, report)
+        ...
+        writer.close()   # flushes the tail
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 25,
+        flush_interval: float = 10.0,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        on_flush: Optional[Callable[[List[PendingReport]], None]] = None,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.on_flush = on_flush
+
+        self.written = 0
+        self.batches = 0
+        self.failed: List[Dict[str, Any]] = []
+
+        self._buffer: List[PendingReport] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+
+    def add(self, user_id: str, week_start: str, report: Dict[str, Any]) -> str:
+        """
+        Buffer a finished report. Returns its report_id (assigned now, so
+        callers can record it before the flush happens).
+        """
+        report_id = report.get('report_id') or str(uuid.uuid4())
+        report['report_id'] = report_id
+
+        with self._lock:
+            self._buffer.append((user_id, week_start, report))
+            full = len(self._buffer) >= self.batch_size
+            if self._timer is None and self.flush_interval:
+                self._timer = threading.Thread(target=self._flush_periodically, daemon=True)
+                self._timer.start()
+
+        if full:
+            self.flush()
+        return report_id
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write everything buffered so far. Returns the number of reports written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            written = self._write_batch(batch)
+            self.batches += 1
+            self.written += len(written)
+
+        if written and self.on_flush:
+            self.on_flush(written)
+        return len(written)
+
+    def _write_batch(self, batch: List[PendingReport]) -> List[PendingReport]:
+        """Write a batch, retrying; fall back to per-report upserts."""
+        for attempt in range(self.max_retries):
+            try:
+                upsert_weekly_reports(batch)
+                return batch
+            except Exception as e:
+                print(f"  ⚠️  Report batch of {len(batch)} failed "
+                      f"(attempt {attempt + 1}/{self.max_retries}): {str(e)}")
+                if attempt + 1 < self.max_retries:
+                    time.sleep(self.retry_backoff * (2 ** attempt))
+
+        written: List[PendingReport] = []
+        for user_id, week_start, report in batch:
+            try:
+                upsert_weekly_report(user_id, week_start, report)
+                written.append((user_id, week_start, report))
+            except Exception as e:
+                print(f"  ❌ Could not save report for user {user_id}: {str(e)}")
+                self.failed.append({
+                    'user_id': user_id,
+                    'week_start': week_start,
+                    'report': report,
+                    'error': str(e),
+                })
+        return written
+
+    def close(self) -> None:
+        """Stop the interval flusher and write whatever is left."""
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
@@ -0,0 +1,301 @@
+# database/api/rollups.py
+
+"""
+Local refresh path for the incrementally maintained rollups.
+
+06_spending_rollups.sql keeps category_spending_summary and
+transactions_for_predictions up to date with a stream + task, and
+07_transactions_rollup.sql does the same for TRANSACTIONS. This module
+runs the same bucket-scoped refresh from Python, for environments where the
+task is not running (trial accounts, manual backfills, ingest scripts that
+want their rollups fresh immediately).
+
+Only the (user, category, subcategory, week) buckets and purchases touched by
+the given items are recomputed; nothing else in the rollups is read or written.
+
+Security: Uses parameterized queries to prevent SQL injection
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .db import execute_transaction
+from .insights import invalidation_statement
+
+DB = os.getenv("SNOWFLAKE_DATABASE", "SNOWFLAKE_LEARNING_DB")
+SC = os.getenv("SNOWFLAKE_SCHEMA", "BALANCEIQ_CORE")
+
+T_ITEMS = f"{DB}.{SC}.purchase_items"
+T_SUMMARY = f"{DB}.{SC}.category_spending_summary"
+T_TXN_PRED = f"{DB}.{SC}.transactions_for_predictions"
+T_TXN = f"{DB}.{SC}.TRANSACTIONS"
+
+SpendingBucket = Tuple[str, Optional[str], Optional[str], str]  # user, category, subcategory, week_start
+PurchaseKey = Tuple[str, str]  # user_id, purchase_id
+
+
+def week_start_of(ts: Any) -> str:
+    """
+    Monday of the week containing `ts`, as YYYY-MM-DD.
+
+    Matches Snowflake's DATE_TRUNC('week', ts) with the default WEEK_START.
+    """
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    day = ts.date() if isinstance(ts, datetime) else ts
+    if not isinstance(day, date):
+        raise ValueError(f"Unsupported timestamp: {ts!r}")
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def affected_spending_buckets(items: Iterable[Dict[str, Any]]) -> Set[SpendingBucket]:
+    """
+    Collect the rollup buckets touched by a set of item rows.
+
+    Expected input: item dicts with user_id, category, subcategory, ts
+                    (keys may be lower- or upper-case, as returned by the DB)
+    Expected output: set of (user_id, category, subcategory, week_start)
+    """
+    buckets: Set[SpendingBucket] = set()
+    for item in items:
+        row = {k.lower(): v for k, v in item.items()}
+        if not row.get("user_id") or row.get("ts") is None:
+            continue
+        buckets.add(
+            (
+                row["user_id"],
+                row.get("category"),
+                row.get("subcategory"),
+                week_start_of(row["ts"]),
+            )
+        )
+    return buckets
+
+
+def affected_purchases(items: Iterable[Dict[str, Any]]) -> Set[PurchaseKey]:
+    """
+    Collect the (user_id, purchase_id) pairs touched by a set of item rows.
+    """
+    keys: Set[PurchaseKey] = set()
+    for item in items:
+        row = {k.lower(): v for k, v in item.items()}
+        if row.get("user_id") and row.get("purchase_id"):
+            keys.add((row["user_id"], row["purchase_id"]))
+    return keys
+
+
+def _values_clause(rows: List[tuple], casts: Tuple[str, ...]) -> Tuple[str, List[Any]]:
+    """Build a parameterized VALUES list plus its flat parameter list."""
+    placeholders = "(" + ", ".join(["%s"] * len(casts)) + ")"
+    values_sql = ",\n              ".join([placeholders] * len(rows))
+    columns = ",\n            ".join(
+        cast.format(f"column{i + 1}") for i, cast in enumerate(casts)
+    )
+    params: List[Any] = [value for row in rows for value in row]
+    return f"SELECT\n            {columns}\n          FROM VALUES\n              {values_sql}", params
+
+
+def spending_refresh_statements(buckets: Set[SpendingBucket]) -> List[tuple]:
+    """
+    Statements that recompute category_spending_summary for `buckets` only.
+
+    Delete + re-insert also removes buckets whose items were all refunded or
+    reversed, which a plain MERGE would leave behind.
+    """
+    if not buckets:
+        return []
+
+    values_sql, params = _values_clause(
+        sorted(buckets, key=lambda b: tuple("" if v is None else v for v in b)),
+        (
+            "{} AS user_id",
+            "{} AS category",
+            "{} AS subcategory",
+            "TO_DATE({}) AS week_start",
+        ),
+    )
+
+    delete_sql = f"""
+        DELETE FROM {T_SUMMARY} t
+        USING (
+          {values_sql}
+        ) b
+        WHERE t.user_id = b.user_id
+          AND EQUAL_NULL(t.category, b.category)
+          AND EQUAL_NULL(t.subcategory, b.subcategory)
+          AND t.week_start::DATE = b.week_start
+    """
+
+    insert_sql = f"""
+        INSERT INTO {T_SUMMARY} (
+          user_id, category, subcategory, week_start, month_start,
+          purchase_count, item_count, total_spend, avg_item_spend,
+          need_spend, want_spend, avg_confidence, user_labeled_count
+        )
+        SELECT
+          p.user_id,
+          p.category,
+          p.subcategory,
+          DATE_TRUNC('week', p.ts) AS week_start,
+          DATE_TRUNC('month', p.ts) AS month_start,
+          COUNT(DISTINCT p.purchase_id),
+          COUNT(p.item_id),
+          SUM(p.price * p.qty),
+          AVG(p.price * p.qty),
+          SUM(CASE WHEN COALESCE(p.user_needwant, p.detected_needwant) = 'need' THEN p.price * p.qty ELSE 0 END),
+          SUM(CASE WHEN COALESCE(p.user_needwant, p.detected_needwant) = 'want' THEN p.price * p.qty ELSE 0 END),
+          AVG(p.confidence),
+          COUNT(CASE WHEN p.user_needwant IS NOT NULL THEN 1 END)
+        FROM {T_ITEMS} p
+        JOIN (
+          {values_sql}
+        ) b
+          ON p.user_id = b.user_id
+         AND EQUAL_NULL(p.category, b.category)
+         AND EQUAL_NULL(p.subcategory, b.subcategory)
+         AND p.ts >= b.week_start
+         AND p.ts < DATEADD('day', 7, b.week_start)
+        WHERE p.status = 'active'
+        -- Group by the expressions: a bare week_start would bind to b.week_start
+        GROUP BY p.user_id, p.category, p.subcategory, DATE_TRUNC('week', p.ts), DATE_TRUNC('month', p.ts)
+    """
+
+    return [(delete_sql, tuple(params)), (insert_sql, tuple(params))]
+
+
+def prediction_txn_refresh_statements(purchases: Set[PurchaseKey]) -> List[tuple]:
+    """
+    Statements that recompute transactions_for_predictions for `purchases` only.
+    """
+    if not purchases:
+        return []
+
+    values_sql, params = _values_clause(
+        sorted(purchases),
+        ("{} AS user_id", "{} AS purchase_id"),
+    )
+
+    delete_sql = f"""
+        DELETE FROM {T_TXN_PRED} t
+        USING (
+          {values_sql}
+        ) c
+        WHERE t.user_id = c.user_id
+          AND t.id = c.purchase_id
+    """
+
+    insert_sql = f"""
+        INSERT INTO {T_TXN_PRED} (
+          id, user_id, merchant, amount_cents, currency, category, need_or_want,
+          confidence, occurred_at, item_text, item_embed, created_at
+        )
+        SELECT
+          p.purchase_id,
+          p.user_id,
+          ANY_VALUE(p.merchant),
+          SUM(p.price * p.qty),
+          'USD',
+          MODE(p.category),
+          MODE(COALESCE(p.user_needwant, p.detected_needwant)),
+          AVG(p.confidence),
+          ANY_VALUE(p.ts),
+          LISTAGG(p.item_name, ' · ') WITHIN GROUP (ORDER BY p.item_id),
+          ANY_VALUE(p.item_embed),
+          MIN(p.created_at)
+        FROM {T_ITEMS} p
+        JOIN (
+          {values_sql}
+        ) c
+          ON p.user_id = c.user_id
+         AND p.purchase_id = c.purchase_id
+        WHERE p.status = 'active'
+        GROUP BY p.purchase_id, p.user_id
+    """
+
+    return [(delete_sql, tuple(params)), (insert_sql, tuple(params))]
+
+
+def transactions_refresh_statements(purchases: Set[PurchaseKey]) -> List[tuple]:
+    """
+    Statements that recompute TRANSACTIONS rows for `purchases` only.
+
+    A purchase whose items were all refunded or reversed has no active items
+    left, so it is deleted and not re-inserted.
+    """
+    if not purchases:
+        return []
+
+    values_sql, params = _values_clause(
+        sorted(purchases),
+        ("{} AS user_id", "{} AS purchase_id"),
+    )
+
+    delete_sql = f"""
+        DELETE FROM {T_TXN} t
+        USING (
+          {values_sql}
+        ) c
+        WHERE t.user_id = c.user_id
+          AND t.id = c.purchase_id
+    """
+
+    insert_sql = f"""
+        INSERT INTO {T_TXN} (
+          id, user_id, merchant, occurred_at, amount_cents, currency,
+          category, need_or_want, confidence, transaction_id, created_at
+        )
+        SELECT
+          p.purchase_id,
+          p.user_id,
+          ANY_VALUE(p.merchant),
+          ANY_VALUE(p.ts),
+          SUM(p.price * p.qty),
+          'USD',
+          MODE(p.category),
+          MODE(COALESCE(p.user_needwant, p.detected_needwant)),
+          AVG(p.confidence),
+          p.purchase_id,
+          MIN(p.created_at)
+        FROM {T_ITEMS} p
+        JOIN (
+          {values_sql}
+        ) c
+          ON p.user_id = c.user_id
+         AND p.purchase_id = c.purchase_id
+        WHERE p.status = 'active'
+        GROUP BY p.purchase_id, p.user_id
+    """
+
+    return [(delete_sql, tuple(params)), (insert_sql, tuple(params))]
+
+
+def refresh_rollups_for_items(items: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Refresh every rollup bucket touched by `items` in one transaction.
+
+    Call with both the new and the previous version of changed rows (e.g. a
+    refund moves an item out of its bucket) so old buckets are corrected too.
+
+    Expected input: item dicts with user_id, purchase_id, category, subcategory, ts
+    Expected output: {"buckets": n, "purchases": m} refreshed
+    """
+    buckets = affected_spending_buckets(items)
+    purchases = affected_purchases(items)
+
+    statements = (
+        spending_refresh_statements(buckets)
+        + prediction_txn_refresh_statements(purchases)
+        + transactions_refresh_statements(purchases)
+    )
+
+    # Stored insights for these users are now stale
+    invalidate = invalidation_statement(
+        {bucket[0] for bucket in buckets} | {user_id for user_id, _ in purchases}
+    )
+    if invalidate:
+        statements.append(invalidate)
+
+    execute_transaction(statements)
+
+    return {"buckets": len(buckets), "purchases": len(purchases)}
@@ -6,16 +6,99 @@ Database helpers for weekly alternative suggestions reports.
 Provides functions to upsert and retrieve weekly suggestion reports
 from the weekly_suggestions_reports table.
 
+Parsed reports are kept in a process-wide LRU cache keyed by
+(user_id, week_start). Reports only change when the weekly job runs, so a
+cache hit is validated with a cheap metadata query (report_id, updated_at)
+instead of re-reading and re-parsing report_json.
+
 Security: Uses parameterized queries to prevent SQL injection.
 """
 
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from .db import fetch_all, execute
+import copy
 import json
+import os
+import threading
 import uuid
 
 
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "512"))
+
+# Stored reports younger than this are served instead of re-running the AI
+REPORT_MAX_AGE_HOURS = float(os.getenv("REPORT_MAX_AGE_HOURS", "168"))
+
+# (user_id, week_start) -> (updated_at, parsed report)
+_report_cache: "OrderedDict[Tuple[str, str], Tuple[Any, Dict[str, Any]]]" = OrderedDict()
+_report_cache_lock = threading.Lock()
+
+
+def _week_key(week_start: Any) -> str:
+    """Normalize a week_start (str, date or datetime) to YYYY-MM-DD."""
+    return str(week_start)[:10]
+
+
+def _cache_get(user_id: str, week_start: Any, updated_at: Any) -> Optional[Dict[str, Any]]:
+    """Return a cached report if its updated_at still matches, else None."""
+    key = (user_id, _week_key(week_start))
+    with _report_cache_lock:
+        entry = _report_cache.get(key)
+        if entry is None or entry[0] != updated_at:
+            return None
+        _report_cache.move_to_end(key)
+        # Deep copy: callers may mutate nested findings/items
+        return copy.deepcopy(entry[1])
+
+
+def _cache_put(user_id: str, week_start: Any, report: Dict[str, Any]) -> None:
+    key = (user_id, _week_key(week_start))
+    with _report_cache_lock:
+        _report_cache[key] = (report.get('updated_at'), copy.deepcopy(report))
+        _report_cache.move_to_end(key)
+        while len(_report_cache) > REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+
+
+def invalidate_report_cache(user_id: str, week_start: Optional[str] = None) -> None:
+    """
+    Drop cached reports for a user (one week, or all weeks if not given).
+    """
+    with _report_cache_lock:
+        if week_start is not None:
+            _report_cache.pop((user_id, _week_key(week_start)), None)
+            return
+        for key in [k for k in _report_cache if k[0] == user_id]:
+            del _report_cache[key]
+
+
+def clear_report_cache() -> None:
+    """Drop every cached report."""
+    with _report_cache_lock:
+        _report_cache.clear()
+
+
+def _parse_report_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse report_json from a report row and enrich it with metadata."""
+    report_json = row.get('REPORT_JSON')
+    if report_json:
+        # Snowflake returns VARIANT as dict, not string
+        if isinstance(report_json, str):
+            report_data = json.loads(report_json)
+        else:
+            report_data = report_json
+    else:
+        report_data = {}
+
+    # Enrich with metadata
+    report_data['report_id'] = row.get('REPORT_ID')
+    report_data['created_at'] = row.get('CREATED_AT')
+    report_data['updated_at'] = row.get('UPDATED_AT')
+
+    return report_data
+
+
 def upsert_weekly_report(
     user_id: str,
     week_start: str,
@@ -38,7 +121,7 @@ def upsert_weekly_report(
     Security: Uses parameterized queries to prevent SQL injection
     """
     # Generate or use existing report_id
-    report_id = str(uuid.uuid4())
+    report_id = report_data.get('report_id') or str(uuid.uuid4())
 
     # Extract metadata from report
     week_end = report_data.get('week_end', week_start)
@@ -125,9 +208,152 @@ def upsert_weekly_report(
     )
 
     execute(sql, params)
+
+    # This process's copy is stale now; other processes see the new
+    # updated_at on their next validation query.
+    invalidate_report_cache(user_id, week_start)
+
     return report_id
 
 
+def upsert_weekly_reports(
+    reports: List[Tuple[str, str, Dict[str, Any]]]
+) -> List[str]:
+    """
+    Upsert many weekly reports with one multi-row MERGE (idempotent).
+
+    Same semantics as upsert_weekly_report(), for the weekly job's buffered
+    writer: one round trip per batch instead of one per user.
+
+    Args:
+        reports: List of (user_id, week_start, report_data). A report_id
+                 already set in report_data is kept, otherwise one is
+                 generated. If the same (user_id, week_start) appears more
+                 than once, only the last one is written.
+
+    Returns:
+        report_ids in input order: for each input, the id stored for its
+        (user_id, week_start), i.e. the last duplicate's id
+
+    Security: Uses parameterized queries to prevent SQL injection
+    """
+    if not reports:
+        return []
+
+    # Dedupe first (last write wins): MERGE fails on duplicate source keys
+    keys = [(user_id, _week_key(week_start)) for user_id, week_start, _ in reports]
+    last_index = {key: i for i, key in enumerate(keys)}
+
+    latest: Dict[Tuple[str, str], tuple] = {}
+    for key, i in last_index.items():
+        user_id, week_start, report_data = reports[i]
+        report_id = report_data.get('report_id') or str(uuid.uuid4())
+
+        # Location is not stored (city/state/country only, no lat/lon)
+        latest[key] = (
+            report_id,
+            user_id,
+            week_start,
+            report_data.get('week_end', week_start),
+            None,
+            None,
+            None,
+            report_data.get('items_analyzed', 0),
+            report_data.get('items_with_alternatives', 0),
+            report_data.get('total_potential_savings', 0.0),
+            json.dumps(report_data),
+            report_data.get('mcp_calls_made', 0),
+            report_data.get('processing_time_ms', 0),
+        )
+
+    rows = list(latest.values())
+    row_placeholders = "(" + ", ".join(["%s"] * 13) + ")"
+    values_sql = ",\n                ".join([row_placeholders] * len(rows))
+
+    # VALUES only accepts constants, so report_json is parsed in the SELECT
+    sql = f"""
+        MERGE INTO SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.weekly_suggestions_reports AS target
+        USING (
+            SELECT
+                column1 AS report_id,
+                column2 AS user_id,
+                TO_DATE(column3) AS week_start,
+                TO_DATE(column4) AS week_end,
+                column5 AS location_city,
+                column6 AS location_state,
+                column7 AS location_country,
+                column8 AS total_items,
+                column9 AS items_with_alts,
+                column10 AS total_savings_usd,
+                PARSE_JSON(column11) AS report_json,
+                column12 AS mcp_calls_made,
+                column13 AS processing_time_ms,
+                CURRENT_TIMESTAMP() AS created_at,
+                CURRENT_TIMESTAMP() AS updated_at
+            FROM VALUES
+                {values_sql}
+        ) AS source
+        ON target.user_id = source.user_id
+           AND target.week_start = source.week_start
+        WHEN MATCHED THEN UPDATE SET
+            target.report_id = source.report_id,
+            target.week_end = source.week_end,
+            target.location_city = source.location_city,
+            target.location_state = source.location_state,
+            target.location_country = source.location_country,
+            target.total_items = source.total_items,
+            target.items_with_alts = source.items_with_alts,
+            target.total_savings_usd = source.total_savings_usd,
+            target.report_json = source.report_json,
+            target.mcp_calls_made = source.mcp_calls_made,
+            target.processing_time_ms = source.processing_time_ms,
+            target.updated_at = source.updated_at
+        WHEN NOT MATCHED THEN INSERT (
+            report_id, user_id, week_start, week_end,
+            location_city, location_state, location_country,
+            total_items, items_with_alts, total_savings_usd,
+            report_json, mcp_calls_made, processing_time_ms,
+            created_at, updated_at
+        ) VALUES (
+            source.report_id, source.user_id, source.week_start, source.week_end,
+            source.location_city, source.location_state, source.location_country,
+            source.total_items, source.items_with_alts, source.total_savings_usd,
+            source.report_json, source.mcp_calls_made, source.processing_time_ms,
+            source.created_at, source.updated_at
+        )
+    """
+
+    params = tuple(value for row in rows for value in row)
+    execute(sql, params)
+
+    for user_id, week in latest:
+        invalidate_report_cache(user_id, week)
+
+    return [latest[key][0] for key in keys]
+
+
+def report_is_fresh(
+    report: Optional[Dict[str, Any]],
+    max_age_hours: float = REPORT_MAX_AGE_HOURS
+) -> bool:
+    """
+    True if a stored report can be served as-is: it exists, its run did not
+    fail, and it was written less than `max_age_hours` ago.
+    """
+    if not report or report.get('error'):
+        return False
+    updated_at = report.get('updated_at') or report.get('created_at')
+    if isinstance(updated_at, str):
+        try:
+            updated_at = datetime.fromisoformat(updated_at)
+        except ValueError:
+            return False
+    if not isinstance(updated_at, datetime):
+        return False
+    now = datetime.now(updated_at.tzinfo) if updated_at.tzinfo else datetime.now()
+    return (now - updated_at).total_seconds() < max_age_hours * 3600
+
+
 def get_weekly_report(
     user_id: str,
     week_start: str
@@ -135,6 +361,9 @@ def get_weekly_report(
     """
     Retrieve a weekly suggestions report from Snowflake.
 
+    A cached report is validated against updated_at with a metadata-only
+    query; report_json is only read and parsed on a miss.
+
     Args:
         user_id: User identifier
         week_start: ISO week start date (YYYY-MM-DD)
@@ -144,6 +373,26 @@ def get_weekly_report(
 
     Security: Uses parameterized queries to prevent SQL injection
     """
+    params = (user_id, week_start)
+
+    with _report_cache_lock:
+        maybe_cached = (user_id, _week_key(week_start)) in _report_cache
+
+    if maybe_cached:
+        meta_sql = """
+            SELECT report_id, updated_at
+            FROM SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.weekly_suggestions_reports
+            WHERE user_id = %s
+              AND week_start = TO_DATE(%s)
+        """
+        meta = fetch_all(meta_sql, params)
+        if not meta:
+            invalidate_report_cache(user_id, week_start)
+            return None
+        cached = _cache_get(user_id, week_start, meta[0].get('UPDATED_AT'))
+        if cached is not None:
+            return cached
+
     sql = """
         SELECT
             report_id,
@@ -166,40 +415,69 @@ def get_weekly_report(
           AND week_start = TO_DATE(%s)
     """
 
-    params = (user_id, week_start)
     rows = fetch_all(sql, params)
 
     if not rows:
         return None
 
-    row = rows[0]
+    report_data = _parse_report_row(rows[0])
+    _cache_put(user_id, week_start, report_data)
 
-    # Parse the JSON report
-    report_json = row.get('REPORT_JSON')
-    if report_json:
-        # Snowflake returns VARIANT as dict, not string
-        if isinstance(report_json, str):
-            report_data = json.loads(report_json)
-        else:
-            report_data = report_json
-    else:
-        report_data = {}
+    return report_data
 
-    # Enrich with metadata
-    report_data['report_id'] = row.get('REPORT_ID')
-    report_data['created_at'] = row.get('CREATED_AT')
-    report_data['updated_at'] = row.get('UPDATED_AT')
 
-    return report_data
+def warm_report_cache(
+    week_start: str,
+    limit: int = REPORT_CACHE_SIZE
+) -> int:
+    """
+    Load the most recently updated reports for a week into the cache.
+
+    Called at startup for last week, the week the app opens on, so the
+    first requests only pay the metadata check in get_weekly_report().
+
+    Returns:
+        Number of reports cached
+    """
+    sql = """
+        SELECT
+            report_id,
+            user_id,
+            week_start,
+            week_end,
+            location_city,
+            location_state,
+            location_country,
+            total_items,
+            items_with_alts,
+            total_savings_usd,
+            report_json,
+            mcp_calls_made,
+            processing_time_ms,
+            created_at,
+            updated_at
+        FROM SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.weekly_suggestions_reports
+        WHERE week_start = TO_DATE(%s)
+        ORDER BY updated_at DESC
+        LIMIT %s
+    """
+
+    rows = fetch_all(sql, (week_start, limit))
+    for row in rows:
+        _cache_put(row.get('USER_ID'), week_start, _parse_report_row(row))
+    return len(rows)
 
 
 def get_recent_reports(
     user_id: str,
     limit: int = 4
-) -> list[Dict[str, Any]]:
+) -> List[Dict[str, Any]]:
     """
     Retrieve recent weekly suggestion reports for a user.
 
+    Lists (week_start, updated_at) first, reuses cached weeks whose
+    updated_at still matches, and reads report_json only for the rest.
+
     Args:
         user_id: User identifier
         limit: Maximum number of reports to return (default 4 = 1 month)
@@ -207,21 +485,92 @@ def get_recent_reports(
     Returns:
         List of report dicts, ordered by week_start descending
 
+    Security: Uses parameterized queries to prevent SQL injection
+    """
+    meta_sql = """
+        SELECT
+            week_start,
+            updated_at
+        FROM SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.weekly_suggestions_reports
+        WHERE user_id = %s
+        ORDER BY week_start DESC
+        LIMIT %s
+    """
+
+    meta = fetch_all(meta_sql, (user_id, limit))
+
+    reports: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for row in meta:
+        week = _week_key(row.get('WEEK_START'))
+        cached = _cache_get(user_id, week, row.get('UPDATED_AT'))
+        if cached is not None:
+            reports[week] = cached
+        else:
+            missing.append(week)
+
+    if missing:
+        placeholders = ", ".join(["TO_DATE(%s)"] * len(missing))
+        sql = f"""
+            SELECT
+                report_id,
+                user_id,
+                week_start,
+                week_end,
+                total_items,
+                items_with_alts,
+                total_savings_usd,
+                report_json,
+                mcp_calls_made,
+                processing_time_ms,
+                created_at,
+                updated_at
+            FROM SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.weekly_suggestions_reports
+            WHERE user_id = %s
+              AND week_start IN ({placeholders})
+        """
+
+        rows = fetch_all(sql, (user_id, *missing))
+        for row in rows:
+            week = _week_key(row.get('WEEK_START'))
+            report_data = _parse_report_row(row)
+            _cache_put(user_id, week, report_data)
+            reports[week] = report_data
+
+    # Keep week_start descending order from the metadata listing
+    return [reports[_week_key(row.get('WEEK_START'))] for row in meta
+            if _week_key(row.get('WEEK_START')) in reports]
+
+
+def get_report_summaries(
+    user_id: str,
+    limit: int = 4
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve recent weekly report summaries without findings.
+
+    Selects only the scalar columns, so report_json is neither transferred
+    nor parsed. Full findings for a week are loaded on demand with
+    get_weekly_report().
+
+    Args:
+        user_id: User identifier
+        limit: Maximum number of summaries to return
+
+    Returns:
+        List of summary dicts (same keys as the full report), ordered by
+        week_start descending
+
     Security: Uses parameterized queries to prevent SQL injection
     """
     sql = """
         SELECT
             report_id,
-            user_id,
             week_start,
             week_end,
             total_items,
             items_with_alts,
             total_savings_usd,
-            report_json,
-            mcp_calls_made,
-            processing_time_ms,
-            created_at,
             updated_at
         FROM SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.weekly_suggestions_reports
         WHERE user_id = %s
@@ -229,26 +578,19 @@ def get_recent_reports(
         LIMIT %s
     """
 
-    params = (user_id, limit)
-    rows = fetch_all(sql, params)
-
-    reports = []
-    for row in rows:
-        # Parse the JSON report
-        report_json = row.get('REPORT_JSON')
-        if report_json:
-            if isinstance(report_json, str):
-                report_data = json.loads(report_json)
-            else:
-                report_data = report_json
-        else:
-            report_data = {}
-
-        # Enrich with metadata
-        report_data['report_id'] = row.get('REPORT_ID')
-        report_data['created_at'] = row.get('CREATED_AT')
-        report_data['updated_at'] = row.get('UPDATED_AT')
-
-        reports.append(report_data)
-
-    return reports
+    rows = fetch_all(sql, (user_id, limit))
+
+    return [
+        {
+            'user_id': user_id,
+            'report_id': row.get('REPORT_ID'),
+            'week_start': _week_key(row.get('WEEK_START')),
+            'week_end': _week_key(row.get('WEEK_END')) if row.get('WEEK_END') else None,
+            'items_analyzed': row.get('TOTAL_ITEMS'),
+            'items_with_alternatives': row.get('ITEMS_WITH_ALTS'),
+            'total_potential_savings': float(row['TOTAL_SAVINGS_USD'])
+                if row.get('TOTAL_SAVINGS_USD') is not None else 0.0,
+            'updated_at': row.get('UPDATED_AT'),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,207 @@
+-- Incrementally Maintained Spending Rollups
+-- Replaces the category_spending_summary and transactions_for_predictions
+-- views (02_purchase_items_schema.sql) with tables of the same name, so
+-- prediction_queries.py keeps working unchanged.
+--
+-- Purpose: SQL_FIND_OVERSPENDING, SQL_CATEGORY_TRENDS and
+--          SQL_CANCELLATION_CANDIDATES used to re-aggregate all of
+--          purchase_items on every call. The rollups are now refreshed from
+--          a stream, and each refresh only recomputes the
+--          (user, category, subcategory, week) buckets and purchases
+--          touched by new or changed items.
+--
+-- Run after: 02_purchase_items_schema.sql
+-- Local path: database/api/rollups.py runs the same bucket-scoped refresh
+--             from Python (for accounts/tables without the task running).
+
+USE DATABASE SNOWFLAKE_LEARNING_DB;
+USE SCHEMA BALANCEIQ_CORE;
+
+-- ============================================================================
+-- Rollup Tables (replace the aggregating views)
+-- ============================================================================
+
+DROP VIEW IF EXISTS category_spending_summary;
+DROP VIEW IF EXISTS transactions_for_predictions;
+
+CREATE OR REPLACE TABLE category_spending_summary (
+  user_id            STRING,
+  category           STRING,
+  subcategory        STRING,
+
+  -- Time windows
+  week_start         TIMESTAMP_TZ,
+  month_start        TIMESTAMP_TZ,
+
+  -- Aggregates
+  purchase_count     NUMBER(18,0),
+  item_count         NUMBER(18,0),
+  total_spend        NUMBER(24,4),
+  avg_item_spend     NUMBER(24,4),
+
+  -- Need/Want breakdown
+  need_spend         NUMBER(24,4),
+  want_spend         NUMBER(24,4),
+
+  -- Quality metrics
+  avg_confidence     FLOAT,
+  user_labeled_count NUMBER(18,0),
+
+  -- Audit
+  refreshed_at       TIMESTAMP_TZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+ALTER TABLE category_spending_summary CLUSTER BY (user_id, week_start);
+
+CREATE OR REPLACE TABLE transactions_for_predictions (
+  id                 STRING,
+  user_id            STRING,
+  merchant           STRING,
+  amount_cents       NUMBER(24,4),
+  currency           STRING,
+  category           STRING,
+  need_or_want       STRING,
+  confidence         FLOAT,
+  occurred_at        TIMESTAMP_TZ,
+  item_text          STRING,
+  item_embed         VECTOR(FLOAT, 768),
+  created_at         TIMESTAMP_TZ,
+  refreshed_at       TIMESTAMP_TZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+ALTER TABLE transactions_for_predictions CLUSTER BY (user_id, occurred_at);
+
+-- ============================================================================
+-- Change Stream
+-- ============================================================================
+-- Updates (status -> 'refunded'/'reversed', user_needwant overrides) show up
+-- as a DELETE/INSERT pair, so both the old and the new bucket are refreshed.
+
+CREATE OR REPLACE STREAM purchase_items_rollup_stream
+  ON TABLE purchase_items
+  SHOW_INITIAL_ROWS = TRUE;   -- first refresh backfills existing history
+
+-- ============================================================================
+-- Refresh Procedure (bucket-scoped delete + re-insert)
+-- ============================================================================
+
+CREATE OR REPLACE PROCEDURE refresh_spending_rollups()
+RETURNS STRING
+LANGUAGE SQL
+AS
+$$
+BEGIN
+  -- DDL commits implicitly, so the staging table is created before the
+  -- transaction starts; only DML runs between BEGIN and COMMIT
+  CREATE OR REPLACE TEMPORARY TABLE rollup_changes (
+    user_id      STRING,
+    category     STRING,
+    subcategory  STRING,
+    week_start   DATE,
+    purchase_id  STRING
+  );
+
+  BEGIN TRANSACTION;
+
+  -- Consuming the stream inside the transaction advances its offset on
+  -- COMMIT only, together with the rollup writes below
+  INSERT INTO rollup_changes (user_id, category, subcategory, week_start, purchase_id)
+  SELECT DISTINCT
+    user_id,
+    category,
+    subcategory,
+    DATE_TRUNC('week', ts)::DATE AS week_start,
+    purchase_id
+  FROM purchase_items_rollup_stream;
+
+  -- 1) category_spending_summary: recompute affected buckets only
+  DELETE FROM category_spending_summary t
+  USING (SELECT DISTINCT user_id, category, subcategory, week_start FROM rollup_changes) b
+  WHERE t.user_id = b.user_id
+    AND EQUAL_NULL(t.category, b.category)
+    AND EQUAL_NULL(t.subcategory, b.subcategory)
+    AND t.week_start::DATE = b.week_start;
+
+  INSERT INTO category_spending_summary (
+    user_id, category, subcategory, week_start, month_start,
+    purchase_count, item_count, total_spend, avg_item_spend,
+    need_spend, want_spend, avg_confidence, user_labeled_count
+  )
+  SELECT
+    p.user_id,
+    p.category,
+    p.subcategory,
+    DATE_TRUNC('week', p.ts) AS week_start,
+    DATE_TRUNC('month', p.ts) AS month_start,
+    COUNT(DISTINCT p.purchase_id),
+    COUNT(p.item_id),
+    SUM(p.price * p.qty),
+    AVG(p.price * p.qty),
+    SUM(CASE WHEN COALESCE(p.user_needwant, p.detected_needwant) = 'need' THEN p.price * p.qty ELSE 0 END),
+    SUM(CASE WHEN COALESCE(p.user_needwant, p.detected_needwant) = 'want' THEN p.price * p.qty ELSE 0 END),
+    AVG(p.confidence),
+    COUNT(CASE WHEN p.user_needwant IS NOT NULL THEN 1 END)
+  FROM purchase_items p
+  JOIN (SELECT DISTINCT user_id, category, subcategory, week_start FROM rollup_changes) b
+    ON p.user_id = b.user_id
+   AND EQUAL_NULL(p.category, b.category)
+   AND EQUAL_NULL(p.subcategory, b.subcategory)
+   AND p.ts >= b.week_start                       -- range predicate keeps (user_id, ts) pruning
+   AND p.ts < DATEADD('day', 7, b.week_start)
+  WHERE p.status = 'active'
+  -- Group by the expressions: a bare week_start would bind to b.week_start
+  GROUP BY p.user_id, p.category, p.subcategory, DATE_TRUNC('week', p.ts), DATE_TRUNC('month', p.ts);
+
+  -- 2) transactions_for_predictions: recompute affected purchases only
+  DELETE FROM transactions_for_predictions t
+  USING (SELECT DISTINCT user_id, purchase_id FROM rollup_changes) c
+  WHERE t.user_id = c.user_id
+    AND t.id = c.purchase_id;
+
+  INSERT INTO transactions_for_predictions (
+    id, user_id, merchant, amount_cents, currency, category, need_or_want,
+    confidence, occurred_at, item_text, item_embed, created_at
+  )
+  SELECT
+    p.purchase_id,
+    p.user_id,
+    ANY_VALUE(p.merchant),
+    SUM(p.price * p.qty),
+    'USD',
+    MODE(p.category),
+    MODE(COALESCE(p.user_needwant, p.detected_needwant)),
+    AVG(p.confidence),
+    ANY_VALUE(p.ts),
+    LISTAGG(p.item_name, ' · ') WITHIN GROUP (ORDER BY p.item_id),
+    ANY_VALUE(p.item_embed),
+    MIN(p.created_at)
+  FROM purchase_items p
+  JOIN (SELECT DISTINCT user_id, purchase_id FROM rollup_changes) c
+    ON p.user_id = c.user_id
+   AND p.purchase_id = c.purchase_id
+  WHERE p.status = 'active'
+  GROUP BY p.purchase_id, p.user_id;
+
+  COMMIT;
+  RETURN 'ok';
+END;
+$$;
+
+-- ============================================================================
+-- Scheduled Task (only runs when the stream has new rows)
+-- ============================================================================
+
+CREATE OR REPLACE TASK refresh_spending_rollups_task
+  WAREHOUSE = COMPUTE_WH          -- use your SNOWFLAKE_WAREHOUSE
+  SCHEDULE = '5 MINUTE'
+  WHEN SYSTEM$STREAM_HAS_DATA('purchase_items_rollup_stream')
+AS
+  CALL refresh_spending_rollups();
+
+ALTER TASK refresh_spending_rollups_task RESUME;
+
+COMMENT ON TABLE category_spending_summary IS 'Incrementally maintained spending by (user, category, subcategory, week). Refreshed by refresh_spending_rollups_task.';
+COMMENT ON TABLE transactions_for_predictions IS 'Incrementally maintained transaction-level rollup for the prediction model. Refreshed by refresh_spending_rollups_task.';
+
+-- Initial backfill (consumes SHOW_INITIAL_ROWS)
+CALL refresh_spending_rollups();
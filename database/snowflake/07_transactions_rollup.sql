@@ -0,0 +1,139 @@
+-- Materialized TRANSACTIONS Rollup
+-- Defines TRANSACTIONS as a table with the columns of the old aggregating
+-- view (formerly in 04_transactions_view.sql), so queries.py keeps working
+-- unchanged.
+--
+-- Purpose: every /feed and /stats/category call used to re-run MODE() and a
+--          GROUP BY over the user's whole item history. The table is now
+--          refreshed from a stream on purchase_items: only purchases with new
+--          items or status changes (refunds, reversals) are recomputed, and
+--          purchases with no active items left are removed.
+--
+-- Run after: 02_purchase_items_schema.sql, 06_spending_rollups.sql
+-- Local path: database/api/rollups.py (refresh_rollups_for_items)
+
+USE DATABASE SNOWFLAKE_LEARNING_DB;
+USE SCHEMA BALANCEIQ_CORE;
+
+-- ============================================================================
+-- TRANSACTIONS Table
+-- ============================================================================
+
+-- Databases set up before the rollup still have the old view
+DROP VIEW IF EXISTS TRANSACTIONS;
+
+CREATE OR REPLACE TABLE TRANSACTIONS (
+  -- Identity (transaction-level)
+  id                 STRING,
+  user_id            STRING,
+
+  -- Purchase Details
+  merchant           STRING,
+  occurred_at        TIMESTAMP_TZ,
+
+  -- Financial (aggregated from items)
+  amount_cents       NUMBER(24,4),
+  currency           STRING,
+
+  -- Categorization
+  category           STRING,
+  need_or_want       STRING,
+  confidence         FLOAT,
+
+  -- Transaction-level ID (for compatibility)
+  transaction_id     STRING,
+
+  -- Audit
+  created_at         TIMESTAMP_TZ,
+  refreshed_at       TIMESTAMP_TZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+-- SQL_FEED and SQL_STATS_BY_CATEGORY filter on user_id + occurred_at range,
+-- so clustering on the same keys lets Snowflake prune micro-partitions.
+ALTER TABLE TRANSACTIONS CLUSTER BY (user_id, occurred_at);
+
+-- ============================================================================
+-- Change Stream (separate from the spending rollups stream: each consumer
+-- needs its own offset)
+-- ============================================================================
+
+CREATE OR REPLACE STREAM purchase_items_txn_stream
+  ON TABLE purchase_items
+  SHOW_INITIAL_ROWS = TRUE;   -- first refresh backfills existing history
+
+-- ============================================================================
+-- Refresh Procedure (purchase-scoped delete + re-insert)
+-- ============================================================================
+
+CREATE OR REPLACE PROCEDURE refresh_transactions_rollup()
+RETURNS STRING
+LANGUAGE SQL
+AS
+$$
+BEGIN
+  -- DDL commits implicitly, so the staging table is created before the
+  -- transaction starts; only DML runs between BEGIN and COMMIT
+  CREATE OR REPLACE TEMPORARY TABLE txn_changes (
+    user_id      STRING,
+    purchase_id  STRING
+  );
+
+  BEGIN TRANSACTION;
+
+  -- Both sides of an update (e.g. status 'active' -> 'refunded') are in the
+  -- stream, so the purchase is recomputed from its remaining active items.
+  -- The stream offset advances on COMMIT, together with the writes below.
+  INSERT INTO txn_changes (user_id, purchase_id)
+  SELECT DISTINCT user_id, purchase_id
+  FROM purchase_items_txn_stream;
+
+  DELETE FROM TRANSACTIONS t
+  USING txn_changes c
+  WHERE t.user_id = c.user_id
+    AND t.id = c.purchase_id;
+
+  INSERT INTO TRANSACTIONS (
+    id, user_id, merchant, occurred_at, amount_cents, currency,
+    category, need_or_want, confidence, transaction_id, created_at
+  )
+  SELECT
+    p.purchase_id,
+    p.user_id,
+    ANY_VALUE(p.merchant),
+    ANY_VALUE(p.ts),
+    SUM(p.price * p.qty),
+    'USD',
+    MODE(p.category),
+    MODE(COALESCE(p.user_needwant, p.detected_needwant)),
+    AVG(p.confidence),
+    p.purchase_id,
+    MIN(p.created_at)
+  FROM purchase_items p
+  JOIN txn_changes c
+    ON p.user_id = c.user_id
+   AND p.purchase_id = c.purchase_id
+  WHERE p.status = 'active'
+  GROUP BY p.purchase_id, p.user_id;
+
+  COMMIT;
+  RETURN 'ok';
+END;
+$$;
+
+-- ============================================================================
+-- Scheduled Task (only runs when the stream has new rows)
+-- ============================================================================
+
+CREATE OR REPLACE TASK refresh_transactions_rollup_task
+  WAREHOUSE = COMPUTE_WH          -- use your SNOWFLAKE_WAREHOUSE
+  SCHEDULE = '1 MINUTE'
+  WHEN SYSTEM$STREAM_HAS_DATA('purchase_items_txn_stream')
+AS
+  CALL refresh_transactions_rollup();
+
+ALTER TASK refresh_transactions_rollup_task RESUME;
+
+COMMENT ON TABLE TRANSACTIONS IS 'Transaction-level rollup of purchase_items, refreshed incrementally by refresh_transactions_rollup_task. Rows written directly via SQL_MERGE_TXN for ids not in purchase_items are left untouched.';
+
+-- Initial backfill (consumes SHOW_INITIAL_ROWS)
+CALL refresh_transactions_rollup();
@@ -0,0 +1,53 @@
+-- User Insights Result Store
+-- Stores precomputed overspending / trend / cancellation insights per user so
+-- /api/user/{user_id}/insights is a single key lookup instead of three
+-- window-function queries over category_spending_summary.
+--
+-- Refreshed by: scripts/refresh_insights.py (scheduled), or on demand by the
+--               API when a user's entry is missing or expired
+-- Invalidated by: new purchases (stream on category_spending_summary below,
+--                 and database/api/rollups.py on the local path)
+--
+-- Run after: 06_spending_rollups.sql
+
+USE DATABASE SNOWFLAKE_LEARNING_DB;
+USE SCHEMA BALANCEIQ_CORE;
+
+-- ============================================================================
+-- Main Table: user_insights (one row per user)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS user_insights (
+  user_id            STRING PRIMARY KEY,
+  insights_json      VARIANT NOT NULL,        -- {overspending, category_trends, cancellation_candidates}
+  ttl_seconds        INTEGER,                 -- per-user TTL (NULL = INSIGHTS_TTL_SECONDS default)
+  computed_at        TIMESTAMP_TZ DEFAULT CURRENT_TIMESTAMP(),
+  expires_at         TIMESTAMP_TZ NOT NULL    -- set to now() to invalidate
+);
+
+ALTER TABLE user_insights CLUSTER BY (user_id);
+
+-- ============================================================================
+-- Invalidation on new purchases
+-- ============================================================================
+-- Any rollup change for a user expires their insights; the next read or the
+-- next scheduled refresh recomputes them.
+
+CREATE OR REPLACE STREAM category_spending_summary_stream
+  ON TABLE category_spending_summary;
+
+CREATE OR REPLACE TASK invalidate_user_insights_task
+  WAREHOUSE = COMPUTE_WH          -- use your SNOWFLAKE_WAREHOUSE
+  AFTER refresh_spending_rollups_task
+  WHEN SYSTEM$STREAM_HAS_DATA('category_spending_summary_stream')
+AS
+  UPDATE user_insights
+  SET expires_at = CURRENT_TIMESTAMP()
+  WHERE user_id IN (SELECT DISTINCT user_id FROM category_spending_summary_stream);
+
+-- Child tasks must be resumed before their root task
+ALTER TASK refresh_spending_rollups_task SUSPEND;
+ALTER TASK invalidate_user_insights_task RESUME;
+ALTER TASK refresh_spending_rollups_task RESUME;
+
+COMMENT ON TABLE user_insights IS 'Precomputed per-user insights (overspending, category trends, cancellation candidates) with per-user TTL. Read by /api/user/{user_id}/insights.';
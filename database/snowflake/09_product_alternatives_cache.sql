@@ -0,0 +1,27 @@
+-- Product Alternatives Cache
+-- Cross-user cache of researched cheaper alternatives, keyed by canonical
+-- product identity, so a product bought by many users in the same week is
+-- researched by the LLM once.
+--
+-- Used by: src/services/product_cache.py (SnowflakeCacheBackend) when
+--          PRODUCT_CACHE_SHARED=true
+--
+-- product_key:
+--   id:<external_id>    ASIN / merchant product id (purchase_items.raw_line:external_id)
+--   name:<normalized>   lower-cased item name, punctuation collapsed
+--
+-- findings_json holds product-level findings only (alternative merchant,
+-- landed cost, url, ...). Savings are recomputed from each user's own price.
+-- An empty array means "no alternative with >$10 savings at reference_price".
+
+USE DATABASE SNOWFLAKE_LEARNING_DB;
+USE SCHEMA BALANCEIQ_CORE;
+
+CREATE TABLE IF NOT EXISTS product_alternatives_cache (
+  product_key        STRING PRIMARY KEY,
+  reference_price    NUMBER(12,2) NOT NULL,   -- price the research was done against
+  findings_json      VARIANT NOT NULL,        -- [] = negative result
+  researched_at      TIMESTAMP_TZ DEFAULT CURRENT_TIMESTAMP()  -- freshness (PRODUCT_CACHE_TTL_HOURS)
+);
+
+COMMENT ON TABLE product_alternatives_cache IS 'Cross-user cache of LLM-researched product alternatives with price-freshness TTL. Written by the weekly suggestions job.';
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Fake LLM Server - Offline stand-in for Dedalus and DigitalOcean chat completions
+
+Serves the OpenAI-compatible chat completions API that DedalusRunner (via
+AsyncDedalus) and database/api/do_llm.py call, with canned but realistic
+answers, so the LLM-bound paths can be load- and latency-tested without API
+keys:
+
+  - weekly "Plan" prompts get a JSON array of findings for a deterministic
+    share of the listed items (wrapped in prose and a code fence, like the
+    real model)
+  - categorization prompts get one category object per product
+  - anything else (the AI coach) gets a short coaching message
+
+Behaviour is configurable per server:
+
+  --latency      time before the first byte: fixed:S, uniform:A,B or
+                 lognormal:MEDIAN,SIGMA (seconds)
+  --chunk-size / --chunk-interval
+                 streaming (stream=true) pacing: characters per chunk and
+                 seconds between chunks
+  --error-rate / --error-status
+                 share of requests failing with one of the given statuses
+                 (429 responses carry Retry-After)
+  --find-rate    share of weekly items that get a finding
+
+Usage:
+    python scripts/fake_llm_server.py [--port 8900] [--latency lognormal:2,0.4] [--error-rate 0.02]
+
+Point the services at it:
+    DEDALUS_BASE_URL=http://127.0.0.1:8900
+    DO_LLM_URL=http://127.0.0.1:8900/v1/chat/completions  (and any DO_API_KEY)
+
+GET /stats returns request, error and concurrency counters.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# "1. Ring Video Doorbell 3 - Paid $119.99 at Amazon (Electronics)"
+WEEKLY_ITEM_RE = re.compile(r"^(\d+)\. (.+) - Paid \$([\d,.]+) at (.+?) \((.*)\)$", re.MULTILINE)
+# "1. Echo Dot (5th Gen) ($49.99)"
+CATEGORY_ITEM_RE = re.compile(r"^\s*(\d+)\. (.+) \(\$([\d,.]+)\)\s*$", re.MULTILINE)
+
+ALTERNATIVE_MERCHANTS = ("Best Buy", "Target", "Walmart", "Newegg", "Costco")
+CATEGORIES = ("Electronics", "Groceries", "Home & Kitchen", "Clothing", "Pet Supplies", "Health & Beauty")
+
+
+class LatencyModel:
+    """
+    Samples delays in seconds from "fixed:S", "uniform:A,B" or
+    "lognormal:MEDIAN,SIGMA" (heavy right tail, like real LLM latency).
+    """
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        kind, _, values = spec.partition(":")
+        try:
+            params = [float(v) for v in values.split(",")] if values else []
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r} (fixed:S, uniform:A,B, lognormal:MEDIAN,SIGMA)")
+        self.spec = spec
+        self.kind = kind
+        self.params = params
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            return max(0.0, self.params[0])
+        if self.kind == "uniform":
+            low, high = self.params
+            return max(0.0, self._random.uniform(low, high))
+        median, sigma = self.params
+        if median <= 0:
+            return 0.0
+        return self._random.lognormvariate(math.log(median), sigma)
+
+
+def _stable_fraction(text: str) -> float:
+    """Deterministic value in [0, 1) for `text` (same item, same answer)."""
+    return (zlib.crc32(text.encode("utf-8")) % 10000) / 10000.0
+
+
+def _money(value: str) -> float:
+    return float(value.replace(",", ""))
+
+
+class FakeLLM:
+    """
+    Canned chat-completions backend with latency, pacing and error injection.
+
+    Args:
+        latency: LatencyModel spec for time to first byte
+        chunk_size: Characters per streamed chunk
+        chunk_interval: Seconds between streamed chunks
+        error_rate: Share of requests that fail (0..1)
+        error_statuses: HTTP statuses to fail with (picked at random)
+        find_rate: Share of weekly items that get a finding (0..1)
+        seed: Seed for latency and error sampling
+    """
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        chunk_size: int = 32,
+        chunk_interval: float = 0.02,
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (429, 500),
+        find_rate: float = 0.6,
+        seed: Optional[int] = None,
+    ):
+        self.latency = LatencyModel(latency, seed)
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_interval = max(0.0, chunk_interval)
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses) or (500,)
+        self.find_rate = find_rate
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.streamed = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    # -- canned answers -------------------------------------------------
+
+    def weekly_findings(self, prompt: str) -> List[Dict[str, Any]]:
+        findings = []
+        for number, name, price, merchant, _ in WEEKLY_ITEM_RE.findall(prompt):
+            price = _money(price)
+            fraction = _stable_fraction(name)
+            savings = round(max(10.5, price * (0.1 + 0.15 * fraction)), 2)
+            if fraction >= self.find_rate or savings >= price:
+                continue
+            landed = round(price - savings, 2)
+            alternative = ALTERNATIVE_MERCHANTS[int(fraction * 1000) % len(ALTERNATIVE_MERCHANTS)]
+            if alternative == merchant:
+                alternative = ALTERNATIVE_MERCHANTS[(int(fraction * 1000) + 1) % len(ALTERNATIVE_MERCHANTS)]
+            tax = round(landed * 0.06, 2)
+            findings.append({
+                "item_number": int(number),
+                "item_name": name,
+                "original_price": price,
+                "original_merchant": merchant,
+                "alternative_merchant": alternative,
+                "alternative_price": round(landed - tax, 2),
+                "shipping_cost": 0.0,
+                "tax_estimate": tax,
+                "total_landed_cost": landed,
+                "total_savings": savings,
+                "product_match_confidence": "exact_model_match",
+                "stock_status": "in_stock",
+                "url": f"https://example.com/{alternative.lower().replace(' ', '-')}/{number}",
+                "notes": "Canned finding from the fake LLM server",
+            })
+        return findings
+
+    def categories(self, prompt: str) -> List[Dict[str, Any]]:
+        results = []
+        for number, name, _ in CATEGORY_ITEM_RE.findall(prompt):
+            fraction = _stable_fraction(name)
+            confidence = round(0.5 + 0.5 * fraction, 2)
+            results.append({
+                "item_number": int(number),
+                "category": CATEGORIES[int(fraction * 1000) % len(CATEGORIES)],
+                "subcategory": None,
+                "confidence": confidence,
+                "reason": "Canned category from the fake LLM server",
+                "ask_user": confidence < 0.6,
+            })
+        return results
+
+    def reply(self, prompt: str) -> str:
+        """Assistant message for the last user prompt."""
+        if WEEKLY_ITEM_RE.search(prompt):
+            body = json.dumps(self.weekly_findings(prompt), indent=2)
+            return f"Here are the cheaper alternatives I found:\n```json\n{body}\n```\nPrices checked just now."
+        if CATEGORY_ITEM_RE.search(prompt):
+            return json.dumps(self.categories(prompt), indent=2)
+        return ("Nice work keeping an eye on your spending this week! "
+                "Try setting a small weekly cap for wants and check in before big purchases.")
+
+    # -- request handling -----------------------------------------------
+
+    def pick_error(self) -> Optional[int]:
+        if self.error_rate > 0 and self._random.random() < self.error_rate:
+            return self._random.choice(self.error_statuses)
+        return None
+
+    def chunks(self, text: str) -> List[str]:
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "streamed": self.streamed,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "latency": self.latency.spec,
+            "error_rate": self.error_rate,
+        }
+
+
+def _last_user_prompt(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages or []):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content")
+        if isinstance(content, list):
+            return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        return content or ""
+    return ""
+
+
+def _usage(prompt: str, content: str) -> Dict[str, int]:
+    prompt_tokens = max(1, len(prompt) // 4)
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def create_app(fake: FakeLLM) -> FastAPI:
+    """ASGI app serving `fake` under the Dedalus and DigitalOcean paths."""
+    app = FastAPI(title="Fake LLM Server", version="0.1.0")
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model") or "fake-model"
+        if isinstance(model, list):
+            model = model[0]
+        prompt = _last_user_prompt(body.get("messages", []))
+
+        fake.requests += 1
+        fake.in_flight += 1
+        fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+        try:
+            await asyncio.sleep(fake.latency.sample())
+
+            status = fake.pick_error()
+            if status is not None:
+                fake.errors += 1
+                headers = {"Retry-After": "1"} if status == 429 else {}
+                return JSONResponse(
+                    {"error": {"message": f"Injected error {status}", "type": "fake_error", "code": status}},
+                    status_code=status,
+                    headers=headers,
+                )
+
+            content = fake.reply(prompt)
+            completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+            created = int(time.time())
+
+            if not body.get("stream"):
+                return {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": _usage(prompt, content),
+                }
+        finally:
+            fake.in_flight -= 1
+
+        fake.streamed += 1
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(data)}\n\n"
+
+        async def stream():
+            fake.in_flight += 1
+            try:
+                yield chunk({"role": "assistant", "content": ""})
+                for piece in fake.chunks(content):
+                    await asyncio.sleep(fake.chunk_interval)
+                    yield chunk({"content": piece})
+                yield chunk({}, "stop")
+                yield "data: [DONE]\n\n"
+            finally:
+                fake.in_flight -= 1
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    # Dedalus (base_url + /v1/...) and the DigitalOcean path used by do_llm
+    app.post("/v1/chat/completions")(chat_completions)
+    app.post("/v2/ai/openai/chat/completions")(chat_completions)
+
+    @app.get("/stats")
+    def stats():
+        return fake.stats()
+
+    return app
+
+
+def add_fake_arguments(parser: argparse.ArgumentParser, prefix: str = "") -> None:
+    """Fake server flags (shared with the load driver, optionally prefixed)."""
+    parser.add_argument(f'--{prefix}latency', default='lognormal:1.5,0.4',
+                        help='Time to first byte: fixed:S, uniform:A,B or lognormal:MEDIAN,SIGMA. Default: lognormal:1.5,0.4')
+    parser.add_argument(f'--{prefix}chunk-size', type=int, default=32,
+                        help='Streamed characters per chunk. Default: 32')
+    parser.add_argument(f'--{prefix}chunk-interval', type=float, default=0.02,
+                        help='Seconds between streamed chunks. Default: 0.02')
+    parser.add_argument(f'--{prefix}error-rate', type=float, default=0.0,
+                        help='Share of requests that fail (0..1). Default: 0')
+    parser.add_argument(f'--{prefix}error-status', default='429,500',
+                        help='Comma-separated statuses for injected errors. Default: 429,500')
+    parser.add_argument(f'--{prefix}find-rate', type=float, default=0.6,
+                        help='Share of weekly items that get a finding. Default: 0.6')
+    parser.add_argument(f'--{prefix}seed', type=int, default=None, help='Random seed')
+
+
+def fake_from_args(args: argparse.Namespace, prefix: str = "") -> FakeLLM:
+    def get(name):
+        return getattr(args, (prefix + name).replace('-', '_'))
+
+    return FakeLLM(
+        latency=get('latency'),
+        chunk_size=get('chunk-size'),
+        chunk_interval=get('chunk-interval'),
+        error_rate=get('error-rate'),
+        error_statuses=[int(s) for s in get('error-status').split(',') if s.strip()],
+        find_rate=get('find-rate'),
+        seed=get('seed'),
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Serve canned OpenAI-compatible chat completions for offline load testing'
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address. Default: 127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900, help='Port. Default: 8900')
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fake = fake_from_args(args)
+    print(f"Fake LLM server on http://{args.host}:{args.port} "
+          f"(latency {args.latency}, error rate {args.error_rate})")
+    print(f"  DEDALUS_BASE_URL=http://{args.host}:{args.port}")
+    print(f"  DO_LLM_URL=http://{args.host}:{args.port}/v1/chat/completions")
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
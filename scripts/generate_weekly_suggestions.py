@@ -6,12 +6,24 @@ Generates weekly alternative suggestions for all users with recent purchases.
 Runs as a scheduled job (cron/scheduler) to populate weekly_suggestions_reports table.
 
 Usage:
-    python scripts/generate_weekly_suggestions.py [--week YYYY-MM-DD] [--user USER_ID] [--dry-run]
+    python scripts/generate_weekly_suggestions.py [--week YYYY-MM-DD] [--user USER_ID] [--dry-run] [--resume]
+                                                  [--shard i/N] [--workers K] [--merge-shards]
+                                                  [--concurrency N] [--rpm N] [--tpm N] [--timeout SECONDS]
+                                                  [--batch-size N] [--flush-interval SECONDS]
 
 Arguments:
     --week: Specific week to process (default: last week)
     --user: Process only specific user (default: all users)
     --dry-run: Run without writing to database
+    --resume: Skip users checkpointed as done for this week and retry failed ones
+    --shard: Process only shard i of N, by stable hash of user_id (e.g. 0/4 on host 1, 1/4 on host 2, ...)
+    --workers: Worker processes on this host, each running its own pool
+    --merge-shards: Merge every shard's logs for --week (latest run plus its --resume runs) into one summary
+    --concurrency: Users processed in parallel (default: 4)
+    --rpm / --tpm: Global LLM requests / tokens per minute (default: LLM_RPM / LLM_TPM env, else unlimited)
+    --timeout: Per-user timeout in seconds (default: 300, 0 = none)
+    --batch-size: Reports written per multi-row MERGE (default: 25)
+    --flush-interval: Maximum seconds a finished report waits in the buffer (default: 10)
 
 Design Principles (CLAUDE.MD):
 - Test-driven development
@@ -21,16 +33,20 @@ Design Principles (CLAUDE.MD):
 
 import asyncio
 import argparse
+import hashlib
 import importlib.util
 import json
+import multiprocessing
 import os
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-# Add src to path for imports
+# Add src and repo root to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'database', 'api'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -49,14 +65,19 @@ def load_module(module_name: str, file_path: str):
 db_path = os.path.join(os.path.dirname(__file__), '..', 'database', 'api', 'db.py')
 db = load_module('db', db_path)
 
-# Load suggestions helpers
-suggestions_path = os.path.join(os.path.dirname(__file__), '..', 'database', 'api', 'suggestions.py')
-suggestions = load_module('suggestions', suggestions_path)
+# Load suggestions helpers and the buffered report writer as a package
+# (suggestions.py uses relative imports, so it cannot be loaded by path)
+from database.api import suggestions
+from database.api.report_writer import ReportWriter
 
 # Load weekly suggester
 suggester_path = os.path.join(os.path.dirname(__file__), '..', 'src', 'services', 'weekly_suggester.py')
 suggester = load_module('weekly_suggester', suggester_path)
 
+# Same module instance the suggester uses (src/ is on sys.path)
+from services.rate_limit import configure_rate_limiter
+from services.llm_metrics import get_llm_metrics, merge_snapshots
+
 
 def get_week_start_date(offset_weeks: int = -1) -> str:
     """
@@ -79,6 +100,66 @@ def get_week_start_date(offset_weeks: int = -1) -> str:
     return target_week_monday.strftime('%Y-%m-%d')
 
 
+class JobCheckpoint:
+    """
+    Durable per-user completion record for one week (JSONL in logs/).
+
+    A user is recorded as 'done' only once their report has been flushed to
+    the database (ReportWriter on_flush), so a crash never skips a user whose
+    report was still buffered. Failures are recorded as 'failed' and retried
+    on --resume. The last line for a user wins.
+    """
+
+    def __init__(
+        self,
+        week_start: str,
+        resume: bool = False,
+        log_dir: Optional[str] = None,
+        label: str = ''
+    ):
+        log_dir = log_dir or os.path.join(os.path.dirname(__file__), '..', 'logs')
+        os.makedirs(log_dir, exist_ok=True)
+        # Each shard/worker process has its own file (label, e.g. _shard3of8)
+        self.path = os.path.join(log_dir, f'weekly_suggestions_checkpoint_{week_start}{label}.jsonl')
+        self.status: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash
+                    self.status[entry['user_id']] = entry['status']
+
+        # A fresh (non-resume) run starts a new checkpoint
+        self._file = open(self.path, 'a' if resume else 'w')
+
+    def done_users(self) -> set:
+        return {user_id for user_id, status in self.status.items() if status == 'done'}
+
+    def record(self, user_id: str, status: str, **extra: Any) -> None:
+        entry = {'user_id': user_id, 'status': status, 'at': datetime.now().isoformat(), **extra}
+        with self._lock:
+            self.status[user_id] = status
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_flushed(self, flushed: List[tuple]) -> None:
+        """ReportWriter on_flush callback: these reports are in the database."""
+        for user_id, _, report in flushed:
+            if report.get('error'):
+                # Saved, but the LLM call failed; retry on --resume
+                self.record(user_id, 'failed', error=report['error'])
+            else:
+                self.record(user_id, 'done', report_id=report.get('report_id'))
+
+    def close(self) -> None:
+        self._file.close()
+
+
 def get_users_with_purchases(week_start: str) -> List[str]:
     """
     Get list of users who made purchases in the specified week.
@@ -113,7 +194,10 @@ def get_users_with_purchases(week_start: str) -> List[str]:
 async def process_user(
     user_id: str,
     week_start: str,
-    dry_run: bool = False
+    dry_run: bool = False,
+    writer: Optional[ReportWriter] = None,
+    items: Optional[List[Dict[str, Any]]] = None,
+    timeout: Optional[float] = None
 ) -> Dict[str, Any]:
     """
     Generate and save weekly suggestions for a single user.
@@ -122,6 +206,11 @@ async def process_user(
         user_id: User identifier
         week_start: ISO week start date (YYYY-MM-DD)
         dry_run: If True, don't write to database
+        writer: Buffered report writer; if None, the report is upserted directly
+        items: User's top items from the dedupe pre-pass; if None, fetched here
+        timeout: Seconds allowed for generating the report. Only the LLM work
+            is bounded: a write running in a thread can't be cancelled, so a
+            user that timed out is never written (nor checkpointed 'done').
 
     Returns:
         Dict with processing results and metrics
@@ -129,17 +218,28 @@ async def process_user(
     start_time = datetime.now()
 
     try:
-        # Generate suggestions using Dedalus + MCP
-        print(f"  Generating suggestions for user {user_id}...")
-        report = await suggester.generate_weekly_suggestions(user_id, week_start, top_n=5)
+        async def generate() -> Dict[str, Any]:
+            # Generate suggestions using Dedalus + MCP
+            return await suggester.generate_weekly_suggestions(user_id, week_start, top_n=5, items=items)
+
+        # The timeout covers the LLM work only, never the write below
+        try:
+            report = await asyncio.wait_for(generate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return failed_result(user_id, f'timed out after {timeout}s', timeout or 0.0)
 
         # Save to database (unless dry-run)
         if not dry_run:
-            print(f"  Saving report to database...")
-            report_id = suggestions.upsert_weekly_report(user_id, week_start, report)
+            if writer is not None:
+                # Written with other users' reports in one MERGE on flush
+                # (off the event loop, since a full buffer flushes inline)
+                report_id = await asyncio.to_thread(writer.add, user_id, week_start, report)
+            else:
+                report_id = await asyncio.to_thread(
+                    suggestions.upsert_weekly_report, user_id, week_start, report
+                )
             report['report_id'] = report_id
         else:
-            print(f"  [DRY-RUN] Would save report to database")
             report['report_id'] = 'dry-run-no-id'
 
         # Calculate processing time
@@ -162,8 +262,6 @@ async def process_user(
         end_time = datetime.now()
         processing_seconds = (end_time - start_time).total_seconds()
 
-        print(f"  ❌ Error processing user {user_id}: {str(e)}")
-
         return {
             'user_id': user_id,
             'success': False,
@@ -176,11 +274,404 @@ async def process_user(
         }
 
 
+def failed_result(user_id: str, error: str, processing_seconds: float = 0.0) -> Dict[str, Any]:
+    """Result row for a user whose processing did not complete."""
+    return {
+        'user_id': user_id,
+        'success': False,
+        'items_analyzed': 0,
+        'items_with_alternatives': 0,
+        'total_savings': 0.0,
+        'mcp_calls': 0,
+        'processing_seconds': round(processing_seconds, 2),
+        'error': error
+    }
+
+
+async def process_users(
+    users: List[str],
+    week_start: str,
+    concurrency: int = 4,
+    timeout: Optional[float] = None,
+    dry_run: bool = False,
+    writer: Optional[ReportWriter] = None,
+    checkpoint: Optional[JobCheckpoint] = None,
+    items_by_user: Optional[Dict[str, List[Dict[str, Any]]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Process users with at most `concurrency` in flight.
+
+    LLM calls are additionally throttled by the process-wide RPM/TPM limiter
+    inside the suggester. A user whose report takes more than `timeout`
+    seconds to generate is cancelled before anything is written and recorded
+    as failed; the others keep going. With `items_by_user`
+    (dedupe pre-pass) users are not re-queried for their top items.
+
+    Returns:
+        Per-user results in the same order as `users`
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    job_start = datetime.now()
+    done = 0
+    failed = 0
+
+    async def run_one(user_id: str) -> Dict[str, Any]:
+        nonlocal done, failed
+
+        async with semaphore:
+            result = await process_user(
+                user_id, week_start, dry_run=dry_run, writer=writer,
+                items=items_by_user.get(user_id, []) if items_by_user is not None else None,
+                timeout=timeout
+            )
+
+        # Successes are checkpointed when their report is flushed
+        if checkpoint is not None and not result['success']:
+            checkpoint.record(user_id, 'failed', error=result['error'])
+
+        # Live progress and throughput
+        done += 1
+        if not result['success']:
+            failed += 1
+        elapsed = (datetime.now() - job_start).total_seconds()
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (len(users) - done) / rate if rate > 0 else 0.0
+
+        status = '✅' if result['success'] else f"❌ {result['error']}"
+        print(f"[{done}/{len(users)}] {user_id}: {status} "
+              f"({result['processing_seconds']}s) | "
+              f"{rate:.2f} users/s, {failed} failed, ETA {eta:.0f}s")
+        return result
+
+    return await asyncio.gather(*(run_one(user_id) for user_id in users))
+
+
+def shard_of(user_id: str, shard_count: int, salt: str = '') -> int:
+    """
+    Stable shard index for a user (same on every host and Python process,
+    unlike hash()). `salt` decorrelates nested partitions (hosts vs workers).
+    """
+    digest = hashlib.sha1(f'{salt}{user_id}'.encode('utf-8')).hexdigest()
+    return int(digest, 16) % shard_count
+
+
+def parse_shard(value: str) -> tuple:
+    """Parse --shard i/N (0 <= i < N)."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard {value!r}. Expected i/N, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Invalid shard {value!r}. Need 0 <= i < N")
+    return index, count
+
+
+def select_shard(users: List[str], index: int, count: int, salt: str = '') -> List[str]:
+    """Users belonging to shard `index` of `count`."""
+    if count == 1:
+        return list(users)
+    return [u for u in users if shard_of(u, count, salt) == index]
+
+
+def shard_label(args) -> str:
+    """Checkpoint/log suffix for this process's slice of the run."""
+    index, count = args.shard
+    workers = max(1, args.workers)
+    if count == 1 and workers == 1:
+        return ''
+    return f'_shard{index * workers + args.worker_index}of{count * workers}'
+
+
+async def run_users(users: List[str], week_start: str, args) -> Dict[str, Any]:
+    """
+    Process one slice of users: checkpoint/resume, buffered writes, worker pool.
+
+    Returns:
+        {'results', 'unsaved_reports', 'wall_seconds', 'reports_written', 'batches',
+         'prewarm', 'llm'} - llm is this run's LLM call metrics (llm_metrics snapshot)
+    """
+    # Skip users already finished by an earlier run of this week
+    checkpoint = None
+    if not args.dry_run:
+        checkpoint = JobCheckpoint(week_start, resume=args.resume, label=shard_label(args))
+        if args.resume:
+            finished = checkpoint.done_users()
+            users = [u for u in users if u not in finished]
+            print(f"Resuming from {checkpoint.path}: "
+                  f"{len(finished)} done, {len(users)} remaining")
+
+    writer = None
+    if not args.dry_run:
+        writer = ReportWriter(
+            batch_size=args.batch_size,
+            flush_interval=args.flush_interval,
+            on_flush=checkpoint.record_flushed
+        )
+
+    configure_rate_limiter(args.rpm, args.tpm)
+    suggester.configure_research(args.research_mode, args.item_concurrency, args.item_timeout)
+
+    job_start = datetime.now()
+    get_llm_metrics().reset()
+    items_by_user = None
+    prewarm = None
+    if args.dedupe and users:
+        items_by_user, prewarm = await prewarm_products(users, week_start, args)
+
+    results = await process_users(
+        users,
+        week_start,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        dry_run=args.dry_run,
+        writer=writer,
+        checkpoint=checkpoint,
+        items_by_user=items_by_user
+    )
+    wall_seconds = (datetime.now() - job_start).total_seconds()
+
+    # Write the last partial batch
+    if writer is not None:
+        writer.close()
+
+        # Reports that could not be written are not counted as successes
+        failed_users = {f['user_id'] for f in writer.failed}
+        for r in results:
+            if r['user_id'] in failed_users:
+                r['success'] = False
+                r['error'] = 'report not saved'
+                checkpoint.record(r['user_id'], 'failed', error='report not saved')
+        checkpoint.close()
+
+    return {
+        'results': results,
+        # Unsaved reports are kept so they can be re-submitted
+        'unsaved_reports': writer.failed if writer is not None else [],
+        'wall_seconds': wall_seconds,
+        'reports_written': writer.written if writer is not None else 0,
+        'batches': writer.batches if writer is not None else 0,
+        'prewarm': prewarm,
+        'llm': get_llm_metrics().snapshot(),
+    }
+
+
+async def prewarm_products(users: List[str], week_start: str, args) -> tuple:
+    """
+    Dedupe pre-pass: fetch every user's top items at once and research each
+    distinct product once, so per-user reports are mostly cache hits.
+
+    Returns:
+        (items_by_user, pre-pass stats)
+    """
+    start = datetime.now()
+    items_by_user = await asyncio.to_thread(suggester.fetch_week_top_items, users, week_start, 5)
+    stats = await suggester.prewarm_product_cache(
+        items_by_user, concurrency=args.concurrency, timeout=args.timeout
+    )
+    stats['seconds'] = round((datetime.now() - start).total_seconds(), 2)
+
+    print(f"Dedupe pre-pass: {stats['items']} item(s) of {stats['users']} user(s) -> "
+          f"{stats['distinct_products']} distinct product(s), {stats['cached']} cached, "
+          f"{stats['researched']} researched in {stats['llm_calls']} LLM call(s) "
+          f"({stats['failed_batches']} failed) in {stats['seconds']}s\n")
+    return items_by_user, stats
+
+
+def run_worker(users: List[str], week_start: str, args_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry point for --workers processes (must be picklable, so module-level)."""
+    return asyncio.run(run_users(users, week_start, argparse.Namespace(**args_dict)))
+
+
+async def run_worker_processes(users: List[str], week_start: str, args) -> Dict[str, Any]:
+    """
+    Split this host's users across `args.workers` processes and merge their output.
+
+    Each process gets an equal share of the host's --rpm/--tpm budget.
+    """
+    workers = args.workers
+    loop = asyncio.get_running_loop()
+    job_start = datetime.now()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = []
+        for k in range(workers):
+            worker_args = dict(vars(args))
+            worker_args.update(
+                worker_index=k,
+                rpm=args.rpm / workers if args.rpm else None,
+                tpm=args.tpm / workers if args.tpm else None,
+            )
+            worker_users = select_shard(users, k, workers, salt='worker')
+            futures.append(loop.run_in_executor(pool, run_worker, worker_users, week_start, worker_args))
+        outputs = await asyncio.gather(*futures)
+
+    return {
+        'results': [r for out in outputs for r in out['results']],
+        'unsaved_reports': [u for out in outputs for u in out['unsaved_reports']],
+        'wall_seconds': (datetime.now() - job_start).total_seconds(),
+        'reports_written': sum(out['reports_written'] for out in outputs),
+        'batches': sum(out['batches'] for out in outputs),
+        'prewarm': [out['prewarm'] for out in outputs],
+        'llm': merge_snapshots(out['llm'] for out in outputs),
+    }
+
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Aggregate per-user results into job metrics."""
+    total_users = len(results)
+    successful = sum(1 for r in results if r['success'])
+
+    return {
+        'total_users': total_users,
+        'successful': successful,
+        'failed': total_users - successful,
+        'total_items': sum(r['items_analyzed'] for r in results),
+        'total_alternatives': sum(r['items_with_alternatives'] for r in results),
+        'total_savings': sum(r['total_savings'] for r in results),
+        'total_mcp_calls': sum(r['mcp_calls'] for r in results),
+        'total_time_seconds': sum(r['processing_seconds'] for r in results),
+        'wall_seconds': round(wall_seconds, 2),
+    }
+
+
+def print_summary(summary: Dict[str, Any], dry_run: bool = False) -> None:
+    """Print the SUMMARY block."""
+    print(f"{'='*70}")
+    print("SUMMARY")
+    print(f"{'='*70}")
+
+    total_users = summary['total_users']
+    total_time = summary['total_time_seconds']
+    wall_seconds = summary['wall_seconds']
+
+    print(f"Users processed: {total_users}")
+    print(f"  Successful: {summary['successful']}")
+    print(f"  Failed: {summary['failed']}")
+    print(f"\nItems analyzed: {summary['total_items']}")
+    print(f"Alternatives found: {summary['total_alternatives']}")
+    print(f"Total potential savings: ${summary['total_savings']:.2f}")
+    print(f"MCP calls made: {summary['total_mcp_calls']}")
+    print(f"Total processing time: {total_time:.1f}s")
+
+    print(f"Wall time: {wall_seconds:.1f}s")
+
+    if total_users > 0:
+        print(f"Average per user: {total_time/total_users:.1f}s")
+        print(f"Throughput: {total_users / wall_seconds if wall_seconds else 0.0:.2f} users/s")
+
+    if dry_run:
+        print(f"\n⚠️  DRY-RUN MODE: No data was written to database")
+
+    print(f"\n{'='*70}")
+
+
+def print_llm_metrics(llm: Optional[Dict[str, Any]]) -> None:
+    """One line per LLM call site/model: calls, p50/p95 latency, tokens, retries, cost."""
+    if not llm or not llm['sites']:
+        return
+    print(f"LLM calls: {llm['calls']} (est. cost ${llm['cost_usd']:.4f})")
+    for site, models in llm['sites'].items():
+        for model, stats in models.items():
+            wall = stats['histograms']['wall_seconds']
+            failed = stats['calls'] - stats['outcomes'].get('ok', 0)
+            print(f"  {site} [{model}]: {stats['calls']} call(s), {failed} failed, "
+                  f"{stats['retries']} retries, p50 {wall['p50']}s / p95 {wall['p95']}s, "
+                  f"{stats['prompt_tokens']}+{stats['completion_tokens']} tokens, ${stats['cost_usd']:.4f}")
+    print(f"{'='*70}")
+
+
+def get_log_dir() -> str:
+    log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    return log_dir
+
+
+def merge_shard_logs(week_start: str, log_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Merge every shard's logs of `week_start` into one run.
+
+    A --resume run only logs the users it processed, so each shard's logs
+    are merged: its newest full run plus the --resume runs after it, with
+    the latest result per user winning. Runs of a shard are sequential, so
+    a shard's wall time is the sum of its runs' (shards still run side by
+    side).
+
+    Returns:
+        {'shards': {index: [log_file, ...]}, 'shard_count', 'missing',
+         'results', 'unsaved_reports', 'summary', 'llm'}
+    """
+    log_dir = log_dir or get_log_dir()
+    runs: Dict[int, List[tuple]] = {}
+    shard_count = None
+    shard_count_at = ''
+
+    for name in sorted(os.listdir(log_dir)):
+        if not (name.startswith('weekly_suggestions_') and name.endswith('.json')):
+            continue
+        path = os.path.join(log_dir, name)
+        try:
+            with open(path, 'r') as f:
+                log_data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+
+        shard = log_data.get('shard')
+        if log_data.get('week_start') != week_start or not shard:
+            continue
+        if log_data['timestamp'] >= shard_count_at:
+            shard_count, shard_count_at = shard['count'], log_data['timestamp']
+        runs.setdefault(shard['index'], []).append((shard['count'], path, log_data))
+
+    chains: Dict[int, List[tuple]] = {}
+    for index, shard_runs in runs.items():
+        # Only runs with the current shard count partition users the same way
+        shard_runs = sorted((r for r in shard_runs if r[0] == shard_count), key=lambda r: r[2]['timestamp'])
+        full = [i for i, r in enumerate(shard_runs) if not r[2].get('resume')]
+        chain = shard_runs[full[-1] if full else 0:]
+        if chain:
+            chains[index] = [(path, log_data) for _, path, log_data in chain]
+
+    logs = [log_data for chain in chains.values() for _, log_data in chain]
+
+    # Latest result per user (logs are oldest first within each shard)
+    latest: Dict[str, Dict[str, Any]] = {}
+    unsaved: Dict[str, Dict[str, Any]] = {}
+    for chain in chains.values():
+        for _, log_data in chain:
+            for r in log_data['results']:
+                latest[r['user_id']] = r
+            for u in log_data.get('unsaved_reports', []):
+                unsaved[u['user_id']] = u
+    results = list(latest.values())
+
+    # Shards run side by side, so the run took as long as the slowest one
+    wall_seconds = max(
+        (sum(l['summary']['wall_seconds'] for _, l in chain) for chain in chains.values()),
+        default=0.0
+    )
+    summary = summarize(results, wall_seconds)
+    summary['prewarm_mcp_calls'] = sum(l['summary'].get('prewarm_mcp_calls', 0) for l in logs)
+    summary['total_mcp_calls'] += summary['prewarm_mcp_calls']
+    summary['llm_cost_usd'] = round(sum(l['summary'].get('llm_cost_usd', 0.0) for l in logs), 6)
+
+    return {
+        'shards': {index: [path for path, _ in chain] for index, chain in sorted(chains.items())},
+        'shard_count': shard_count,
+        'missing': sorted(set(range(shard_count or 0)) - set(chains)),
+        'results': results,
+        # A report saved by a later run is no longer unsaved
+        'unsaved_reports': [u for user_id, u in unsaved.items() if not latest.get(user_id, {}).get('success')],
+        'summary': summary,
+        'llm': merge_snapshots(log_data.get('llm') for log_data in logs),
+    }
+
+
 async def main(args):
     """
     Main job execution function.
 
-    Processes all users (or specific user) for a given week.
+    Processes all users (or specific user) for a given week, optionally only
+    this host's --shard and split across --workers processes.
     """
     print("="*70)
     print("WEEKLY SUGGESTIONS JOB")
@@ -194,6 +685,23 @@ async def main(args):
         week_start = get_week_start_date(offset_weeks=-1)  # Last week
         print(f"Processing week: {week_start} (last week)")
 
+    if args.merge_shards:
+        merged = merge_shard_logs(week_start)
+        log_count = sum(len(paths) for paths in merged['shards'].values())
+        print(f"Merged {log_count} log(s) of {len(merged['shards'])} shard(s) of {merged['shard_count'] or 0}")
+        if merged['missing']:
+            print(f"⚠️  Missing shards: {merged['missing']}")
+        print()
+        print_summary(merged['summary'])
+        print_llm_metrics(merged['llm'])
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        log_file = os.path.join(get_log_dir(), f'weekly_suggestions_merged_{timestamp}.json')
+        with open(log_file, 'w') as f:
+            json.dump({'week_start': week_start, 'timestamp': timestamp, **merged}, f, indent=2, default=str)
+        print(f"📝 Merged log saved to: {log_file}")
+        return
+
     # Get users to process
     if args.user:
         users = [args.user]
@@ -203,6 +711,11 @@ async def main(args):
         users = get_users_with_purchases(week_start)
         print(f"Found {len(users)} users with purchases")
 
+    shard_index, shard_count = args.shard
+    if shard_count > 1:
+        users = select_shard(users, shard_index, shard_count)
+        print(f"Shard {shard_index}/{shard_count}: {len(users)} user(s)")
+
     if not users:
         print("\n✅ No users to process. Exiting.")
         return
@@ -212,79 +725,53 @@ async def main(args):
     print(f"PROCESSING {len(users)} USER(S)")
     print(f"{'='*70}\n")
 
-    results = []
-    for i, user_id in enumerate(users, 1):
-        print(f"[{i}/{len(users)}] Processing user: {user_id}")
-        result = await process_user(user_id, week_start, dry_run=args.dry_run)
-        results.append(result)
-
-        # Log result
-        if result['success']:
-            print(f"  ✅ Success: {result['items_with_alternatives']} alternatives found, "
-                  f"${result['total_savings']:.2f} potential savings, "
-                  f"{result['mcp_calls']} MCP calls, "
-                  f"{result['processing_seconds']}s")
-        else:
-            print(f"  ❌ Failed: {result['error']}")
+    print(f"Workers: {args.workers}, concurrency: {args.concurrency} per worker, "
+          f"rate limit: {args.rpm or 'unlimited'} req/min, {args.tpm or 'unlimited'} tokens/min, "
+          f"timeout: {args.timeout or 'none'}s per user\n")
 
-        print()  # Blank line between users
-
-    # Summary statistics
-    print(f"{'='*70}")
-    print("SUMMARY")
-    print(f"{'='*70}")
-
-    total_users = len(results)
-    successful = sum(1 for r in results if r['success'])
-    failed = total_users - successful
-
-    total_items = sum(r['items_analyzed'] for r in results)
-    total_alternatives = sum(r['items_with_alternatives'] for r in results)
-    total_savings = sum(r['total_savings'] for r in results)
-    total_mcp_calls = sum(r['mcp_calls'] for r in results)
-    total_time = sum(r['processing_seconds'] for r in results)
-
-    print(f"Users processed: {total_users}")
-    print(f"  Successful: {successful}")
-    print(f"  Failed: {failed}")
-    print(f"\nItems analyzed: {total_items}")
-    print(f"Alternatives found: {total_alternatives}")
-    print(f"Total potential savings: ${total_savings:.2f}")
-    print(f"MCP calls made: {total_mcp_calls}")
-    print(f"Total processing time: {total_time:.1f}s")
+    if args.workers > 1:
+        run = await run_worker_processes(users, week_start, args)
+    else:
+        run = await run_users(users, week_start, args)
+    results = run['results']
+    print()
 
-    if total_users > 0:
-        print(f"Average per user: {total_time/total_users:.1f}s")
+    if not args.dry_run:
+        print(f"Saved {run['reports_written']} report(s) in {run['batches']} batch(es)\n")
 
-    if args.dry_run:
-        print(f"\n⚠️  DRY-RUN MODE: No data was written to database")
+    summary = summarize(results, run['wall_seconds'])
+    summary['concurrency'] = args.concurrency
+    summary['workers'] = args.workers
 
-    print(f"\n{'='*70}")
+    # Research done by the dedupe pre-pass (one entry per worker process)
+    prewarm = run['prewarm'] if isinstance(run['prewarm'], list) else [run['prewarm']]
+    summary['prewarm_mcp_calls'] = sum(p['llm_calls'] for p in prewarm if p)
+    summary['total_mcp_calls'] += summary['prewarm_mcp_calls']
+    summary['llm_cost_usd'] = run['llm']['cost_usd']
+    print_summary(summary, dry_run=args.dry_run)
+    print_llm_metrics(run['llm'])
 
     # Write summary to log file
     if not args.dry_run:
-        log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
-        os.makedirs(log_dir, exist_ok=True)
+        log_dir = get_log_dir()
 
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_file = os.path.join(log_dir, f'weekly_suggestions_{timestamp}.json')
+        log_file = os.path.join(log_dir, f'weekly_suggestions_{timestamp}{shard_label(args)}.json')
 
         log_data = {
             'week_start': week_start,
             'timestamp': timestamp,
             'dry_run': args.dry_run,
-            'summary': {
-                'total_users': total_users,
-                'successful': successful,
-                'failed': failed,
-                'total_items': total_items,
-                'total_alternatives': total_alternatives,
-                'total_savings': total_savings,
-                'total_mcp_calls': total_mcp_calls,
-                'total_time_seconds': total_time
-            },
-            'results': results
+            'resume': args.resume,
+            'summary': summary,
+            'results': results,
+            'unsaved_reports': run['unsaved_reports'],
+            'prewarm': run['prewarm'],
+            'llm': run['llm']
         }
+        if shard_count > 1:
+            # Read back by --merge-shards
+            log_data['shard'] = {'index': shard_index, 'count': shard_count}
 
         with open(log_file, 'w') as f:
             json.dump(log_data, f, indent=2)
@@ -313,8 +800,95 @@ if __name__ == '__main__':
         action='store_true',
         help='Run without writing to database'
     )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Skip users already completed for this week; retry failed ones '
+             '(use the same --shard/--workers as the interrupted run)'
+    )
+    parser.add_argument(
+        '--shard',
+        type=parse_shard,
+        default=(0, 1),
+        help='Process only shard i of N (stable hash of user_id), e.g. 0/4. Default: 0/1'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes on this host, each with its own --concurrency. Default: 1'
+    )
+    parser.add_argument(
+        '--merge-shards',
+        action='store_true',
+        help='Merge the logs of every shard for --week (latest run plus its --resume runs) into one summary and exit'
+    )
+    parser.add_argument(
+        '--no-dedupe',
+        dest='dedupe',
+        action='store_false',
+        help='Skip the pre-pass that researches each distinct product of the week once'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='Users processed in parallel per worker. Default: 4'
+    )
+    parser.add_argument(
+        '--rpm',
+        type=float,
+        default=os.getenv('LLM_RPM'),
+        help='Max LLM requests per minute for this host, split across workers. Default: LLM_RPM or unlimited'
+    )
+    parser.add_argument(
+        '--tpm',
+        type=float,
+        default=os.getenv('LLM_TPM'),
+        help='Max LLM tokens per minute for this host, split across workers. Default: LLM_TPM or unlimited'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=300.0,
+        help='Per-user timeout in seconds (0 = none). Default: 300'
+    )
+    parser.add_argument(
+        '--research-mode',
+        choices=['batch', 'per_item'],
+        default=None,
+        help='batch: one LLM call per user; per_item: one call per item, in parallel, '
+             'keeping partial results. Default: WEEKLY_RESEARCH_MODE or batch'
+    )
+    parser.add_argument(
+        '--item-concurrency',
+        type=int,
+        default=None,
+        help='per_item mode: item searches in parallel per user. Default: ITEM_RESEARCH_CONCURRENCY or 3'
+    )
+    parser.add_argument(
+        '--item-timeout',
+        type=float,
+        default=None,
+        help='per_item mode: timeout in seconds per item search (0 = none). Default: ITEM_RESEARCH_TIMEOUT or 90'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=25,
+        help='Reports per multi-row MERGE. Default: 25'
+    )
+    parser.add_argument(
+        '--flush-interval',
+        type=float,
+        default=10.0,
+        help='Flush buffered reports at least every N seconds. Default: 10'
+    )
 
     args = parser.parse_args()
+    args.timeout = args.timeout or None
+    args.workers = max(1, args.workers)
+    args.worker_index = 0
 
     # Run async main
     asyncio.run(main(args))
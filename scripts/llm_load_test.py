@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+LLM Load Test Driver
+
+Measures throughput and latency of the LLM-bound paths end to end against
+the fake LLM server (scripts/fake_llm_server.py) or any OpenAI-compatible
+endpoint:
+
+  --mode stream   concurrent clients on GET /api/user/{id}/weekly_alternatives/stream?refresh=true
+  --mode jobs     POST /api/user/{id}/weekly_alternatives/jobs, then follow /api/jobs/{id}/stream
+  --mode weekly   the weekly job's research path (generate_weekly_suggestions) in-process
+
+Without --target, the API runs in this process (uvicorn on a free port,
+lifespan off) and its Snowflake edges are replaced with synthetic purchases:
+reads return --items-per-user products drawn from a --catalog-size catalog,
+saved reports are discarded. With --target, requests go to a running API
+(which then needs its own DEDALUS_BASE_URL and database).
+
+Without --llm-url, a fake LLM server is started in this process using the
+--fake-* flags (see fake_llm_server.py) and DEDALUS_BASE_URL points at it.
+
+Usage:
+    python scripts/llm_load_test.py --mode stream --users 50 --concurrency 10 --fake-latency lognormal:2,0.4
+    python scripts/llm_load_test.py --mode weekly --users 200 --concurrency 20 --fake-error-rate 0.05
+    python scripts/llm_load_test.py --mode jobs --target http://localhost:8000 --users 20
+
+Reports per-run latency percentiles (first event, first finding, total),
+throughput, error counts and the fake server's counters; --json writes the
+same summary to a file.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+# Add src and repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+
+from fake_llm_server import FakeLLM, add_fake_arguments, create_app, fake_from_args
+
+MERCHANTS = ("Amazon", "Target", "Walmart", "Best Buy")
+PRODUCTS = ("Wireless Earbuds", "Air Fryer", "Robot Vacuum", "Standing Desk", "Smart Watch",
+            "Espresso Machine", "Gaming Headset", "4K Monitor", "Mechanical Keyboard", "Blender")
+
+
+# ----------------------------------------------------------------------
+# Synthetic data and in-process servers
+# ----------------------------------------------------------------------
+
+
+def synthetic_items(user_id: str, count: int = 5, catalog_size: int = 100) -> List[Dict[str, Any]]:
+    """Deterministic top purchases for `user_id` from a shared catalog."""
+    items = []
+    for i in range(count):
+        product = zlib.crc32(f"{user_id}:{i}".encode()) % max(1, catalog_size)
+        items.append({
+            'item_name': f"{PRODUCTS[product % len(PRODUCTS)]} Model {product}",
+            'merchant': MERCHANTS[product % len(MERCHANTS)],
+            'price': round(40 + (product * 37) % 460 + 0.99, 2),
+            'category': 'Electronics',
+            'subcategory': None,
+            'purchased_at': None,
+            'item_id': f"item-{user_id}-{i}",
+            'external_id': f"SKU{product:05d}",
+        })
+    return sorted(items, key=lambda item: item['price'], reverse=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Run an ASGI app with uvicorn on a daemon thread (127.0.0.1, free port)."""
+
+    def __init__(self, app, lifespan: str = "on"):
+        import uvicorn
+
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host='127.0.0.1', port=self.port, log_level='warning', lifespan=lifespan
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        for _ in range(500):
+            if self.server.started:
+                return self
+            time.sleep(0.01)
+        raise RuntimeError(f"Server on {self.url} did not start")
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def offline_patches(items_per_user: int, catalog_size: int) -> List[Any]:
+    """Replace the API's Snowflake reads/writes with synthetic data (and use a throwaway job table)."""
+    from database.api import main as api
+    from database.api.jobs import JobQueue, JobStore
+
+    jobs_db = os.path.join(tempfile.mkdtemp(prefix='llm_load_'), 'analysis_jobs.sqlite3')
+
+    def fetch_top_items(user_id, week_start, limit=5):
+        return synthetic_items(user_id, min(limit, items_per_user), catalog_size)
+
+    def save_report(user_id, week, report):
+        return f"load-{user_id}-{week}"
+
+    return [
+        patch.object(api._load_stream_module().suggester, 'fetch_top_items', fetch_top_items),
+        patch.object(api, 'get_weekly_report', return_value=None),
+        patch.object(api, 'upsert_weekly_report', save_report),
+        patch.object(api, '_job_queue', JobQueue(JobStore(jobs_db), api.weekly_analysis_events)),
+    ]
+
+
+# ----------------------------------------------------------------------
+# Load runs
+# ----------------------------------------------------------------------
+
+
+def _new_run(user_id: str) -> Dict[str, Any]:
+    return {'user_id': user_id, 'ok': False, 'error': None, 'events': 0, 'findings': 0,
+            'first_event_s': None, 'first_found_s': None, 'total_s': None}
+
+
+async def _follow_sse(client: httpx.AsyncClient, method: str, url: str, run: Dict[str, Any], started: float) -> None:
+    """Consume an SSE response, recording event timings into `run`."""
+    async with client.stream(method, url) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith('data: '):
+                continue
+            event = json.loads(line[len('data: '):])
+            elapsed = time.perf_counter() - started
+            run['events'] += 1
+            if run['first_event_s'] is None:
+                run['first_event_s'] = elapsed
+            if event.get('event') == 'found':
+                run['findings'] += 1
+                if run['first_found_s'] is None:
+                    run['first_found_s'] = elapsed
+            elif event.get('event') == 'complete':
+                run['ok'] = True
+            elif event.get('event') == 'error':
+                run['error'] = event.get('message')
+
+
+async def stream_run(client: httpx.AsyncClient, base_url: str, user_id: str, week: str) -> Dict[str, Any]:
+    run, started = _new_run(user_id), time.perf_counter()
+    try:
+        await _follow_sse(client, 'GET', f"{base_url}/api/user/{user_id}/weekly_alternatives/stream?week={week}&refresh=true",
+                          run, started)
+    except Exception as e:
+        run['error'] = str(e) or type(e).__name__
+    run['total_s'] = time.perf_counter() - started
+    return run
+
+
+async def job_run(client: httpx.AsyncClient, base_url: str, user_id: str, week: str) -> Dict[str, Any]:
+    run, started = _new_run(user_id), time.perf_counter()
+    try:
+        response = await client.post(f"{base_url}/api/user/{user_id}/weekly_alternatives/jobs?week={week}&refresh=true")
+        response.raise_for_status()
+        await _follow_sse(client, 'GET', base_url + response.json()['stream_url'], run, started)
+    except Exception as e:
+        run['error'] = str(e) or type(e).__name__
+    run['total_s'] = time.perf_counter() - started
+    return run
+
+
+async def weekly_run(suggester, user_id: str, week: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    run, started = _new_run(user_id), time.perf_counter()
+    try:
+        report = await suggester.generate_weekly_suggestions(user_id, week, items=items)
+        run['findings'] = len(report['findings'])
+        run['error'] = report.get('error')
+        run['ok'] = not report.get('error')
+    except Exception as e:
+        run['error'] = str(e) or type(e).__name__
+    run['total_s'] = time.perf_counter() - started
+    return run
+
+
+async def drive(args, base_url: Optional[str]) -> List[Dict[str, Any]]:
+    """Run --users analyses, at most --concurrency at once."""
+    week = args.week or (datetime.now() - timedelta(days=datetime.now().weekday() + 7)).strftime('%Y-%m-%d')
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+    users = [f"load_user_{i:04d}" for i in range(args.users)]
+
+    if args.mode == 'weekly':
+        from services import weekly_suggester as suggester
+
+        async def one(user_id):
+            async with semaphore:
+                items = synthetic_items(user_id, args.items_per_user, args.catalog_size)
+                return await weekly_run(suggester, user_id, week, items)
+
+        return await asyncio.gather(*[one(u) for u in users])
+
+    run_one = stream_run if args.mode == 'stream' else job_run
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        async def one(user_id):
+            async with semaphore:
+                return await run_one(client, base_url, user_id, week)
+
+        return await asyncio.gather(*[one(u) for u in users])
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no values)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(runs: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {
+        'runs': len(runs),
+        'ok': sum(1 for r in runs if r['ok']),
+        'errors': sum(1 for r in runs if not r['ok']),
+        'findings': sum(r['findings'] for r in runs),
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_per_s': round(len(runs) / wall_seconds, 3) if wall_seconds > 0 else None,
+    }
+    for metric in ('first_event_s', 'first_found_s', 'total_s'):
+        values = [r[metric] for r in runs if r[metric] is not None]
+        summary[metric] = {
+            name: (round(percentile(values, pct), 3) if values else None)
+            for name, pct in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100))
+        }
+    errors: Dict[str, int] = {}
+    for r in runs:
+        if r['error']:
+            errors[r['error'][:80]] = errors.get(r['error'][:80], 0) + 1
+    summary['error_messages'] = errors
+    return summary
+
+
+def print_summary(args, summary: Dict[str, Any]) -> None:
+    print("=" * 70)
+    print(f"LLM LOAD TEST: mode={args.mode} users={args.users} concurrency={args.concurrency}")
+    print("=" * 70)
+    print(f"Runs: {summary['runs']}  ok: {summary['ok']}  errors: {summary['errors']}  "
+          f"findings: {summary['findings']}")
+    print(f"Wall: {summary['wall_seconds']}s  throughput: {summary['throughput_per_s']} runs/s")
+    for metric in ('first_event_s', 'first_found_s', 'total_s'):
+        values = summary[metric]
+        print(f"{metric:>14}: " + "  ".join(f"{k}={v}" for k, v in values.items()))
+    for message, count in summary['error_messages'].items():
+        print(f"  {count} x {message}")
+    if summary.get('fake_llm'):
+        print(f"Fake LLM: {summary['fake_llm']}")
+
+
+def main(args) -> Dict[str, Any]:
+    fake: Optional[FakeLLM] = None
+    fake_server = None
+    if args.llm_url:
+        os.environ['DEDALUS_BASE_URL'] = args.llm_url
+    else:
+        fake = fake_from_args(args, prefix='fake-')
+        fake_server = BackgroundServer(create_app(fake)).__enter__()
+        os.environ['DEDALUS_BASE_URL'] = fake_server.url
+        os.environ['DO_LLM_URL'] = f"{fake_server.url}/v1/chat/completions"
+        # The SDK requires a key; the fake server ignores it
+        os.environ.setdefault('DEDALUS_API_KEY', 'fake-key')
+
+    api_server = None
+    patches: List[Any] = []
+    try:
+        base_url = args.target
+        if args.mode != 'weekly' and not base_url:
+            from database.api import main as api
+
+            patches = offline_patches(args.items_per_user, args.catalog_size)
+            for p in patches:
+                p.start()
+            api_server = BackgroundServer(api.app, lifespan='off').__enter__()
+            base_url = api_server.url
+
+        started = time.perf_counter()
+        runs = asyncio.run(drive(args, base_url))
+        summary = summarize(runs, time.perf_counter() - started)
+    finally:
+        if api_server is not None:
+            api_server.__exit__(None, None, None)
+        for p in patches:
+            p.stop()
+        if fake_server is not None:
+            fake_server.__exit__(None, None, None)
+
+    if fake is not None:
+        summary['fake_llm'] = fake.stats()
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Load-test the weekly analysis LLM paths against a fake or real LLM endpoint'
+    )
+    parser.add_argument('--mode', choices=('stream', 'jobs', 'weekly'), default='stream',
+                        help='Path to exercise. Default: stream')
+    parser.add_argument('--users', type=int, default=20, help='Analyses to run. Default: 20')
+    parser.add_argument('--concurrency', type=int, default=5, help='Analyses in flight. Default: 5')
+    parser.add_argument('--week', type=str, default=None, help='Week start (YYYY-MM-DD). Default: last week')
+    parser.add_argument('--items-per-user', type=int, default=5, help='Synthetic purchases per user. Default: 5')
+    parser.add_argument('--catalog-size', type=int, default=100,
+                        help='Distinct synthetic products shared by all users. Default: 100')
+    parser.add_argument('--target', type=str, default=None,
+                        help='Base URL of a running API. Default: run the API in-process with synthetic data')
+    parser.add_argument('--llm-url', type=str, default=None,
+                        help='OpenAI-compatible base URL for Dedalus calls. Default: start a fake LLM server')
+    parser.add_argument('--timeout', type=float, default=300, help='Per-request client timeout. Default: 300')
+    parser.add_argument('--json', type=str, default=None, help='Also write the summary to this file')
+    add_fake_arguments(parser, prefix='fake-')
+
+    args = parser.parse_args()
+    summary = main(args)
+    print_summary(args, summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Insights Refresh Job Script
+
+Recomputes precomputed spending insights for users whose entry in the
+user_insights result store is missing or expired. Runs as a scheduled job
+(cron/scheduler) so /api/user/{user_id}/insights stays a single key lookup.
+
+Usage:
+    python scripts/refresh_insights.py [--user USER_ID] [--ttl SECONDS] [--limit N] [--dry-run]
+
+Arguments:
+    --user: Refresh only a specific user (default: all stale users)
+    --ttl: Set a per-user TTL in seconds for refreshed users (default: keep stored TTL)
+    --limit: Maximum number of users to refresh in one run (default: 1000)
+    --dry-run: Compute insights without writing to database
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+# Add repo root to path so database.api imports as a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Load environment variables
+from dotenv import load_dotenv
+env_path = os.path.join(os.path.dirname(__file__), '..', 'database', 'api', '.env')
+load_dotenv(env_path)
+
+from database.api import insights
+
+
+def main(args):
+    """
+    Main job execution function.
+    """
+    print("="*70)
+    print("INSIGHTS REFRESH JOB")
+    print("="*70)
+
+    if args.user:
+        users = [args.user]
+        print(f"Refreshing user: {args.user} (specified)")
+    else:
+        users = insights.get_users_needing_refresh(limit=args.limit)
+        print(f"Found {len(users)} user(s) with missing or expired insights")
+
+    if not users:
+        print("\n✅ No users to refresh. Exiting.")
+        return
+
+    start_time = datetime.now()
+    successful = 0
+
+    for i, user_id in enumerate(users, 1):
+        try:
+            if args.dry_run:
+                result = insights.compute_user_insights(user_id)
+                print(f"[{i}/{len(users)}] [DRY-RUN] {user_id}: "
+                      f"{len(result['overspending'])} overspending alerts")
+            else:
+                result = insights.refresh_user_insights(user_id, ttl_seconds=args.ttl)
+                print(f"[{i}/{len(users)}] ✅ {user_id}: "
+                      f"{len(result['overspending'])} overspending alerts")
+            successful += 1
+        except Exception as e:
+            print(f"[{i}/{len(users)}] ❌ {user_id}: {str(e)}")
+
+    total_time = (datetime.now() - start_time).total_seconds()
+
+    print(f"\n{'='*70}")
+    print(f"Users refreshed: {successful}/{len(users)} in {total_time:.1f}s")
+    if args.dry_run:
+        print(f"\n⚠️  DRY-RUN MODE: No data was written to database")
+    print(f"{'='*70}\n")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Refresh precomputed spending insights for stale users'
+    )
+    parser.add_argument('--user', type=str, help='Refresh only a specific user')
+    parser.add_argument('--ttl', type=int, default=None, help='Per-user TTL in seconds')
+    parser.add_argument('--limit', type=int, default=1000, help='Maximum users per run')
+    parser.add_argument('--dry-run', action='store_true', help='Do not write to database')
+
+    main(parser.parse_args())
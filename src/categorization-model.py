@@ -2,9 +2,9 @@ import asyncio
 import importlib.util
 import json
 import os
+import random
 import sys
 import uuid
-from dedalus_labs import AsyncDedalus, DedalusRunner
 from dotenv import load_dotenv
 
 # Load environment variables from database API directory
@@ -20,21 +20,46 @@ execute_many = db.execute_many
 execute = db.execute
 fetch_all = db.fetch_all
 
-async def categorize_products_batch(runner, products_data):
-    """
-    Categorize all products in a single batch call to Dedalus AI.
-    This is much faster and more cost-effective than individual calls.
-
-    Expected input: List of dicts with 'name' and 'price' keys
-    Expected output: List of categorization results
-    """
-    # Build the batch prompt with all products
+# Shared LLM output parsing (src/ on the path; this file is run as a script)
+sys.path.insert(0, os.path.dirname(__file__))
+from services.llm_output import parse_objects, CATEGORY_SCHEMA
+from services.llm_clients import get_llm_clients
+from services.rate_limit import estimate_tokens
+
+# Model used for product categorization
+CATEGORIZATION_MODEL = "openai/gpt-5-mini"
+
+# Products per categorization call: at most this many, and about this many
+# prompt tokens of product lines; chunks run concurrently
+CATEGORIZATION_CHUNK_SIZE = int(os.getenv("CATEGORIZATION_CHUNK_SIZE", "25"))
+CATEGORIZATION_CHUNK_TOKENS = int(os.getenv("CATEGORIZATION_CHUNK_TOKENS", "1500"))
+CATEGORIZATION_CONCURRENCY = int(os.getenv("CATEGORIZATION_CONCURRENCY", "4"))
+# Extra attempts for a chunk whose call fails or returns unparseable output,
+# waiting about CATEGORIZATION_RETRY_BACKOFF * 2^attempt seconds (jittered)
+CATEGORIZATION_RETRIES = int(os.getenv("CATEGORIZATION_RETRIES", "2"))
+CATEGORIZATION_RETRY_BACKOFF = float(os.getenv("CATEGORIZATION_RETRY_BACKOFF", "1.0"))
+
+
+def default_categorization(item_number, reason):
+    """Placeholder for a product the model did not categorize."""
+    return {
+        "item_number": item_number,
+        "category": "Miscellaneous",
+        "subcategory": None,
+        "confidence": 0.0,
+        "reason": reason,
+        "ask_user": True
+    }
+
+
+def build_categorization_prompt(products_data):
+    """Prompt categorizing `products_data`, numbered 1..N in order."""
     product_list = "\n".join([
         f"{i+1}. {p['name']} (${p['price']:.2f})"
         for i, p in enumerate(products_data)
     ])
 
-    prompt = f"""You are a product taxonomy classifier. Categorize ALL these products in one response.
+    return f"""You are a product taxonomy classifier. Categorize ALL these products in one response.
 
             Products to categorize:
             {product_list}
@@ -59,31 +84,159 @@ async def categorize_products_batch(runner, products_data):
             ...
             ]"""
 
-    response = await runner.run(
-        input=prompt,
-        model="openai/gpt-5-mini"
-    )
 
-    # Parse JSON array response
-    try:
-        results = json.loads(response.final_output)
-        if not isinstance(results, list):
-            raise ValueError("Expected JSON array")
-        return results
-    except (json.JSONDecodeError, ValueError) as e:
+def chunk_products(products_data, max_items=CATEGORIZATION_CHUNK_SIZE, max_tokens=CATEGORIZATION_CHUNK_TOKENS):
+    """
+    Split products into consecutive chunks of at most `max_items` products
+    and about `max_tokens` tokens of product lines (a single oversized
+    product still gets its own chunk).
+
+    Expected output: List of (offset into products_data, chunk) tuples
+    """
+    chunks = []
+    start, tokens = 0, 0
+    for i, p in enumerate(products_data):
+        line_tokens = estimate_tokens(f"{i - start + 1}. {p['name']} (${p['price']:.2f})")
+        if i > start and (i - start >= max_items or tokens + line_tokens > max_tokens):
+            chunks.append((start, products_data[start:i]))
+            start, tokens = i, 0
+        tokens += line_tokens
+    if start < len(products_data):
+        chunks.append((start, products_data[start:]))
+    return chunks
+
+
+async def _request_categories(runner, products_data):
+    """
+    One Dedalus call for `products_data`.
+
+    Expected output: {item_number: result} (objects failing CATEGORY_SCHEMA
+    dropped), or None if the response was not a JSON array
+    """
+    prompt = build_categorization_prompt(products_data)
+
+    # Wait for a call slot and room in the process-wide / per-model budgets
+    async with get_llm_clients().call(CATEGORIZATION_MODEL, prompt, site='categorization') as call:
+        response = await runner.run(
+            input=prompt,
+            model=CATEGORIZATION_MODEL
+        )
+        call.record_response(response)
+
+    # Parse JSON array response; objects failing CATEGORY_SCHEMA are dropped
+    results = parse_objects(getattr(response, 'final_output', None), CATEGORY_SCHEMA)
+    if results is None:
+        return None
+
+    # Matched by item_number, not position, so a skipped or malformed object
+    # only defaults that one product
+    by_number = {}
+    for result in results:
+        by_number.setdefault(result['item_number'], result)
+    return by_number
+
+
+def _complete_categorization(result, item_number, reason):
+    """Fill optional fields of a model result, or default a missing one."""
+    if result is None:
+        return default_categorization(item_number, reason)
+    result['item_number'] = item_number
+    result.setdefault('subcategory', None)
+    if result.get('confidence') is None:
+        result['confidence'] = 0.0
+    if result.get('reason') is None:
+        result['reason'] = ''
+    if result.get('ask_user') is None:
+        result['ask_user'] = result['confidence'] < 0.6
+    return result
+
+
+async def categorize_products_batch(runner, products_data):
+    """
+    Categorize products in a single batch call to Dedalus AI.
+    Use categorize_products() for full order histories (chunked, concurrent).
+
+    Expected input: List of dicts with 'name' and 'price' keys
+    Expected output: List of categorization results
+    """
+    by_number = await _request_categories(runner, products_data)
+    if by_number is None:
         # Fallback: create default categorizations
         return [
-            {
-                "item_number": i + 1,
-                "category": "Miscellaneous",
-                "subcategory": None,
-                "confidence": 0.0,
-                "reason": f"Failed to parse batch response: {str(e)}",
-                "ask_user": True
-            }
+            default_categorization(i + 1, "Failed to parse batch response")
             for i in range(len(products_data))
         ]
 
+    # One result per product, in product order
+    return [
+        _complete_categorization(by_number.get(i + 1), i + 1, "Missing from batch response")
+        for i in range(len(products_data))
+    ]
+
+
+def retry_delay(attempt, backoff=CATEGORIZATION_RETRY_BACKOFF):
+    """
+    Seconds to wait before retry number `attempt` (0-based): exponential
+    backoff with jitter, so chunks failing together don't retry together.
+    """
+    delay = backoff * (2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+async def categorize_products(
+    runner,
+    products_data,
+    chunk_size=CATEGORIZATION_CHUNK_SIZE,
+    chunk_tokens=CATEGORIZATION_CHUNK_TOKENS,
+    concurrency=CATEGORIZATION_CONCURRENCY,
+    retries=CATEGORIZATION_RETRIES,
+    retry_backoff=CATEGORIZATION_RETRY_BACKOFF
+):
+    """
+    Categorize products in size-bounded chunks, `concurrency` calls at once.
+
+    A chunk whose call fails or returns no JSON array is retried on its own
+    (up to `retries` more times, after retry_delay()); if it still fails only
+    its products get the default categorization. Results are reassembled by
+    item number.
+
+    Expected input: List of dicts with 'name' and 'price' keys
+    Expected output: List of categorization results, one per product in order
+    """
+    if retries < 0:
+        raise ValueError("retries must be >= 0")
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def categorize_chunk(chunk):
+        reason = "Not attempted"
+        for attempt in range(retries + 1):
+            if attempt:
+                # Outside the semaphore: a waiting retry doesn't hold a call slot
+                await asyncio.sleep(retry_delay(attempt - 1, retry_backoff))
+            try:
+                async with semaphore:
+                    by_number = await _request_categories(runner, chunk)
+            except Exception as e:
+                reason = f"Categorization failed: {str(e) or type(e).__name__}"
+                continue
+            if by_number is not None:
+                return by_number, None
+            reason = "Failed to parse batch response"
+        return {}, reason
+
+    chunks = chunk_products(products_data, chunk_size, chunk_tokens)
+    outcomes = await asyncio.gather(*(categorize_chunk(chunk) for _, chunk in chunks))
+
+    categorized = [None] * len(products_data)
+    for (offset, chunk), (by_number, error) in zip(chunks, outcomes):
+        if error is not None:
+            print(f"⚠️  Categorization of products {offset + 1}-{offset + len(chunk)} failed: {error}")
+        for i in range(len(chunk)):
+            categorized[offset + i] = _complete_categorization(
+                by_number.get(i + 1), offset + i + 1, error or "Missing from batch response"
+            )
+    return categorized
+
 def insert_to_snowflake_batch(all_results, merchant_name):
     """
     Insert all categorized products to Snowflake test table using batch insert.
@@ -120,7 +273,9 @@ def insert_to_snowflake_batch(all_results, merchant_name):
             'price': result['price'],
             'qty': result['quantity'],
             'reason': result['reason'],
-            'confidence': result['confidence']
+            'confidence': result['confidence'],
+            # Original product line (external_id = ASIN, used by the product cache)
+            'raw_line': json.dumps(result.get('raw_line', {}))
         })
 
     # Single batch insert for all records
@@ -128,13 +283,14 @@ def insert_to_snowflake_batch(all_results, merchant_name):
     INSERT INTO purchase_items_test (
         item_id, purchase_id, user_id, merchant, ts, buyer_location,
         item_name, item_text, category, subcategory, price, qty,
-        detected_needwant, reason, confidence, status
+        detected_needwant, reason, confidence, status, raw_line
     ) VALUES (
         %(item_id)s, %(purchase_id)s, %(user_id)s, %(merchant)s,
         TO_TIMESTAMP_TZ(%(ts)s),
         PARSE_JSON(%(buyer_location)s),
         %(item_name)s, %(item_text)s, %(category)s, %(subcategory)s, %(price)s, %(qty)s,
-        NULL, %(reason)s, %(confidence)s, 'active'
+        NULL, %(reason)s, %(confidence)s, 'active',
+        PARSE_JSON(%(raw_line)s)
     )
     """
 
@@ -184,7 +340,7 @@ def generate_embeddings_batch():
 
 async def main():
     """
-    Load Amazon mock data, categorize products with Dedalus AI batch call,
+    Load Amazon mock data, categorize products with chunked Dedalus AI calls,
     and insert to Snowflake test table.
 
     Expected input: JSON file with Amazon transactions containing products
@@ -198,9 +354,8 @@ async def main():
 
     merchant_name = data['merchant']['name']
 
-    # Initialize Dedalus client
-    client = AsyncDedalus()
-    runner = DedalusRunner(client)
+    # Shared Dedalus runner (pooled connections, see services/llm_clients.py)
+    runner = get_llm_clients().runner()
 
     # Collect all products from all transactions
     products_to_categorize = []
@@ -221,11 +376,14 @@ async def main():
                 'name': product['name'],
                 'price': float(product['price']['total']),
                 'quantity': product['quantity'],
-                'buyer_location': buyer_location  # Add location data
+                'buyer_location': buyer_location,  # Add location data
+                'raw_line': product
             })
 
-    # Single batch categorization call
-    categorization_results = await categorize_products_batch(runner, products_to_categorize)
+    # Chunked categorization calls, run concurrently
+    chunk_count = len(chunk_products(products_to_categorize))
+    print(f"🔄 Categorizing {len(products_to_categorize)} products in {chunk_count} chunk(s)...")
+    categorization_results = await categorize_products(runner, products_to_categorize)
 
     # Merge categorization results with product metadata
     all_results = []
@@ -242,7 +400,8 @@ async def main():
             "reason": cat_result['reason'],
             "ask_user": cat_result['ask_user'],
             "transaction_id": metadata['transaction_id'],
-            "buyer_location": metadata['buyer_location']  # Add location data
+            "buyer_location": metadata['buyer_location'],  # Add location data
+            "raw_line": metadata['raw_line']
         })
 
     # Calculate summary statistics
@@ -0,0 +1,260 @@
+"""
+LLM Clients - Process-wide Dedalus client, runner and call limits
+
+Every caller used to build its own AsyncDedalus() and DedalusRunner, paying
+client setup and dropping its HTTP connections after one call. One provider
+per process now owns:
+
+  - a single AsyncDedalus on a pooled httpx client (keep-alive connections
+    reused across calls, at most LLM_MAX_CONNECTIONS open)
+  - one DedalusRunner over that client
+  - a concurrency cap (LLM_MAX_CONCURRENCY calls in flight)
+  - per-model RPM/TPM limiters (LLM_MODEL_LIMITS), on top of the
+    process-wide limiter from rate_limit.py
+
+Usage:
+    clients = get_llm_clients()
+    runner = clients.runner()
+    async with clients.call("openai/gpt-4o-mini", prompt, site="weekly_research") as call:
+        response = await runner.run(input=prompt, model="openai/gpt-4o-mini")
+        call.record_response(response)
+
+Calls made with a `site` are also tracked by llm_metrics.py (latency,
+tokens, retries, outcome); the shared httpx client's hooks count attempts.
+
+LLM_MODEL_LIMITS is a comma-separated list of model=rpm:tpm, e.g.
+"openai/gpt-4o-mini=500:200000,openai/gpt-5-mini=100:50000" (0 = unlimited).
+
+The client is bound to the event loop it was created on; a provider used
+from a new loop (e.g. a second asyncio.run()) builds a fresh client and
+closes the old one so its connection pool isn't leaked.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from dedalus_labs import AsyncDedalus, DedalusRunner
+
+from services.llm_metrics import CallRecord, on_http_request, on_http_response, track_llm_call
+from services.rate_limit import AsyncRateLimiter, get_rate_limiter, estimate_tokens, MAX_OUTPUT_TOKENS
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "30"))
+
+# model -> (requests per minute, tokens per minute)
+ModelLimits = Dict[str, Tuple[Optional[float], Optional[float]]]
+
+
+def parse_model_limits(spec: Optional[str]) -> ModelLimits:
+    """
+    Parse "model=rpm:tpm,..." into {model: (rpm, tpm)}.
+
+    Either number may be empty or 0 for unlimited; malformed entries raise
+    ValueError so a typo in the environment fails at startup.
+    """
+    limits: ModelLimits = {}
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model, _, values = entry.rpartition("=")
+        rpm, _, tpm = values.partition(":")
+        if not model:
+            raise ValueError(f"Invalid LLM_MODEL_LIMITS entry: {entry!r}")
+        limits[model.strip()] = (float(rpm) if rpm else None, float(tpm) if tpm else None)
+    return limits
+
+
+class LLMCall:
+    """One admitted call: corrects the token budgets once usage is known."""
+
+    def __init__(self, limiters: List[AsyncRateLimiter], reserved_tokens: int,
+                 record: Optional[CallRecord] = None):
+        self.limiters = limiters
+        self.reserved_tokens = reserved_tokens
+        self.record = record
+
+    def record_usage(self, actual_tokens: int) -> None:
+        for limiter in self.limiters:
+            limiter.record_usage(actual_tokens, self.reserved_tokens)
+
+    def record_response(self, response: Any) -> int:
+        """Record tokens from a response (usage, else estimated); returns the total."""
+        record = self.record or CallRecord('', '', None)
+        record.set_output(response)
+        total = getattr(getattr(response, 'usage', None), 'total_tokens', None)
+        if not isinstance(total, int):
+            total = record.total_tokens or self.reserved_tokens
+        self.record_usage(total)
+        return total
+
+
+class LLMClients:
+    """
+    Long-lived Dedalus client/runner with concurrency and per-model limits.
+
+    Args:
+        max_concurrency: Calls in flight at once across the process
+        max_connections: HTTP connections the client may open
+        model_limits: {model: (rpm, tpm)} limits in addition to the global limiter
+        runner: Pre-built runner to hand out (tests, fake servers)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        model_limits: Optional[ModelLimits] = None,
+        runner: Any = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_connections = max(1, max_connections)
+        self._model_limiters = {
+            model: AsyncRateLimiter(rpm or None, tpm or None)
+            for model, (rpm, tpm) in (model_limits or {}).items()
+        }
+        self._fixed_runner = runner
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[AsyncDedalus] = None
+        self._runner: Any = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._closing: set = set()
+        self.clients_created = 0
+        self.calls = 0
+        self.in_flight = 0
+
+    def _bind_loop(self) -> None:
+        """(Re)create loop-bound state when called from a different event loop."""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        old_loop, old_client = self._loop, self._client
+        self._loop = loop
+        self._client = None
+        self._runner = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if old_client is not None:
+            self._close_stale(old_client, old_loop, loop)
+
+    def _close_stale(self, client: AsyncDedalus, old_loop: Optional[asyncio.AbstractEventLoop],
+                     loop: asyncio.AbstractEventLoop) -> None:
+        """Close a replaced client: on its own loop if that still runs, else best effort here."""
+        if old_loop is not None and old_loop.is_running() and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(_close_quietly(client), old_loop)
+            return
+        task = loop.create_task(_close_quietly(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _build_client(self) -> AsyncDedalus:
+        import httpx
+        from dedalus_labs import DefaultAsyncHttpxClient
+
+        http_client = DefaultAsyncHttpxClient(limits=httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=LLM_KEEPALIVE_SECONDS,
+        ), event_hooks={"request": [on_http_request], "response": [on_http_response]})
+        self.clients_created += 1
+        return AsyncDedalus(http_client=http_client)
+
+    def client(self) -> AsyncDedalus:
+        """The shared AsyncDedalus for the running event loop."""
+        self._bind_loop()
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    def runner(self) -> Any:
+        """The shared DedalusRunner (or the injected runner)."""
+        if self._fixed_runner is not None:
+            return self._fixed_runner
+        self._bind_loop()
+        if self._runner is None:
+            self._runner = DedalusRunner(self.client())
+        return self._runner
+
+    def limiters(self, model: str) -> List[AsyncRateLimiter]:
+        """Limiters a call to `model` must pass: the global one, then the model's."""
+        limiters = [get_rate_limiter()]
+        if model in self._model_limiters:
+            limiters.append(self._model_limiters[model])
+        return limiters
+
+    @asynccontextmanager
+    async def call(self, model: str, prompt: str = "", site: Optional[str] = None) -> AsyncIterator[LLMCall]:
+        """
+        Admit one call to `model`: wait for a concurrency slot and room in the
+        RPM/TPM budgets (prompt estimate + MAX_OUTPUT_TOKENS reserved).
+
+        With `site`, the admitted call is tracked in llm_metrics (queueing
+        time excluded).
+        """
+        self._bind_loop()
+        reserved_tokens = estimate_tokens(prompt) + MAX_OUTPUT_TOKENS
+        limiters = self.limiters(model)
+        async with self._semaphore:
+            for limiter in limiters:
+                await limiter.acquire(reserved_tokens)
+            self.calls += 1
+            self.in_flight += 1
+            try:
+                if site is None:
+                    yield LLMCall(limiters, reserved_tokens)
+                else:
+                    with track_llm_call(site, model, prompt) as record:
+                        yield LLMCall(limiters, reserved_tokens, record)
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_connections": self.max_connections,
+            "clients_created": self.clients_created,
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "model_limits": sorted(self._model_limiters),
+        }
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections (on shutdown)."""
+        client, self._client, self._runner = self._client, None, None
+        if client is not None:
+            await client.close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+async def _close_quietly(client: AsyncDedalus) -> None:
+    """Close a stale client; its sockets may belong to a loop that is gone."""
+    try:
+        await client.close()
+    except Exception:
+        pass
+
+
+_clients: Optional[LLMClients] = None
+
+
+def get_llm_clients() -> LLMClients:
+    """Process-wide provider shared by all LLM callers."""
+    if _clients is None:
+        configure_llm_clients()
+    return _clients
+
+
+def configure_llm_clients(
+    max_concurrency: int = LLM_MAX_CONCURRENCY,
+    max_connections: int = LLM_MAX_CONNECTIONS,
+    model_limits: Optional[ModelLimits] = None,
+) -> LLMClients:
+    """Replace the process-wide provider (e.g. from job CLI flags)."""
+    global _clients
+    if model_limits is None:
+        model_limits = parse_model_limits(os.getenv("LLM_MODEL_LIMITS"))
+    _clients = LLMClients(max_concurrency, max_connections, model_limits)
+    return _clients
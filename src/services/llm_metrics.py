@@ -0,0 +1,420 @@
+"""
+LLM Call Metrics - Latency, tokens, retries and cost per call site
+
+Every LLM call (AI coach, categorization, weekly research, streaming
+analysis) runs inside track_llm_call(site, model, prompt), which records:
+
+  - wall time and time to first token (first streamed chunk, else first
+    response byte)
+  - prompt / completion tokens (from the response's usage, else estimated
+    from the text)
+  - HTTP attempts, so SDK retries show up (counted by the httpx hooks of
+    the shared client, see llm_clients.py)
+  - outcome: ok | error | timeout | cancelled
+
+Calls are aggregated per (site, model) into fixed-bucket histograms and
+totals, with an estimated cost from LLM_PRICES (USD per 1M tokens,
+"model=input:output,..."). The API exposes snapshot() on /metrics/llm; the
+weekly job writes it to its JSON log (merge_snapshots() combines workers
+and shards).
+
+count_llm_calls() counts the calls made inside a block (including tasks it
+starts), which is how reports fill in mcp_calls_made.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from services.rate_limit import estimate_tokens
+
+SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+OUTCOMES = ('ok', 'error', 'timeout', 'cancelled')
+
+# USD per 1M (input, output) tokens; override/extend with LLM_PRICES
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    'openai/gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o-mini': (0.15, 0.60),
+    'openai/gpt-5-mini': (0.25, 2.00),
+}
+
+
+def parse_prices(spec: Optional[str]) -> Dict[str, Tuple[float, float]]:
+    """Parse "model=input:output,..." (USD per 1M tokens)."""
+    prices: Dict[str, Tuple[float, float]] = {}
+    for entry in (spec or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model, _, values = entry.rpartition('=')
+        input_price, _, output_price = values.partition(':')
+        if not model or not input_price or not output_price:
+            raise ValueError(f"Invalid LLM_PRICES entry: {entry!r}")
+        prices[model.strip()] = (float(input_price), float(output_price))
+    return prices
+
+
+class Histogram:
+    """Counts per upper bound (last bucket is +Inf), plus count/sum/min/max."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        index = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [str(b) for b in self.bounds] + ['+Inf']
+        return _histogram_summary({
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'min': self.min,
+            'max': self.max,
+        })
+
+
+def _histogram_summary(hist: Dict[str, Any]) -> Dict[str, Any]:
+    """Add mean and bucket-estimated p50/p95/p99 to a histogram snapshot."""
+    count = hist['count']
+    hist['mean'] = round(hist['sum'] / count, 4) if count else None
+    for name, pct in (('p50', 50), ('p95', 95), ('p99', 99)):
+        hist[name] = None
+        if not count:
+            continue
+        rank, seen = pct / 100.0 * count, 0
+        for label, bucket_count in hist['buckets'].items():
+            seen += bucket_count
+            if seen >= rank:
+                # Upper bound of the bucket, never above the largest value seen
+                hist[name] = hist['max'] if label == '+Inf' else min(float(label), hist['max'])
+                break
+    return hist
+
+
+class CallRecord:
+    """One tracked LLM call; fill in tokens / first token while it runs."""
+
+    def __init__(self, site: str, model: str, prompt: Optional[str] = None):
+        self.site = site
+        self.model = model
+        self.prompt = prompt
+        self.started = time.perf_counter()
+        self.ttft: Optional[float] = None
+        self.wall: Optional[float] = None
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.attempts = 0
+        self.outcome: Optional[str] = None
+        self.error: Optional[str] = None
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def first_token(self) -> None:
+        """Mark the first token/byte (only the first mark counts)."""
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+
+    def set_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        if isinstance(prompt_tokens, int):
+            self.prompt_tokens = prompt_tokens
+        if isinstance(completion_tokens, int):
+            self.completion_tokens = completion_tokens
+
+    def set_output(self, response: Any, text: Optional[str] = None) -> None:
+        """
+        Take token counts from a response's usage (object or dict), else
+        estimate them from the prompt and the output text (`text`, the
+        response itself when a string, or its final_output).
+        """
+        usage = response.get('usage') if isinstance(response, dict) else getattr(response, 'usage', None)
+        if isinstance(usage, dict):
+            self.set_usage(usage.get('prompt_tokens'), usage.get('completion_tokens'))
+        elif usage is not None:
+            self.set_usage(getattr(usage, 'prompt_tokens', None), getattr(usage, 'completion_tokens', None))
+
+        if self.prompt_tokens is None and self.prompt is not None:
+            self.prompt_tokens = estimate_tokens(self.prompt)
+        if self.completion_tokens is None:
+            if text is None:
+                text = response if isinstance(response, str) else getattr(response, 'final_output', None)
+            if isinstance(text, str):
+                self.completion_tokens = estimate_tokens(text)
+
+    @property
+    def total_tokens(self) -> int:
+        return (self.prompt_tokens or 0) + (self.completion_tokens or 0)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'site': self.site,
+            'model': self.model,
+            'wall_seconds': self.wall,
+            'ttft_seconds': self.ttft,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'retries': self.retries,
+            'outcome': self.outcome,
+            'error': self.error,
+        }
+
+
+class _SiteStats:
+    """Aggregates for one (site, model)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.outcomes = {outcome: 0 for outcome in OUTCOMES}
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.unpriced_calls = 0
+        self.wall_seconds = Histogram(SECONDS_BUCKETS)
+        self.ttft_seconds = Histogram(SECONDS_BUCKETS)
+        self.prompt_tokens_hist = Histogram(TOKEN_BUCKETS)
+        self.completion_tokens_hist = Histogram(TOKEN_BUCKETS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'outcomes': dict(self.outcomes),
+            'retries': self.retries,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cost_usd': round(self.cost_usd, 6),
+            'unpriced_calls': self.unpriced_calls,
+            'histograms': {
+                'wall_seconds': self.wall_seconds.snapshot(),
+                'ttft_seconds': self.ttft_seconds.snapshot(),
+                'prompt_tokens': self.prompt_tokens_hist.snapshot(),
+                'completion_tokens': self.completion_tokens_hist.snapshot(),
+            },
+        }
+
+
+class LLMMetrics:
+    """Thread-safe per-(site, model) aggregates of finished LLM calls."""
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.prices = dict(DEFAULT_PRICES)
+        self.prices.update(prices or {})
+        self._lock = threading.Lock()
+        self._sites: Dict[Tuple[str, str], _SiteStats] = {}
+        self.since = datetime.now().isoformat()
+
+    def reset(self) -> None:
+        self.snapshot(reset=True)
+
+    def cost(self, call: CallRecord) -> Optional[float]:
+        price = self.prices.get(call.model)
+        if price is None:
+            return None
+        return ((call.prompt_tokens or 0) * price[0] + (call.completion_tokens or 0) * price[1]) / 1_000_000
+
+    def record(self, call: CallRecord) -> None:
+        cost = self.cost(call)
+        with self._lock:
+            stats = self._sites.setdefault((call.site, call.model), _SiteStats())
+            stats.calls += 1
+            stats.outcomes[call.outcome] = stats.outcomes.get(call.outcome, 0) + 1
+            stats.retries += call.retries
+            stats.wall_seconds.observe(call.wall or 0.0)
+            if call.ttft is not None:
+                stats.ttft_seconds.observe(call.ttft)
+            if call.prompt_tokens is not None:
+                stats.prompt_tokens += call.prompt_tokens
+                stats.prompt_tokens_hist.observe(call.prompt_tokens)
+            if call.completion_tokens is not None:
+                stats.completion_tokens += call.completion_tokens
+                stats.completion_tokens_hist.observe(call.completion_tokens)
+            if cost is None:
+                stats.unpriced_calls += 1
+            else:
+                stats.cost_usd += cost
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        {'since', 'calls', 'cost_usd', 'sites': {site: {model: stats}}};
+        with reset, atomically start a new window.
+        """
+        with self._lock:
+            sites: Dict[str, Dict[str, Any]] = {}
+            for (site, model), stats in sorted(self._sites.items()):
+                sites.setdefault(site, {})[model] = stats.snapshot()
+            since = self.since
+            if reset:
+                self._sites = {}
+                self.since = datetime.now().isoformat()
+        return _with_totals({'since': since, 'sites': sites})
+
+
+def _with_totals(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    models = [m for site in snapshot['sites'].values() for m in site.values()]
+    snapshot['calls'] = sum(m['calls'] for m in models)
+    snapshot['cost_usd'] = round(sum(m['cost_usd'] for m in models), 6)
+    return snapshot
+
+
+def _merge_histograms(histograms: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = {'buckets': {}, 'count': 0, 'sum': 0.0, 'min': None, 'max': None}
+    for hist in histograms:
+        for label, count in hist['buckets'].items():
+            merged['buckets'][label] = merged['buckets'].get(label, 0) + count
+        merged['count'] += hist['count']
+        merged['sum'] = round(merged['sum'] + hist['sum'], 4)
+        for key, pick in (('min', min), ('max', max)):
+            if hist[key] is not None:
+                merged[key] = hist[key] if merged[key] is None else pick(merged[key], hist[key])
+    return _histogram_summary(merged)
+
+
+def merge_snapshots(snapshots: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Combine snapshot() output from several processes/shards."""
+    snapshots = [s for s in snapshots if s]
+    grouped: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for snapshot in snapshots:
+        for site, models in snapshot['sites'].items():
+            for model, stats in models.items():
+                grouped.setdefault((site, model), []).append(stats)
+
+    sites: Dict[str, Dict[str, Any]] = {}
+    for (site, model), parts in sorted(grouped.items()):
+        outcomes: Dict[str, int] = {}
+        for part in parts:
+            for outcome, count in part['outcomes'].items():
+                outcomes[outcome] = outcomes.get(outcome, 0) + count
+        sites.setdefault(site, {})[model] = {
+            'calls': sum(p['calls'] for p in parts),
+            'outcomes': outcomes,
+            'retries': sum(p['retries'] for p in parts),
+            'prompt_tokens': sum(p['prompt_tokens'] for p in parts),
+            'completion_tokens': sum(p['completion_tokens'] for p in parts),
+            'cost_usd': round(sum(p['cost_usd'] for p in parts), 6),
+            'unpriced_calls': sum(p['unpriced_calls'] for p in parts),
+            'histograms': {
+                name: _merge_histograms([p['histograms'][name] for p in parts])
+                for name in parts[0]['histograms']
+            },
+        }
+    since = min((s['since'] for s in snapshots), default=datetime.now().isoformat())
+    return _with_totals({'since': since, 'sites': sites})
+
+
+_metrics = LLMMetrics(parse_prices(os.getenv('LLM_PRICES')))
+
+# The call in progress in this context (for the HTTP hooks), and active counters
+_current_call: contextvars.ContextVar[Optional[CallRecord]] = contextvars.ContextVar('llm_current_call', default=None)
+_counters: contextvars.ContextVar[Tuple['CallCounter', ...]] = contextvars.ContextVar('llm_call_counters', default=())
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Process-wide metrics shared by all LLM callers."""
+    return _metrics
+
+
+class CallCounter:
+    """LLM calls made inside a count_llm_calls() block."""
+
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+
+
+@contextmanager
+def count_llm_calls() -> Iterator[CallCounter]:
+    """Count tracked calls in this block, including tasks started inside it."""
+    counter = CallCounter()
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        try:
+            _counters.reset(token)
+        except ValueError:
+            _counters.set(tuple(c for c in _counters.get() if c is not counter))
+
+
+def _failure_outcome(error: BaseException) -> str:
+    """'timeout' for asyncio/httpx/SDK/requests timeouts, else 'error'."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or 'Timeout' in type(error).__name__:
+        return 'timeout'
+    return 'error'
+
+
+@contextmanager
+def track_llm_call(
+    site: str,
+    model: str,
+    prompt: Optional[str] = None,
+    metrics: Optional[LLMMetrics] = None,
+) -> Iterator[CallRecord]:
+    """
+    Track one LLM call at `site` (works in sync and async code).
+
+    Exceptions propagate; they set the outcome to timeout, cancelled or error.
+    """
+    call = CallRecord(site, model, prompt)
+    token = _current_call.set(call)
+    outcome, error = 'ok', None
+    try:
+        yield call
+    except asyncio.CancelledError:
+        outcome, error = 'cancelled', 'cancelled'
+        raise
+    except Exception as e:
+        outcome, error = _failure_outcome(e), str(e) or type(e).__name__
+        raise
+    finally:
+        try:
+            _current_call.reset(token)
+        except ValueError:
+            _current_call.set(None)
+        call.wall = time.perf_counter() - call.started
+        call.outcome, call.error = outcome, error
+        call.attempts = max(call.attempts, 1)
+        (metrics or _metrics).record(call)
+        for counter in _counters.get():
+            counter.calls += 1
+            counter.attempts += call.attempts
+
+
+def current_llm_call() -> Optional[CallRecord]:
+    return _current_call.get()
+
+
+async def on_http_request(request: Any) -> None:
+    """httpx request hook: one more attempt (retries included) for the current call."""
+    call = _current_call.get()
+    if call is not None:
+        call.attempts += 1
+
+
+async def on_http_response(response: Any) -> None:
+    """httpx response hook: first response byte of the current call."""
+    call = _current_call.get()
+    if call is not None:
+        call.first_token()
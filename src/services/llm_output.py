@@ -0,0 +1,379 @@
+"""
+LLM Output Parsing - Linear-time extraction of JSON arrays from model output
+
+Our prompts ask the model for a JSON array of objects, but responses are
+often wrapped in prose or a ```json code fence, contain several arrays
+("see [1]"), have trailing commas, or are cut off mid-object. Everything
+here scans the text once, tracking string/escape state and bracket depth,
+so cost stays linear even on large malformed outputs (unlike the greedy
+regex search it replaces, which backtracks).
+
+    parse_objects(text, schema)    whole response -> validated objects (or None)
+    IncrementalArrayParser         chunked response -> objects as each one closes
+    validate_object(obj, schema)   coerce/check one object against a schema
+
+Schemas map field -> (type, required); see FINDING_SCHEMA and CATEGORY_SCHEMA.
+
+Usage:
+    findings = parse_objects(response.final_output, FINDING_SCHEMA)
+    if findings is None:
+        ...  # no JSON array in the response
+
+    parser = IncrementalArrayParser(schema=FINDING_SCHEMA)
+    async for chunk in runner.run(..., stream=True):
+        for finding in parser.feed(chunk.choices[0].delta.content or ""):
+            ...  # emit "found" immediately
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+Schema = Dict[str, Tuple[type, bool]]
+
+# Weekly suggestions "Plan" prompt output
+FINDING_SCHEMA: Schema = {
+    'item_name': (str, True),
+    'total_savings': (float, True),
+    'item_number': (int, False),
+    'original_price': (float, False),
+    'original_merchant': (str, False),
+    'alternative_merchant': (str, False),
+    'alternative_price': (float, False),
+    'shipping_cost': (float, False),
+    'tax_estimate': (float, False),
+    'total_landed_cost': (float, False),
+    'product_match_confidence': (str, False),
+    'stock_status': (str, False),
+    'url': (str, False),
+    'notes': (str, False),
+}
+
+# categorize_products_batch output
+CATEGORY_SCHEMA: Schema = {
+    'item_number': (int, True),
+    'category': (str, True),
+    'subcategory': (str, False),
+    'confidence': (float, False),
+    'reason': (str, False),
+    'ask_user': (bool, False),
+}
+
+_NUMBER = re.compile(r'^\s*\$?\s*(-?\d+(?:,\d{3})*(?:\.\d+)?)\s*$')
+
+
+def _coerce(value: Any, kind: type) -> Tuple[bool, Any]:
+    """(ok, coerced value) for one field."""
+    if kind is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return True, float(value)
+        if isinstance(value, str):
+            match = _NUMBER.match(value)
+            if match:
+                return True, float(match.group(1).replace(',', ''))
+        return False, None
+    if kind is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return True, value
+        if isinstance(value, float) and value.is_integer():
+            return True, int(value)
+        if isinstance(value, str) and value.strip().isdigit():
+            return True, int(value.strip())
+        return False, None
+    if kind is bool:
+        if isinstance(value, bool):
+            return True, value
+        if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+            return True, value.strip().lower() == 'true'
+        return False, None
+    if kind is str:
+        if isinstance(value, str):
+            return True, value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return True, str(value)
+        return False, None
+    return isinstance(value, kind), value
+
+
+def validate_object(obj: Any, schema: Schema) -> Optional[Dict[str, Any]]:
+    """
+    Check one parsed object against `schema`.
+
+    Numeric strings ("$12.50"), integral floats and "true"/"false" are
+    coerced. Optional fields with the wrong type become None; unknown
+    fields are kept.
+
+    Returns:
+        Coerced copy, or None if it is not a dict or a required field is
+        missing/invalid
+    """
+    if not isinstance(obj, dict):
+        return None
+    out = dict(obj)
+    for field, (kind, required) in schema.items():
+        value = obj.get(field)
+        if value is None:
+            if required:
+                return None
+            continue
+        ok, coerced = _coerce(value, kind)
+        if not ok:
+            if required:
+                return None
+            coerced = None
+        out[field] = coerced
+    return out
+
+
+def strip_trailing_commas(text: str) -> str:
+    """Remove commas directly before } or ] (outside strings), in one pass."""
+    out: List[str] = []
+    in_string = escape = False
+    pending = None  # index in out of the last comma, if only whitespace followed it
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            pending = None
+        elif ch == ',':
+            pending = len(out)
+        elif ch in '}]':
+            if pending is not None:
+                out[pending] = ''
+            pending = None
+        elif not ch.isspace():
+            pending = None
+        out.append(ch)
+    return ''.join(out)
+
+
+def _loads(text: str) -> Any:
+    """
+    json.loads, retrying once without trailing commas.
+
+    Raises:
+        ValueError (json.JSONDecodeError) if the text is not JSON, including
+        nesting too deep for the decoder
+    """
+    try:
+        return json.loads(text)
+    except RecursionError:
+        raise json.JSONDecodeError("nesting too deep", text, 0)
+    except json.JSONDecodeError:
+        try:
+            return json.loads(strip_trailing_commas(text))
+        except RecursionError:
+            raise json.JSONDecodeError("nesting too deep", text, 0)
+
+
+def _top_level_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    (start, end) of each balanced [...] / {...} outside other brackets.
+
+    Quotes outside brackets are prose, not JSON strings. Mismatched closers
+    are tolerated (depth only).
+    """
+    depth = 0
+    start = 0
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            if depth > 0:
+                in_string = True
+        elif ch in '[{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch in ']}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield start, i + 1
+
+
+def extract_json_array(text: str) -> Optional[List[Any]]:
+    """
+    Find the JSON array of objects in an LLM response.
+
+    Picks the first top-level array that decodes to objects (skipping
+    "see [1]"-style brackets in prose). Falls back to loose top-level
+    objects, then to the complete objects of a truncated array.
+
+    Returns:
+        The array, [] if the response only has an empty array, None if no
+        array or object could be recovered
+    """
+    if not isinstance(text, str):
+        return None
+
+    empty = False
+    loose: List[Any] = []
+    for start, end in _top_level_spans(text):
+        try:
+            value = _loads(text[start:end])
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, list):
+            if any(isinstance(v, dict) for v in value):
+                return value
+            empty = empty or not value
+        elif isinstance(value, dict):
+            loose.append(value)
+
+    if loose:
+        return loose
+
+    # Cut off mid-array: keep the objects that did close
+    salvaged = IncrementalArrayParser().feed(text)
+    if salvaged:
+        return salvaged
+    return [] if empty else None
+
+
+def parse_json_array(text: str) -> Optional[List[Any]]:
+    """
+    Parse an LLM response that should be a JSON array.
+
+    Plain JSON takes the fast path; a {"findings": [...]} style wrapper is
+    unwrapped; anything else goes through extract_json_array().
+    """
+    if not isinstance(text, str):
+        return None
+    try:
+        value = json.loads(text)
+    except (json.JSONDecodeError, RecursionError):
+        return extract_json_array(text)
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        for inner in value.values():
+            if isinstance(inner, list) and all(isinstance(v, dict) for v in inner):
+                return inner
+        return [value]
+    return None
+
+
+def parse_objects(text: str, schema: Optional[Schema] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Parse an LLM response into validated objects.
+
+    Returns:
+        Objects that pass `schema` (invalid ones are dropped), or None if the
+        response has no JSON array/objects at all
+    """
+    values = parse_json_array(text)
+    if values is None:
+        return None
+    objects = []
+    for value in values:
+        obj = validate_object(value, schema) if schema else (value if isinstance(value, dict) else None)
+        if obj is not None:
+            objects.append(obj)
+    return objects
+
+
+class IncrementalArrayParser:
+    """
+    Streaming parser for `[ {...}, {...} ]` in arbitrary chunks.
+
+    Linear in the total input: every character is scanned once, and each
+    object's text is decoded once when it closes. Text outside the array
+    (prose, code fences) is skipped. Objects that fail to decode or fail
+    `schema` are counted in `errors` / `rejected` and skipped; the rest of
+    the stream is unaffected.
+    """
+
+    def __init__(self, schema: Optional[Schema] = None):
+        self.schema = schema
+        self.errors = 0
+        self.rejected = 0
+        self.objects = 0
+        self._depth = 0                # open [ / { outside strings
+        self._in_string = False
+        self._escape = False
+        self._capture: Optional[List[str]] = None
+        self._capture_depth = 0        # depth at which the captured object opened
+        self._done = False             # top-level array closed
+
+    @property
+    def done(self) -> bool:
+        """True once an array of findings has closed (later text is ignored)."""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume the next chunk.
+
+        Returns:
+            Objects completed by this chunk, in order
+        """
+        completed: List[Dict[str, Any]] = []
+        if self._done or not chunk:
+            return completed
+
+        start = 0 if self._capture is not None else None
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                # Quotes in prose before the array are not JSON strings
+                if self._depth > 0:
+                    self._in_string = True
+            elif ch == '[' or ch == '{':
+                if ch == '{' and self._capture is None and self._depth <= 1:
+                    self._capture = []
+                    self._capture_depth = self._depth
+                    start = i
+                self._depth += 1
+            elif ch == ']' or ch == '}':
+                if self._depth == 0:
+                    continue
+                self._depth -= 1
+                if self._capture is not None and self._depth == self._capture_depth:
+                    self._capture.append(chunk[start:i + 1])
+                    self._emit(''.join(self._capture), completed)
+                    self._capture = None
+                    start = None
+                elif self._depth == 0 and ch == ']' and self.objects:
+                    # Brackets in prose ("see [1]") close without objects
+                    self._done = True
+                    break
+
+        if self._capture is not None and start is not None:
+            self._capture.append(chunk[start:])
+        return completed
+
+    def _emit(self, text: str, completed: List[Dict[str, Any]]) -> None:
+        try:
+            obj = _loads(text)
+        except json.JSONDecodeError:
+            self.errors += 1
+            return
+        if not isinstance(obj, dict):
+            return
+        self.objects += 1
+        if self.schema is not None:
+            obj = validate_object(obj, self.schema)
+            if obj is None:
+                self.rejected += 1
+                return
+        completed.append(obj)
@@ -0,0 +1,292 @@
+"""
+Product Alternative Cache - Cross-user cache of researched alternatives
+
+Popular products (e.g. the Ring Video Doorbell in the mock data) are bought by
+many users in the same week. The weekly suggester researches each product
+once, caches the findings by canonical product identity, and reuses them for
+every other user until the price data goes stale.
+
+Keys:
+    id:<external_id>     ASIN / merchant product id when known (raw_line:external_id)
+    name:<normalized>    lower-cased item name with punctuation collapsed otherwise
+
+Entries store the findings *per product* (alternative merchant, landed cost,
+url, ...) plus the price the research was done against. Savings are always
+recomputed from the current user's price, and "no cheaper alternative"
+results are cached too, but only reused for users who paid no more than the
+researched price.
+
+Storage is in-process (LRU + TTL). With PRODUCT_CACHE_SHARED=true the weekly
+suggester also backs it with the product_alternatives_cache table, so shards
+and worker processes share research.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Same threshold as the Plan prompt ("Only report alternatives with >$10 total savings")
+MIN_SAVINGS = 10.0
+
+DEFAULT_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_HOURS", "24")) * 3600
+DEFAULT_MAX_ENTRIES = int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", "10000"))
+
+# Per-user fields that must not leak from the researching user's finding
+_USER_FIELDS = ('item_number', 'original_price', 'original_merchant', 'total_savings')
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case, strip punctuation and collapse whitespace."""
+    return re.sub(r'[^a-z0-9]+', ' ', (name or '').lower()).strip()
+
+
+def product_key(item: Dict[str, Any]) -> Optional[str]:
+    """
+    Canonical product identity for an item from fetch_top_items().
+
+    Returns None if the item has neither an external id nor a usable name.
+    """
+    external_id = (item.get('external_id') or '').strip()
+    if external_id:
+        return f"id:{external_id}"
+    name = normalize_name(item.get('item_name', ''))
+    if name and name != 'unknown':
+        return f"name:{name}"
+    return None
+
+
+def product_finding(finding: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip user-specific fields from a finding before caching it."""
+    return {k: v for k, v in finding.items() if k not in _USER_FIELDS}
+
+
+def apply_to_item(
+    findings: List[Dict[str, Any]],
+    item: Dict[str, Any],
+    item_number: int,
+) -> List[Dict[str, Any]]:
+    """
+    Re-price cached product findings for one user's item.
+
+    Savings are recomputed from the user's price; alternatives that no
+    longer clear MIN_SAVINGS for this user are dropped.
+    """
+    out = []
+    for cached in findings:
+        landed = cached.get('total_landed_cost')
+        if landed is None:
+            continue
+        savings = round(item['price'] - float(landed), 2)
+        if savings <= MIN_SAVINGS:
+            continue
+        finding = dict(cached)
+        finding.update({
+            'item_number': item_number,
+            'original_price': item['price'],
+            'original_merchant': item.get('merchant'),
+            'total_savings': savings,
+            'cached': True,
+        })
+        out.append(finding)
+    return out
+
+
+class ProductAlternativeCache:
+    """
+    LRU + TTL cache of product findings, optionally backed by a shared store.
+
+    Args:
+        ttl_seconds: How long researched prices are trusted
+        max_entries: In-process LRU bound
+        backend: Object with load(keys, ttl_seconds) -> {key: entry} and
+                 store({key: entry}); errors from it are treated as misses
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        backend: Optional[Any] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        return now - entry['researched_at'] < self.ttl_seconds
+
+    def _usable(self, entry: Dict[str, Any], price: float) -> bool:
+        # "No alternative" at $X says nothing about a user who paid more
+        return bool(entry['findings']) or price <= entry['reference_price']
+
+    def lookup(self, items: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Find cached research for `items`.
+
+        Returns:
+            {index into items: product findings} for cache hits only
+        """
+        now = time.time()
+        keys = {i: product_key(item) for i, item in enumerate(items)}
+
+        hits: Dict[int, List[Dict[str, Any]]] = {}
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in keys.items():
+                entry = self._entries.get(key) if key else None
+                if entry is not None and self._fresh(entry, now):
+                    self._entries.move_to_end(key)
+                    if self._usable(entry, items[i]['price']):
+                        hits[i] = entry['findings']
+                        continue
+                elif key:
+                    missing.setdefault(key, []).append(i)
+
+        if missing and self.backend is not None:
+            try:
+                loaded = self.backend.load(list(missing), self.ttl_seconds)
+            except Exception as e:
+                print(f"⚠️  Product cache backend unavailable: {str(e)}")
+                loaded = {}
+            with self._lock:
+                for key, entry in loaded.items():
+                    self._put_local(key, entry)
+                    for i in missing.get(key, []):
+                        if self._usable(entry, items[i]['price']):
+                            hits[i] = entry['findings']
+
+        self.hits += len(hits)
+        self.misses += sum(1 for key in keys.values() if key) - len(hits)
+        return hits
+
+    def store(self, item: Dict[str, Any], findings: List[Dict[str, Any]]) -> None:
+        """Cache research for one item (empty findings = no cheaper alternative)."""
+        self.store_many([(item, findings)])
+
+    def store_many(self, researched: Iterable[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> None:
+        entries: Dict[str, Dict[str, Any]] = {}
+        for item, findings in researched:
+            key = product_key(item)
+            if key:
+                entries[key] = {
+                    'findings': [product_finding(f) for f in findings],
+                    'reference_price': item['price'],
+                    'researched_at': time.time(),
+                }
+        if not entries:
+            return
+
+        with self._lock:
+            for key, entry in entries.items():
+                self._put_local(key, entry)
+
+        if self.backend is not None:
+            try:
+                self.backend.store(entries)
+            except Exception as e:
+                print(f"⚠️  Product cache backend write failed: {str(e)}")
+
+    def _put_local(self, key: str, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SnowflakeCacheBackend:
+    """
+    product_alternatives_cache table (database/snowflake/09_product_alternatives_cache.sql).
+
+    Args:
+        fetch_all / execute: db.py helpers (passed in so this module does not
+        load db.py itself)
+    """
+
+    TABLE = "SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.product_alternatives_cache"
+
+    def __init__(self, fetch_all: Callable, execute: Callable):
+        self.fetch_all = fetch_all
+        self.execute = execute
+
+    def load(self, keys: List[str], ttl_seconds: float) -> Dict[str, Dict[str, Any]]:
+        placeholders = ", ".join(["%s"] * len(keys))
+        sql = f"""
+            SELECT
+                product_key,
+                reference_price,
+                findings_json,
+                DATEDIFF('second', researched_at, CURRENT_TIMESTAMP()) AS age_seconds
+            FROM {self.TABLE}
+            WHERE product_key IN ({placeholders})
+              AND researched_at > DATEADD('second', -%s, CURRENT_TIMESTAMP())
+        """
+        rows = self.fetch_all(sql, (*keys, int(ttl_seconds)))
+
+        now = time.time()
+        entries = {}
+        for row in rows:
+            findings = row.get('FINDINGS_JSON') or []
+            if isinstance(findings, str):
+                findings = json.loads(findings)
+            entries[row['PRODUCT_KEY']] = {
+                'findings': findings,
+                'reference_price': float(row['REFERENCE_PRICE']),
+                'researched_at': now - float(row.get('AGE_SECONDS') or 0),
+            }
+        return entries
+
+    def store(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        rows = [
+            (key, entry['reference_price'], json.dumps(entry['findings']))
+            for key, entry in entries.items()
+        ]
+        values_sql = ", ".join(["(%s, %s, %s)"] * len(rows))
+        sql = f"""
+            MERGE INTO {self.TABLE} AS target
+            USING (
+                SELECT
+                    column1 AS product_key,
+                    column2 AS reference_price,
+                    PARSE_JSON(column3) AS findings_json
+                FROM VALUES {values_sql}
+            ) AS source
+            ON target.product_key = source.product_key
+            WHEN MATCHED THEN UPDATE SET
+                target.reference_price = source.reference_price,
+                target.findings_json = source.findings_json,
+                target.researched_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN INSERT (
+                product_key, reference_price, findings_json, researched_at
+            ) VALUES (
+                source.product_key, source.reference_price, source.findings_json,
+                CURRENT_TIMESTAMP()
+            )
+        """
+        self.execute(sql, tuple(value for row in rows for value in row))
+
+
+_cache = ProductAlternativeCache()
+
+
+def get_product_cache() -> ProductAlternativeCache:
+    """Process-wide cache shared by every user in a job run."""
+    return _cache
+
+
+def configure_product_cache(**kwargs: Any) -> ProductAlternativeCache:
+    """Replace the process-wide cache (e.g. to attach a shared backend)."""
+    global _cache
+    _cache = ProductAlternativeCache(**kwargs)
+    return _cache
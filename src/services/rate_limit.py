@@ -0,0 +1,134 @@
+"""
+LLM Rate Limiting - Process-wide request and token budgets
+
+Token buckets for requests per minute (RPM) and tokens per minute (TPM),
+shared by every coroutine in the process, so concurrent workers stay under
+the provider's limits instead of failing with 429s.
+
+Usage:
+    limiter = get_rate_limiter()
+    reserved = estimate_tokens(prompt) + MAX_OUTPUT_TOKENS
+    await limiter.acquire(reserved)
+    response = await runner.run(...)
+    limiter.record_usage(actual_tokens, reserved)
+
+Limits come from LLM_RPM / LLM_TPM (unset or 0 = unlimited) and can be
+changed at startup with configure_rate_limiter().
+"""
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+# Rough completion budget reserved per call until actual usage is known
+MAX_OUTPUT_TOKENS = 1500
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for English text).
+    """
+    return max(1, len(text or "") // 4)
+
+
+class _TokenBucket:
+    """Refills `per_minute` units evenly over a minute, up to `per_minute`."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # A request larger than the bucket waits for a full bucket
+        needed = min(amount, self.capacity) - self.available
+        return max(0.0, needed / self.rate)
+
+
+class AsyncRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter for asyncio code.
+
+    Args:
+        requests_per_minute: Max calls per minute (None/0 = unlimited)
+        tokens_per_minute: Max prompt + completion tokens per minute (None/0 = unlimited)
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self.requests = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.waited_seconds = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        Wait until one request and `tokens` tokens fit in the budget, then take them.
+        """
+        if self.requests is None and self.tokens is None:
+            return
+
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+                for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                    if bucket is not None:
+                        bucket.refill(now)
+                        wait = max(wait, bucket.wait_time(amount))
+
+                if wait == 0.0:
+                    if self.requests is not None:
+                        self.requests.available -= 1
+                    if self.tokens is not None:
+                        self.tokens.available -= min(tokens, self.tokens.capacity)
+                    return
+
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def record_usage(self, actual_tokens: int, reserved_tokens: int) -> None:
+        """
+        Correct the token budget once a call's real usage is known.
+
+        Under-estimates are charged (the bucket may go negative, delaying
+        later calls); over-estimates are returned.
+        """
+        if self.tokens is None:
+            return
+        self.tokens.available = min(
+            self.tokens.capacity,
+            self.tokens.available - (actual_tokens - reserved_tokens),
+        )
+
+
+def _env_limit(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+_limiter = AsyncRateLimiter(_env_limit("LLM_RPM"), _env_limit("LLM_TPM"))
+
+
+def get_rate_limiter() -> AsyncRateLimiter:
+    """Process-wide limiter shared by all LLM callers."""
+    return _limiter
+
+
+def configure_rate_limiter(
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> AsyncRateLimiter:
+    """Replace the process-wide limits (e.g. from job CLI flags)."""
+    global _limiter
+    _limiter = AsyncRateLimiter(requests_per_minute, tokens_per_minute)
+    return _limiter
@@ -12,21 +12,71 @@ Design Principles (CLAUDE.MD):
 """
 
 import asyncio
+import difflib
 import importlib.util
-import json
 import os
 import sys
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from dedalus_labs import AsyncDedalus, DedalusRunner
-
-# Dynamically load the db module from the database API directory
-db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'api', 'db.py')
-spec = importlib.util.spec_from_file_location("db", db_path)
-db = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(db)
+from typing import AsyncGenerator, List, Dict, Any, Optional, Tuple
+
+# Inside the API process, share its db module (and connection pool);
+# otherwise dynamically load the db module from the database API directory
+try:
+    from database.api import db
+except ImportError:
+    db_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'api', 'db.py')
+    spec = importlib.util.spec_from_file_location("db", db_path)
+    db = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(db)
 fetch_all = db.fetch_all
 
+# Shared LLM rate limiter (src/ on the path so this works when loaded by file path)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from services.llm_clients import get_llm_clients
+from services.llm_metrics import count_llm_calls
+from services.llm_output import parse_objects, FINDING_SCHEMA
+from services.product_cache import (
+    get_product_cache,
+    configure_product_cache,
+    apply_to_item,
+    normalize_name,
+    product_key,
+    SnowflakeCacheBackend,
+)
+
+# Share researched products across shards/workers through Snowflake
+if os.getenv('PRODUCT_CACHE_SHARED', 'false').lower() == 'true':
+    configure_product_cache(backend=SnowflakeCacheBackend(db.fetch_all, db.execute))
+
+# Model used for alternative research (MCP websearch)
+RESEARCH_MODEL = "openai/gpt-4o-mini"
+
+# How uncached items are researched:
+#   batch     one prompt with every item (fewest LLM calls)
+#   per_item  one prompt per item, ITEM_CONCURRENCY at a time, each with
+#             ITEM_TIMEOUT seconds; a slow or failed item only loses itself
+RESEARCH_MODES = ('batch', 'per_item')
+RESEARCH_MODE = os.getenv('WEEKLY_RESEARCH_MODE', 'batch')
+ITEM_CONCURRENCY = int(os.getenv('ITEM_RESEARCH_CONCURRENCY', '3'))
+ITEM_TIMEOUT = float(os.getenv('ITEM_RESEARCH_TIMEOUT', '90')) or None
+
+
+def configure_research(
+    mode: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    item_timeout: Optional[float] = None
+) -> None:
+    """Override the research mode settings (e.g. from job CLI flags)."""
+    global RESEARCH_MODE, ITEM_CONCURRENCY, ITEM_TIMEOUT
+    if mode is not None:
+        if mode not in RESEARCH_MODES:
+            raise ValueError(f"Invalid research mode: {mode}. Expected one of {RESEARCH_MODES}")
+        RESEARCH_MODE = mode
+    if concurrency is not None:
+        ITEM_CONCURRENCY = max(1, concurrency)
+    if item_timeout is not None:
+        ITEM_TIMEOUT = item_timeout or None
+
 
 def fetch_top_items(user_id: str, week_start: str, limit: int = 5) -> List[Dict[str, Any]]:
     """
@@ -55,7 +105,8 @@ def fetch_top_items(user_id: str, week_start: str, limit: int = 5) -> List[Dict[
             CATEGORY,
             SUBCATEGORY,
             TS AS PURCHASED_AT,
-            ITEM_ID
+            ITEM_ID,
+            RAW_LINE:external_id::STRING AS EXTERNAL_ID
         FROM SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.PURCHASE_ITEMS_TEST
         WHERE USER_ID = %s
           AND TS >= TO_TIMESTAMP_TZ(%s)
@@ -69,19 +120,296 @@ def fetch_top_items(user_id: str, week_start: str, limit: int = 5) -> List[Dict[
     rows = fetch_all(sql, params)
 
     # Convert to list of dicts with proper key names
-    items = []
-    for row in rows:
-        items.append({
-            'item_name': row.get('ITEM_NAME', 'Unknown'),
-            'merchant': row.get('MERCHANT', 'Unknown'),
-            'price': float(row.get('PRICE', 0.0)),
-            'category': row.get('CATEGORY'),
-            'subcategory': row.get('SUBCATEGORY'),
-            'purchased_at': row.get('PURCHASED_AT'),
-            'item_id': row.get('ITEM_ID')
-        })
+    return [_row_to_item(row) for row in rows]
+
+
+def _row_to_item(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'item_name': row.get('ITEM_NAME', 'Unknown'),
+        'merchant': row.get('MERCHANT', 'Unknown'),
+        'price': float(row.get('PRICE', 0.0)),
+        'category': row.get('CATEGORY'),
+        'subcategory': row.get('SUBCATEGORY'),
+        'purchased_at': row.get('PURCHASED_AT'),
+        'item_id': row.get('ITEM_ID'),
+        'external_id': row.get('EXTERNAL_ID')  # ASIN etc., for the product cache
+    }
+
+
+def fetch_week_top_items(
+    user_ids: List[str],
+    week_start: str,
+    limit: int = 5,
+    chunk_size: int = 500
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch the top N items of many users for a week in a few queries.
+
+    Same items as fetch_top_items() per user (ranked with QUALIFY instead of
+    one LIMIT query per user).
+
+    Returns:
+        {user_id: items, most expensive first}; users without priced items are absent
+    """
+    week_start_date = datetime.strptime(week_start, '%Y-%m-%d')
+    week_end = (week_start_date + timedelta(days=7)).strftime('%Y-%m-%d')
+
+    items_by_user: Dict[str, List[Dict[str, Any]]] = {}
+    for offset in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[offset:offset + chunk_size]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        sql = f"""
+            SELECT
+                USER_ID,
+                ITEM_NAME,
+                MERCHANT,
+                PRICE,
+                CATEGORY,
+                SUBCATEGORY,
+                TS AS PURCHASED_AT,
+                ITEM_ID,
+                RAW_LINE:external_id::STRING AS EXTERNAL_ID
+            FROM SNOWFLAKE_LEARNING_DB.BALANCEIQ_CORE.PURCHASE_ITEMS_TEST
+            WHERE USER_ID IN ({placeholders})
+              AND TS >= TO_TIMESTAMP_TZ(%s)
+              AND TS < TO_TIMESTAMP_TZ(%s)
+              AND PRICE IS NOT NULL
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY USER_ID ORDER BY PRICE DESC) <= %s
+            ORDER BY USER_ID, PRICE DESC
+        """
+        rows = fetch_all(sql, (*chunk, week_start, week_end, limit))
+        for row in rows:
+            items_by_user.setdefault(row['USER_ID'], []).append(_row_to_item(row))
+
+    return items_by_user
+
+
+def group_products(items_by_user: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Group the week's items into distinct products.
+
+    Items are the same product if they share an external_id or a normalized
+    name (so an ASIN-less purchase joins the group of the ASIN'd one).
+
+    Returns:
+        [{'item': highest-priced purchase, 'variants': {product_key: item}, 'buyers': n}]
+    """
+    groups: List[Dict[str, Any]] = []
+    group_of: Dict[str, int] = {}
+
+    for items in items_by_user.values():
+        for item in items:
+            keys = [k for k in (product_key(item), product_key(dict(item, external_id=None))) if k]
+            if not keys:
+                continue
+            index = next((group_of[k] for k in keys if k in group_of), None)
+            if index is None:
+                index = len(groups)
+                groups.append({'item': item, 'variants': {}, 'buyers': 0})
+            group = groups[index]
+            for k in keys:
+                group_of.setdefault(k, index)
+            group['variants'].setdefault(keys[0], item)
+            group['buyers'] += 1
+            # Research against the highest price so the result (even "no
+            # cheaper alternative") is reusable for every buyer
+            if item['price'] > group['item']['price']:
+                group['item'] = item
+
+    return groups
+
+
+async def research_items(
+    items: List[Dict[str, Any]],
+    site: str = 'weekly_research'
+) -> Tuple[Dict[int, List[Dict[str, Any]]], bool]:
+    """
+    Research `items` in one Dedalus call with MCP websearch.
+
+    The call is tracked in llm_metrics under `site`.
+
+    Returns:
+        ({index into items: findings}, parsed) - parsed is False when the
+        response was not a JSON array (nothing should be cached then).
+        Findings matching no item are under the key None.
+
+    Raises:
+        Exception: If the Dedalus API call fails
+    """
+    prompt = build_plan_prompt(items)
+
+    # Shared client/runner; wait for a call slot and room in the RPM/TPM budgets
+    clients = get_llm_clients()
+    runner = clients.runner()
+
+    async with clients.call(RESEARCH_MODEL, prompt, site=site) as call:
+        # Run with MCP tools enabled (websearch)
+        response = await runner.run(
+            input=prompt,
+            model=RESEARCH_MODEL
+        )
+        call.record_response(response)
+
+    # Parse AI response (findings failing FINDING_SCHEMA are dropped)
+    findings = parse_objects(getattr(response, 'final_output', None), FINDING_SCHEMA)
+    parsed = findings is not None
+
+    return match_findings_to_items(findings or [], items), parsed
+
+
+async def iter_item_research(
+    items: List[Dict[str, Any]],
+    concurrency: int = 3,
+    timeout: Optional[float] = None
+) -> AsyncGenerator[Tuple[int, List[Dict[str, Any]], Optional[str]], None]:
+    """
+    Research each item in its own Dedalus call, yielding results as they complete.
+
+    At most `concurrency` calls run at once and each gets `timeout` seconds.
+    Closing the generator early cancels the calls still running.
+
+    Yields:
+        (index into items, findings, error) in completion order; error is
+        None on success, otherwise findings is empty
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def research_one(index: int) -> Tuple[int, List[Dict[str, Any]], Optional[str]]:
+        async with semaphore:
+            try:
+                matched, parsed = await asyncio.wait_for(research_items([items[index]], site='weekly_item'), timeout=timeout)
+            except asyncio.TimeoutError:
+                return index, [], f'timed out after {timeout}s'
+            except Exception as e:
+                return index, [], str(e) or type(e).__name__
+        if not parsed:
+            return index, [], 'unparseable response'
+        return index, matched.get(0, []), None
+
+    tasks = [asyncio.ensure_future(research_one(i)) for i in range(len(items))]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def prewarm_product_cache(
+    items_by_user: Dict[str, List[Dict[str, Any]]],
+    concurrency: int = 4,
+    batch_size: int = 5,
+    timeout: Optional[float] = None
+) -> Dict[str, int]:
+    """
+    Research each distinct product of the week once, before per-user reports.
+
+    Products are grouped across users (group_products), products already in
+    the cache are skipped, and the rest are researched `batch_size` per
+    Dedalus call with at most `concurrency` calls in flight. Findings land in
+    the product cache, so generate_weekly_suggestions() re-prices them for
+    each user instead of calling Dedalus again. A failed batch is only
+    logged; its users fall back to researching their own items.
+
+    Returns:
+        Counts: users, items, distinct_products, cached, researched, llm_calls, failed_batches
+    """
+    cache = get_product_cache()
+    groups = group_products(items_by_user)
+    hits = cache.lookup([g['item'] for g in groups])
+    pending = [g for i, g in enumerate(groups) if i not in hits]
+
+    stats = {
+        'users': len(items_by_user),
+        'items': sum(len(items) for items in items_by_user.values()),
+        'distinct_products': len(groups),
+        'cached': len(hits),
+        'researched': 0,
+        'llm_calls': 0,
+        'failed_batches': 0,
+    }
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def research_batch(batch: List[Dict[str, Any]]) -> None:
+        async with semaphore:
+            try:
+                stats['llm_calls'] += 1
+                matched, parsed = await asyncio.wait_for(
+                    research_items([g['item'] for g in batch], site='weekly_prewarm'), timeout=timeout
+                )
+            except Exception as e:
+                stats['failed_batches'] += 1
+                print(f"⚠️  Product research batch failed: {str(e) or type(e).__name__}")
+                return
+
+        if not parsed:
+            stats['failed_batches'] += 1
+            return
+
+        # Store under every key buyers look the product up by, at the price
+        # researched (no negative results if some findings matched no product)
+        cache.store_many(
+            (dict(variant, price=group['item']['price']), matched.get(i, []))
+            for i, group in enumerate(batch)
+            if i in matched or None not in matched
+            for variant in group['variants'].values()
+        )
+        stats['researched'] += len(batch)
 
-    return items
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    await asyncio.gather(*(research_batch(batch) for batch in batches))
+    return stats
+
+
+# Minimum difflib ratio for a finding's product name to match a receipt line
+NAME_MATCH_RATIO = 0.6
+
+
+def _closest_item(name: str, names: List[str]) -> Optional[int]:
+    """
+    Index of the receipt line a (normalized) finding name refers to: one
+    name containing the other, else the most similar name above
+    NAME_MATCH_RATIO. The model reports the exact product name, which is
+    often longer or shorter than the receipt line.
+    """
+    if not name:
+        return None
+    contained = [i for i, candidate in enumerate(names) if candidate and (name in candidate or candidate in name)]
+    if len(contained) == 1:
+        return contained[0]
+    ratios = [(difflib.SequenceMatcher(None, name, candidate).ratio(), i) for i, candidate in enumerate(names)]
+    best_ratio, best = max(ratios, default=(0.0, None))
+    return best if best_ratio >= NAME_MATCH_RATIO else None
+
+
+def match_findings_to_items(
+    findings: List[Dict[str, Any]],
+    items: List[Dict[str, Any]]
+) -> Dict[Optional[int], List[Dict[str, Any]]]:
+    """
+    Group findings by the index of the prompt item they belong to.
+
+    Uses item_number (1-based position in the prompt), falling back to the
+    normalized item name, then to the closest item name (_closest_item).
+    Findings that match no item are kept under the key None: they still
+    belong in the report, but can't be cached under a product.
+    """
+    names = [normalize_name(item['item_name']) for item in items]
+    by_name = {name: i for i, name in enumerate(names)}
+    matched: Dict[Optional[int], List[Dict[str, Any]]] = {}
+    for finding in findings:
+        number = finding.get('item_number')
+        if isinstance(number, int) and 1 <= number <= len(items):
+            index = number - 1
+        elif len(items) == 1:
+            index = 0
+        else:
+            name = normalize_name(finding.get('item_name', ''))
+            index = by_name.get(name)
+            if index is None:
+                index = _closest_item(name, names)
+        matched.setdefault(index, []).append(finding)
+    return matched
 
 
 def build_plan_prompt(items: List[Dict[str, Any]]) -> str:
@@ -162,22 +490,29 @@ Use the websearch tool to search major retailers. Start your search now!"""
 async def generate_weekly_suggestions(
     user_id: str,
     week_start: str,
-    top_n: int = 5
+    top_n: int = 5,
+    items: Optional[List[Dict[str, Any]]] = None,
+    research_mode: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Generate weekly alternative suggestions for a user using Dedalus AI with MCP.
 
     Process:
     1. Fetch top N expensive items from the week
-    2. Build "Plan" prompt with constraints
-    3. Call Dedalus with MCP websearch tool
-    4. Parse high-value findings (>$10 savings)
-    5. Return structured report
+    2. Reuse cached research for products other users already bought
+    3. Build "Plan" prompt with constraints for the remaining items
+       (one prompt, or one per item in per_item mode)
+    4. Call Dedalus with MCP websearch tool
+    5. Parse high-value findings (>$10 savings)
+    6. Cache findings per product, merge with cached findings
+    7. Return structured report
 
     Args:
         user_id: User identifier
         week_start: ISO week start date (YYYY-MM-DD)
         top_n: Number of top items to analyze (default 5)
+        items: Top items already fetched (fetch_week_top_items); skips the query
+        research_mode: 'batch' or 'per_item' (default RESEARCH_MODE)
 
     Returns:
         Dict with user_id, week_start, findings, total_potential_savings, metadata
@@ -192,8 +527,13 @@ async def generate_weekly_suggestions(
     except ValueError:
         raise ValueError(f"Invalid week_start format: {week_start}. Expected YYYY-MM-DD")
 
+    research_mode = research_mode or RESEARCH_MODE
+    if research_mode not in RESEARCH_MODES:
+        raise ValueError(f"Invalid research mode: {research_mode}. Expected one of {RESEARCH_MODES}")
+
     # Step 1: Fetch top expensive items
-    items = fetch_top_items(user_id, week_start, limit=top_n)
+    if items is None:
+        items = fetch_top_items(user_id, week_start, limit=top_n)
 
     if not items:
         # No purchases this week - return empty report
@@ -211,77 +551,182 @@ async def generate_weekly_suggestions(
             'error': None
         }
 
-    # Step 2: Build Plan prompt
-    prompt = build_plan_prompt(items)
+    week_end = (datetime.strptime(week_start, '%Y-%m-%d') + timedelta(days=7)).strftime('%Y-%m-%d')
 
-    # Step 3: Call Dedalus with MCP websearch
-    start_time = datetime.now()
+    # Step 2: Reuse research other users already triggered for the same products
+    cache = get_product_cache()
+    cached = cache.lookup(items)
+    cached_findings = []
+    for index, product_findings in cached.items():
+        cached_findings.extend(apply_to_item(product_findings, items[index], index + 1))
 
-    try:
-        client = AsyncDedalus()
-        runner = DedalusRunner(client)
+    # Only uncached items go to Dedalus; remember their position in `items`
+    research_indexes = [i for i in range(len(items)) if i not in cached]
+    uncached_items = [items[i] for i in research_indexes]
 
-        # Run with MCP tools enabled (websearch)
-        response = await runner.run(
-            input=prompt,
-            model="openai/gpt-4o-mini"
+    if not uncached_items:
+        total_savings = sum(f.get('total_savings', 0.0) for f in cached_findings)
+        return {
+            'user_id': user_id,
+            'week_start': week_start,
+            'week_end': week_end,
+            'findings': cached_findings,
+            'total_potential_savings': round(total_savings, 2),
+            'items_analyzed': len(items),
+            'items_with_alternatives': len(cached_findings),
+            'items_from_cache': len(cached),
+            'mcp_calls_made': 0,
+            'processing_time_ms': 0,
+            'error': None
+        }
+
+    # Steps 3-5: Plan prompt, Dedalus with MCP websearch, parse findings
+    start_time = datetime.now()
+
+    if research_mode == 'per_item':
+        return await _generate_per_item(
+            user_id, week_start, week_end, items, cached, cached_findings,
+            research_indexes, start_time
         )
 
-        # Step 4: Parse AI response
-        try:
-            findings = json.loads(response.final_output)
-            if not isinstance(findings, list):
-                # Try to extract JSON array from response
-                import re
-                json_match = re.search(r'\[\s*\{.*\}\s*\]', response.final_output, re.DOTALL)
-                if json_match:
-                    findings = json.loads(json_match.group(0))
-                else:
-                    findings = []
-        except (json.JSONDecodeError, AttributeError):
-            # If parsing fails, return empty findings
-            findings = []
+    try:
+        with count_llm_calls() as counter:
+            matched, parsed = await research_items(uncached_items)
+
+        # Step 6: Cache per product (items without findings = no cheaper
+        # alternative, unless an unmatched finding may be theirs) and
+        # renumber findings to the user's item positions
+        if parsed:
+            cache.store_many(
+                (item, matched.get(i, [])) for i, item in enumerate(uncached_items)
+                if i in matched or None not in matched
+            )
+        findings = []
+        for i, item_findings in matched.items():
+            for finding in item_findings:
+                # Unmatched findings (i is None) are reported without a position
+                finding['item_number'] = research_indexes[i] + 1 if i is not None else None
+                findings.append(finding)
+
+        findings = sorted(
+            cached_findings + findings,
+            key=lambda f: f.get('item_number') if isinstance(f.get('item_number'), int) else 0
+        )
 
         # Calculate total savings
         total_savings = sum(f.get('total_savings', 0.0) for f in findings)
 
-        # Step 5: Build report
+        # Step 7: Build report
         end_time = datetime.now()
         processing_time_ms = int((end_time - start_time).total_seconds() * 1000)
 
         return {
             'user_id': user_id,
             'week_start': week_start,
-            'week_end': (datetime.strptime(week_start, '%Y-%m-%d') + timedelta(days=7)).strftime('%Y-%m-%d'),
+            'week_end': week_end,
             'findings': findings,
             'total_potential_savings': round(total_savings, 2),
             'items_analyzed': len(items),
             'items_with_alternatives': len(findings),
-            'mcp_calls_made': 1,  # One batch call with MCP websearch
+            'items_from_cache': len(cached),
+            'mcp_calls_made': counter.calls,  # Batch call(s) with MCP websearch
             'processing_time_ms': processing_time_ms,
             'error': None
         }
 
     except Exception as e:
-        # Handle Dedalus API errors gracefully
+        # Handle Dedalus API errors gracefully (the failed call still counts)
         end_time = datetime.now()
         processing_time_ms = int((end_time - start_time).total_seconds() * 1000)
-        week_end = (datetime.strptime(week_start, '%Y-%m-%d') + timedelta(days=7)).strftime('%Y-%m-%d')
+        total_savings = sum(f.get('total_savings', 0.0) for f in cached_findings)
 
+        # Cached findings are still valid when the research call fails
         return {
             'user_id': user_id,
             'week_start': week_start,
             'week_end': week_end,
-            'findings': [],
-            'total_potential_savings': 0.0,
+            'findings': cached_findings,
+            'total_potential_savings': round(total_savings, 2),
             'items_analyzed': len(items),
-            'items_with_alternatives': 0,
-            'mcp_calls_made': 0,
+            'items_with_alternatives': len(cached_findings),
+            'items_from_cache': len(cached),
+            'mcp_calls_made': counter.calls,
             'processing_time_ms': processing_time_ms,
             'error': str(e)
         }
 
 
+async def _generate_per_item(
+    user_id: str,
+    week_start: str,
+    week_end: str,
+    items: List[Dict[str, Any]],
+    cached: Dict[int, List[Dict[str, Any]]],
+    cached_findings: List[Dict[str, Any]],
+    research_indexes: List[int],
+    start_time: datetime
+) -> Dict[str, Any]:
+    """
+    per_item mode of generate_weekly_suggestions(): research uncached items
+    concurrently and keep whatever completes.
+
+    Each item is cached as soon as its call returns, so a user cancelled by
+    the job's timeout still keeps the items that finished. The report only
+    carries an error if every item failed; individual failures are listed in
+    items_failed.
+    """
+    cache = get_product_cache()
+    findings = list(cached_findings)
+    items_failed = []
+
+    with count_llm_calls() as counter:
+        async for i, item_findings, error in iter_item_research(
+            [items[index] for index in research_indexes],
+            concurrency=ITEM_CONCURRENCY,
+            timeout=ITEM_TIMEOUT
+        ):
+            item_number = research_indexes[i] + 1
+            item = items[research_indexes[i]]
+            if error is not None:
+                items_failed.append({
+                    'item_number': item_number,
+                    'item_name': item['item_name'],
+                    'error': error
+                })
+                continue
+
+            cache.store(item, item_findings)
+            for finding in item_findings:
+                finding['item_number'] = item_number
+                findings.append(finding)
+
+    findings.sort(key=lambda f: f.get('item_number') if isinstance(f.get('item_number'), int) else 0)
+    items_failed.sort(key=lambda f: f['item_number'])
+    total_savings = sum(f.get('total_savings', 0.0) for f in findings)
+
+    error = None
+    if len(items_failed) == len(research_indexes):
+        error = f"All {len(items_failed)} item searches failed: {items_failed[0]['error']}"
+
+    end_time = datetime.now()
+    processing_time_ms = int((end_time - start_time).total_seconds() * 1000)
+
+    return {
+        'user_id': user_id,
+        'week_start': week_start,
+        'week_end': week_end,
+        'findings': findings,
+        'total_potential_savings': round(total_savings, 2),
+        'items_analyzed': len(items),
+        'items_with_alternatives': len(findings),
+        'items_from_cache': len(cached),
+        'items_failed': items_failed,
+        'mcp_calls_made': counter.calls,  # One call per uncached item that was started
+        'processing_time_ms': processing_time_ms,
+        'error': error
+    }
+
+
 async def main():
     """Test the weekly suggester with mock data"""
     print("Testing Weekly Suggester...")
@@ -11,37 +11,127 @@ Design Principles (CLAUDE.MD):
 """
 
 import asyncio
-import importlib.util
-import json
 import os
 import sys
-import re
 from datetime import datetime, timedelta
-from typing import AsyncGenerator, Dict, Any, List
+import inspect
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Any, List, Optional, Union
 
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-# Dynamically load modules
-def load_module(module_name: str, file_path: str):
-    """Dynamically load a Python module"""
-    spec = importlib.util.spec_from_file_location(module_name, file_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+# Weekly suggester helpers: imported (not re-executed by file path) so every
+# loader of this module shares one copy, its db connection pool and caches
+from services import weekly_suggester as suggester
 
-# Load weekly suggester for helper functions
-suggester_path = os.path.join(os.path.dirname(__file__), 'weekly_suggester.py')
-suggester = load_module('weekly_suggester', suggester_path)
+from services.llm_clients import get_llm_clients
+from services.llm_metrics import count_llm_calls
+from services.llm_output import IncrementalArrayParser, parse_objects, FINDING_SCHEMA
 
-# Import from weekly suggester
-from dedalus_labs import AsyncDedalus, DedalusRunner
+
+def _found_event(finding: Dict[str, Any]) -> Dict[str, Any]:
+    """SSE "found" event for one finding."""
+    return {
+        "event": "found",
+        "item_name": finding.get('item_name', 'Unknown'),
+        "original_price": finding.get('original_price', 0.0),
+        "original_merchant": finding.get('original_merchant', 'Unknown'),
+        "alternative_merchant": finding.get('alternative_merchant', 'Unknown'),
+        "alternative_price": finding.get('alternative_price', 0.0),
+        "total_landed_cost": finding.get('total_landed_cost', 0.0),
+        "savings": finding.get('total_savings', 0.0),
+        "url": finding.get('url', ''),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def _chunk_text(chunk: Any) -> str:
+    """
+    Text carried by one streamed chunk: a ChatCompletionChunk from
+    DedalusRunner.run(..., stream=True) (choices[0].delta.content), its dict
+    form, or a plain string.
+    """
+    if isinstance(chunk, str):
+        return chunk
+    choices = chunk.get('choices') if isinstance(chunk, dict) else getattr(chunk, 'choices', None)
+    if not choices:
+        return ""
+    delta = choices[0].get('delta') if isinstance(choices[0], dict) else getattr(choices[0], 'delta', None)
+    content = delta.get('content') if isinstance(delta, dict) else getattr(delta, 'content', None)
+    return content or ""
+
+
+# Called with the finished report (generate_weekly_suggestions() shape);
+# returns the stored report_id, or None
+OnComplete = Callable[[Dict[str, Any]], Union[Optional[str], Awaitable[Optional[str]]]]
+
+
+def _week_end(week_start: str) -> str:
+    return (datetime.strptime(week_start, '%Y-%m-%d') + timedelta(days=7)).strftime('%Y-%m-%d')
+
+
+async def _persist(on_complete: Optional[OnComplete], report: Dict[str, Any]) -> Optional[str]:
+    """Run the on_complete hook; a failed save never breaks the stream."""
+    if on_complete is None:
+        return None
+    try:
+        result = on_complete(report)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    except Exception as e:
+        print(f"⚠️  Failed to save streamed report: {str(e)}")
+        return None
+
+
+async def replay_report_events(report: Dict[str, Any]) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Replay a stored report as the events a live run would end with.
+
+    Yields items_loaded, one found per finding and complete, all marked
+    "cached": true, so clients render a stored report exactly like a live one.
+    """
+    findings = report.get('findings') or []
+    generated_at = report.get('updated_at') or report.get('created_at')
+    if isinstance(generated_at, datetime):
+        generated_at = generated_at.isoformat()
+
+    yield {
+        "event": "items_loaded",
+        "count": report.get('items_analyzed', 0),
+        "message": f"Loaded saved report for week of {report.get('week_start')}",
+        "items": [
+            {"name": f.get('item_name', 'Unknown'), "price": f.get('original_price', 0.0)}
+            for f in findings
+        ],
+        "cached": True,
+        "timestamp": datetime.now().isoformat()
+    }
+
+    for finding in findings:
+        event = _found_event(finding)
+        event["cached"] = True
+        yield event
+
+    yield {
+        "event": "complete",
+        "message": "Analysis complete!",
+        "items_analyzed": report.get('items_analyzed', 0),
+        "items_with_alternatives": report.get('items_with_alternatives', len(findings)),
+        "total_savings": round(report.get('total_potential_savings', 0.0), 2),
+        "processing_time_seconds": 0.0,
+        "cached": True,
+        "report_id": report.get('report_id'),
+        "generated_at": generated_at,
+        "timestamp": datetime.now().isoformat()
+    }
 
 
 async def generate_weekly_suggestions_stream(
     user_id: str,
     week_start: str,
-    top_n: int = 5
+    top_n: int = 5,
+    on_complete: Optional[OnComplete] = None
 ) -> AsyncGenerator[Dict[str, Any], None]:
     """
     Stream weekly alternative suggestions with real-time progress updates.
@@ -59,6 +149,11 @@ async def generate_weekly_suggestions_stream(
         user_id: User identifier
         week_start: ISO week start date (YYYY-MM-DD)
         top_n: Number of top items to analyze (default 5)
+        on_complete: Saves the finished report (e.g. upsert_weekly_report);
+            runs before the complete event, which then carries report_id.
+            Also called with report['error'] set when the model output
+            could not be parsed; the error event carries the id it returns.
+            Not called when the AI call itself fails.
 
     Yields:
         Dict events with progress updates
@@ -96,12 +191,25 @@ async def generate_weekly_suggestions_stream(
 
         if not items:
             # Event: No purchases
+            report_id = await _persist(on_complete, {
+                'user_id': user_id,
+                'week_start': week_start,
+                'week_end': _week_end(week_start),
+                'findings': [],
+                'total_potential_savings': 0.0,
+                'items_analyzed': 0,
+                'items_with_alternatives': 0,
+                'mcp_calls_made': 0,
+                'processing_time_ms': 0,
+                'error': None
+            })
             yield {
                 "event": "complete",
                 "message": "No purchases found for this week",
                 "items_analyzed": 0,
                 "items_with_alternatives": 0,
                 "total_savings": 0.0,
+                "report_id": report_id,
                 "timestamp": datetime.now().isoformat()
             }
             return
@@ -128,86 +236,110 @@ async def generate_weekly_suggestions_stream(
             "timestamp": datetime.now().isoformat()
         }
 
-        # Step 3: Stream AI response
-        client = AsyncDedalus()
-        runner = DedalusRunner(client)
+        # Step 3: Stream AI response (shared client/runner, one call slot)
+        clients = get_llm_clients()
+        runner = clients.runner()
+        model = suggester.RESEARCH_MODEL
 
         ai_response_chunks = []
 
-        # Stream with Dedalus (if streaming is available)
-        try:
-            # Try streaming first
-            if hasattr(runner, 'run_stream'):
-                async for chunk in runner.run_stream(
-                    input=prompt,
-                    model="openai/gpt-4o-mini"
-                ):
-                    # Accumulate chunks
-                    ai_response_chunks.append(chunk)
-
-                    # Event: Progress chunk
-                    yield {
-                        "event": "progress",
-                        "chunk": chunk,
-                        "timestamp": datetime.now().isoformat()
-                    }
-
-                # Combine all chunks
-                full_response = "".join(ai_response_chunks)
-            else:
-                # Fallback: Regular run (non-streaming)
-                response = await runner.run(
-                    input=prompt,
-                    model="openai/gpt-4o-mini"
-                )
-                full_response = response.final_output
-
-        except Exception as e:
-            # Event: AI error
-            yield {
-                "event": "error",
-                "message": f"AI processing error: {str(e)}",
-                "timestamp": datetime.now().isoformat()
-            }
-            return
-
-        # Step 4: Parse findings
-        try:
-            # Try to parse as JSON
-            findings = json.loads(full_response)
-            if not isinstance(findings, list):
-                # Try to extract JSON array from response
-                json_match = re.search(r'\[\s*\{.*\}\s*\]', full_response, re.DOTALL)
-                if json_match:
-                    findings = json.loads(json_match.group(0))
-                else:
-                    findings = []
-        except (json.JSONDecodeError, AttributeError):
-            findings = []
-
-        # Event 4: Emit each finding as it's discovered
+        # Findings are emitted as soon as each JSON object closes in the stream
+        parser = IncrementalArrayParser(schema=FINDING_SCHEMA)
+        findings = []
         total_savings = 0.0
-        for finding in findings:
-            savings = finding.get('total_savings', 0.0)
-            total_savings += savings
 
-            yield {
-                "event": "found",
-                "item_name": finding.get('item_name', 'Unknown'),
-                "original_price": finding.get('original_price', 0.0),
-                "original_merchant": finding.get('original_merchant', 'Unknown'),
-                "alternative_merchant": finding.get('alternative_merchant', 'Unknown'),
-                "alternative_price": finding.get('alternative_price', 0.0),
-                "total_landed_cost": finding.get('total_landed_cost', 0.0),
-                "savings": savings,
-                "url": finding.get('url', ''),
-                "timestamp": datetime.now().isoformat()
-            }
+        # Stream with Dedalus: with an AsyncDedalus client, run(stream=True)
+        # returns an async iterator of ChatCompletionChunk objects
+        with count_llm_calls() as counter:
+            try:
+                async with clients.call(model, prompt, site='weekly_stream') as call:
+                    result = runner.run(input=prompt, model=model, stream=True)
+                    if not inspect.isawaitable(result):
+                        async for raw_chunk in result:
+                            chunk = _chunk_text(raw_chunk)
+                            if not chunk:
+                                continue  # role / finish_reason chunks
+
+                            # Accumulate chunks (the first one is the time to first token)
+                            call.record.first_token()
+                            ai_response_chunks.append(chunk)
+
+                            # Event: Progress chunk
+                            yield {
+                                "event": "progress",
+                                "chunk": chunk,
+                                "timestamp": datetime.now().isoformat()
+                            }
+
+                            # Event 4: Emit each finding as it's discovered
+                            for finding in parser.feed(chunk):
+                                findings.append(finding)
+                                total_savings += finding.get('total_savings', 0.0)
+                                yield _found_event(finding)
+
+                        # Combine all chunks
+                        full_response = "".join(ai_response_chunks)
+                        call.record_response(full_response)
+                    else:
+                        # Fallback: runner without streaming (one final response)
+                        response = await result
+                        full_response = response.final_output
+                        call.record_response(response)
+
+                        for finding in parser.feed(full_response):
+                            findings.append(finding)
+                            total_savings += finding.get('total_savings', 0.0)
+                            yield _found_event(finding)
+
+            except Exception as e:
+                # Event: AI error
+                yield {
+                    "event": "error",
+                    "message": f"AI processing error: {str(e)}",
+                    "timestamp": datetime.now().isoformat()
+                }
+                return
+
+        # Step 4: Nothing recognized incrementally - parse the whole response.
+        # No JSON array at all is a failed run, not "no alternatives": the
+        # report goes to on_complete with its error, which must not let it
+        # replace a good report (see weekly_analysis_events in main.py).
+        error = None
+        if not findings:
+            parsed = parse_objects(full_response, FINDING_SCHEMA)
+            if parsed is None:
+                error = "AI response could not be parsed"
+            for finding in parsed or []:
+                findings.append(finding)
+                total_savings += finding.get('total_savings', 0.0)
+                yield _found_event(finding)
 
         # Step 5: Complete
         end_time = datetime.now()
         processing_time = (end_time - start_time).total_seconds()
 
+        report_id = await _persist(on_complete, {
+            'user_id': user_id,
+            'week_start': week_start,
+            'week_end': _week_end(week_start),
+            'findings': findings,
+            'total_potential_savings': round(total_savings, 2),
+            'items_analyzed': len(items),
+            'items_with_alternatives': len(findings),
+            'mcp_calls_made': counter.calls,
+            'processing_time_ms': int(processing_time * 1000),
+            'error': error
+        })
+
+        if error is not None:
+            yield {
+                "event": "error",
+                "message": f"AI processing error: {error}",
+                "report_id": report_id,
+                "timestamp": datetime.now().isoformat()
+            }
+            return
+
         yield {
             "event": "complete",
             "message": "Analysis complete!",
@@ -215,6 +347,7 @@ async def generate_weekly_suggestions_stream(
             "items_with_alternatives": len(findings),
             "total_savings": round(total_savings, 2),
             "processing_time_seconds": round(processing_time, 2),
+            "report_id": report_id,
             "timestamp": datetime.now().isoformat()
         }
 
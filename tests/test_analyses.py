@@ -0,0 +1,133 @@
+"""
+Tests for single-flight weekly analyses (database/api/analyses.py)
+
+Tests that concurrent subscribers for the same (user, week) share one run,
+get a replay of earlier events, and that one subscriber leaving does not
+stop the run for the others.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import os
+import sys
+
+# Add repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database.api.analyses import AnalysisRegistry
+
+
+def make_source(runs, gate):
+    """Fake streaming suggester: 'start', waits for `gate`, then 'found' and 'complete'."""
+    def source():
+        async def events():
+            runs.append(1)
+            yield {'event': 'start'}
+            await gate.wait()
+            yield {'event': 'found', 'savings': 13.0}
+            yield {'event': 'complete'}
+        return events()
+    return source
+
+
+async def collect(registry, key, source, last_event_id=-1, limit=None):
+    out = []
+    async for event_id, event in registry.subscribe(key, source, last_event_id):
+        out.append((event_id, event['event']))
+        if limit and len(out) == limit:
+            break
+    return out
+
+
+# Test 1: Late subscriber joins the running analysis with a replay
+def test_subscribers_share_one_run():
+    """
+    Verify a second subscriber gets the replayed 'start' plus live events,
+    and only one analysis runs.
+
+    Expected: 1 run; both subscribers see events 0..2 in order.
+    """
+    async def run():
+        registry = AnalysisRegistry()
+        runs, gate = [], asyncio.Event()
+        source = make_source(runs, gate)
+
+        first = asyncio.create_task(collect(registry, ('u1', '2024-01-22'), source))
+        await asyncio.sleep(0.01)  # 'start' emitted, run waiting on gate
+        second = asyncio.create_task(collect(registry, ('u1', '2024-01-22'), source))
+        await asyncio.sleep(0.01)
+        gate.set()
+        return runs, registry, await first, await second
+
+    runs, registry, first, second = asyncio.run(run())
+
+    expected = [(0, 'start'), (1, 'found'), (2, 'complete')]
+    assert len(runs) == 1, "Second subscriber must not start another analysis"
+    assert first == expected and second == expected
+    assert registry.attached == 1
+    assert registry.get(('u1', '2024-01-22')) is None, "Finished runs are dropped"
+
+
+# Test 2: Disconnects don't cancel the run; resume by event id
+def test_disconnect_and_resume():
+    """
+    Verify a subscriber leaving after the first event does not stop the run,
+    and a reconnect after event 0 only gets the rest.
+    """
+    async def run():
+        registry = AnalysisRegistry()
+        runs, gate = [], asyncio.Event()
+        source = make_source(runs, gate)
+        key = ('u1', '2024-01-22')
+
+        dropped = await collect(registry, key, source, limit=1)
+        resumed = asyncio.create_task(collect(registry, key, source, last_event_id=0))
+        await asyncio.sleep(0.01)
+        gate.set()
+        return runs, dropped, await resumed
+
+    runs, dropped, resumed = asyncio.run(run())
+
+    assert dropped == [(0, 'start')]
+    assert resumed == [(1, 'found'), (2, 'complete')]
+    assert len(runs) == 1
+
+
+# Test 3: A failing run ends every subscriber with an error event
+def test_source_error_becomes_event():
+    """
+    Verify exceptions from the analysis are delivered as an 'error' event.
+    """
+    def source():
+        async def events():
+            yield {'event': 'start'}
+            raise RuntimeError('Snowflake unavailable')
+        return events()
+
+    async def run():
+        registry = AnalysisRegistry()
+        return [e async for _, e in registry.subscribe('k', source)]
+
+    events = asyncio.run(run())
+    assert [e['event'] for e in events] == ['start', 'error']
+    assert 'Snowflake unavailable' in events[1]['message']
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Single-Flight Analysis Tests...")
+
+    print("\n1. Testing shared runs...")
+    test_subscribers_share_one_run()
+    print("   ✅ One run serves concurrent subscribers")
+
+    print("\n2. Testing disconnect/resume...")
+    test_disconnect_and_resume()
+    print("   ✅ Run survives disconnects, resume by event id")
+
+    print("\n3. Testing errors...")
+    test_source_error_becomes_event()
+    print("   ✅ Errors delivered as events")
+
+    print("\n✅ All single-flight analysis tests passed!")
@@ -0,0 +1,196 @@
+"""
+Tests for the offline LLM stand-in (scripts/fake_llm_server.py) and the
+load driver (scripts/llm_load_test.py)
+
+Tests that the real Dedalus SDK and runner work against the fake server
+(plain and streamed completions), that canned findings flow through weekly
+research and the streamed weekly analysis, that injected errors surface,
+and the driver's summary maths.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import importlib.util
+import os
+import sys
+from unittest.mock import patch
+
+import httpx
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dedalus_labs import AsyncDedalus, DedalusRunner
+
+from services import weekly_suggester
+from services.llm_clients import LLMClients
+
+
+def load_script(name):
+    path = os.path.join(os.path.dirname(__file__), '..', 'scripts', f'{name}.py')
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+fake_server = load_script('fake_llm_server')
+load_test = load_script('llm_load_test')
+
+ITEMS = load_test.synthetic_items('user_0001', count=5, catalog_size=50)
+
+
+def sdk_client(fake):
+    """AsyncDedalus talking to the fake server in-process (no sockets)."""
+    transport = httpx.ASGITransport(app=fake_server.create_app(fake))
+    return AsyncDedalus(api_key='fake-key', base_url='http://fake-llm', max_retries=0,
+                        http_client=httpx.AsyncClient(transport=transport))
+
+
+# Test 1: Latency specs and canned findings
+def test_latency_and_canned_findings():
+    """
+    Verify latency specs sample in range, bad specs fail, and weekly prompts
+    get schema-valid findings for a deterministic subset of the items.
+    """
+    assert fake_server.LatencyModel('fixed:0.5').sample() == 0.5
+    uniform = fake_server.LatencyModel('uniform:1,2', seed=1)
+    assert all(1 <= uniform.sample() <= 2 for _ in range(100))
+    assert fake_server.LatencyModel('lognormal:2,0.5', seed=1).sample() > 0
+    for spec in ('gaussian:1', 'uniform:1', 'fixed:x'):
+        try:
+            fake_server.LatencyModel(spec)
+            assert False, f"{spec} should be rejected"
+        except ValueError:
+            pass
+
+    fake = fake_server.FakeLLM(find_rate=1.0)
+    findings = fake.weekly_findings(weekly_suggester.build_plan_prompt(ITEMS))
+    assert [f['item_name'] for f in findings] == [item['item_name'] for item in ITEMS]
+    assert all(f['total_savings'] > 10 for f in findings)
+    assert fake_server.FakeLLM(find_rate=0.0).weekly_findings(weekly_suggester.build_plan_prompt(ITEMS)) == []
+
+
+# Test 2: Real SDK + runner against the fake server
+def test_research_through_sdk():
+    """
+    Verify research_items() gets matched findings through AsyncDedalus and
+    DedalusRunner, and a streamed completion reassembles to the same reply.
+    """
+    fake = fake_server.FakeLLM(find_rate=1.0, chunk_size=7, chunk_interval=0)
+
+    async def run():
+        client = sdk_client(fake)
+        clients = LLMClients(runner=DedalusRunner(client))
+        with patch.object(weekly_suggester, 'get_llm_clients', return_value=clients):
+            matched, parsed = await weekly_suggester.research_items(ITEMS)
+
+        stream = await client.chat.completions.create(
+            model='openai/gpt-4o-mini', stream=True,
+            messages=[{'role': 'user', 'content': 'How am I doing?'}])
+        pieces = [chunk.choices[0].delta.content async for chunk in stream
+                  if chunk.choices and chunk.choices[0].delta.content]
+        return matched, parsed, pieces
+
+    matched, parsed, pieces = asyncio.run(run())
+
+    assert parsed
+    assert sorted(matched) == list(range(len(ITEMS)))
+    assert ''.join(pieces) == fake.reply('How am I doing?') and len(pieces) > 1
+    assert fake.stats()['requests'] == 2 and fake.stats()['streamed'] == 1
+
+
+# Test 3: Injected errors reach the caller
+def test_error_injection():
+    """
+    Verify error_rate=1 fails every call with the configured status.
+    """
+    fake = fake_server.FakeLLM(error_rate=1.0, error_statuses=[503])
+
+    async def run():
+        client = sdk_client(fake)
+        try:
+            await client.chat.completions.create(
+                model='openai/gpt-4o-mini', messages=[{'role': 'user', 'content': 'hi'}])
+        except Exception as e:
+            return e
+
+    error = asyncio.run(run())
+    assert getattr(error, 'status_code', None) == 503
+    assert fake.errors == 1
+
+
+# Test 4: Driver summary
+def test_load_summary():
+    """
+    Verify nearest-rank percentiles, throughput and error grouping.
+    """
+    runs = []
+    for i in range(10):
+        run = load_test._new_run(f'u{i}')
+        run.update(ok=i != 9, total_s=float(i + 1), error='timeout' if i == 9 else None)
+        runs.append(run)
+
+    summary = load_test.summarize(runs, wall_seconds=5.0)
+
+    assert summary['ok'] == 9 and summary['errors'] == 1
+    assert summary['throughput_per_s'] == 2.0
+    assert summary['total_s'] == {'p50': 5.0, 'p90': 9.0, 'p99': 10.0, 'max': 10.0}
+    assert summary['first_found_s']['p50'] is None
+    assert summary['error_messages'] == {'timeout': 1}
+
+
+# Test 5: The stream endpoint streams through the real runner
+def test_weekly_stream_through_sdk():
+    """
+    Verify generate_weekly_suggestions_stream drives DedalusRunner with
+    stream=True, so "found" events arrive before the response ends.
+    """
+    from services import weekly_suggester_stream
+
+    fake = fake_server.FakeLLM(find_rate=1.0, chunk_size=16, chunk_interval=0)
+
+    async def collect():
+        clients = LLMClients(runner=DedalusRunner(sdk_client(fake)))
+        with patch.object(weekly_suggester_stream.suggester, 'fetch_top_items', return_value=ITEMS), \
+             patch.object(weekly_suggester_stream, 'get_llm_clients', return_value=clients):
+            return [e async for e in weekly_suggester_stream.generate_weekly_suggestions_stream(
+                'user_0001', '2024-01-22')]
+
+    events = asyncio.run(collect())
+    kinds = [e['event'] for e in events]
+
+    found = [i for i, kind in enumerate(kinds) if kind == 'found']
+    last_progress = max(i for i, kind in enumerate(kinds) if kind == 'progress')
+    assert fake.stats()['streamed'] == 1
+    assert len(found) == len(ITEMS)
+    assert found[0] < last_progress, "First finding should arrive mid-stream"
+    assert kinds[-1] == 'complete'
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Fake LLM Server Tests...")
+
+    print("\n1. Testing latency and canned findings...")
+    test_latency_and_canned_findings()
+    print("   ✅ Latency specs and canned findings")
+
+    print("\n2. Testing SDK round trip...")
+    test_research_through_sdk()
+    print("   ✅ Dedalus SDK and runner work offline")
+
+    print("\n3. Testing error injection...")
+    test_error_injection()
+    print("   ✅ Injected errors surface")
+
+    print("\n4. Testing load summary...")
+    test_load_summary()
+    print("   ✅ Percentiles and throughput")
+
+    print("\n5. Testing streamed weekly analysis...")
+    test_weekly_stream_through_sdk()
+    print("   ✅ Findings stream through DedalusRunner")
+
+    print("\n✅ All fake LLM server tests passed!")
@@ -0,0 +1,142 @@
+"""
+Tests for the precomputed insights result store (database/api/insights.py)
+
+Tests that fresh entries are served from one key lookup, stale entries are
+recomputed, and new purchases invalidate stored insights.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+# Add repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database.api import insights
+from database.api.insights import (
+    get_user_insights,
+    invalidate_user_insights,
+    invalidation_statement,
+)
+
+
+# Test 1: Fresh entry is one key lookup
+def test_fresh_entry_served_from_store():
+    """
+    Verify a fresh stored entry is returned without recomputing.
+
+    Expected: one fetch_all call, no execute, cached=True.
+    """
+    stored = {'user_id': 'u1', 'overspending': [{'CATEGORY': 'Coffee'}]}
+    row = {'INSIGHTS_JSON': json.dumps(stored), 'IS_FRESH': True, 'EXPIRES_AT': 'later'}
+
+    with patch('database.api.insights.fetch_all', return_value=[row]) as mock_fetch, \
+         patch('database.api.insights.execute') as mock_exec:
+        result = get_user_insights('u1')
+
+    assert mock_fetch.call_count == 1, "Fresh read should be a single lookup"
+    assert mock_fetch.call_args[0][1] == ('u1',), "User id should be a bound parameter"
+    assert mock_exec.call_count == 0
+    assert result['cached'] is True
+    assert result['overspending'] == [{'CATEGORY': 'Coffee'}]
+
+
+# Test 2: Stale entry is recomputed and stored
+def test_stale_entry_recomputed():
+    """
+    Verify an expired entry triggers the insight queries and a MERGE.
+    """
+    stale = [{'INSIGHTS_JSON': '{}', 'IS_FRESH': False, 'EXPIRES_AT': 'earlier'}]
+
+    with patch('database.api.insights.fetch_all', side_effect=[stale, [], [], []]) as mock_fetch, \
+         patch('database.api.insights.execute') as mock_exec:
+        result = get_user_insights('u1')
+
+    assert mock_fetch.call_count == 4, "Lookup + overspending + trends + cancellations"
+    assert mock_exec.call_count == 1
+    assert 'MERGE INTO' in mock_exec.call_args[0][0]
+    assert result['cached'] is False
+    assert set(result) >= {'overspending', 'category_trends', 'cancellation_candidates'}
+
+
+# Test 3: Invalidation is parameterized
+def test_invalidation_parameterized():
+    """
+    Verify invalidation binds user ids and skips empty input.
+    """
+    sql, params = invalidation_statement(["u1'; DROP TABLE x; --", 'u2', 'u2'])
+    assert 'DROP TABLE' not in sql, "User input should NOT be in SQL string"
+    assert sql.count('%s') == len(params) == 2
+
+    assert invalidation_statement([]) is None
+    with patch('database.api.insights.execute') as mock_exec:
+        assert invalidate_user_insights([]) == 0
+    assert mock_exec.call_count == 0
+
+
+# Test 4: Insight queries reference only rollup columns
+def test_insight_queries_use_summary_columns():
+    """
+    Verify the insight SQL does not reference columns missing from
+    category_spending_summary (purchase_id, merchant).
+    """
+    from database.api import prediction_queries as PQ
+
+    for sql in (PQ.SQL_FIND_OVERSPENDING, PQ.SQL_CATEGORY_TRENDS,
+                PQ.SQL_CANCELLATION_CANDIDATES):
+        assert 'purchase_id' not in sql
+        assert 'merchant' not in sql.lower()
+    assert insights.T_INSIGHTS.endswith('.user_insights')
+
+
+# Test 5: A failed invalidation does not fail the committed write
+def test_transaction_write_survives_invalidation_error():
+    """
+    Verify POST /transactions returns 200 when invalidating insights fails
+    after the MERGE committed.
+    """
+    from fastapi.testclient import TestClient
+    from database.api import main as api
+
+    txn = {'id': 't1', 'user_id': 'u1', 'transaction_id': 'x1', 'merchant': 'Starbucks',
+           'amount_cents': 550, 'currency': 'USD', 'category': 'Coffee', 'need_or_want': 'want',
+           'occurred_at': '2024-01-24T08:00:00Z'}
+
+    with patch('database.api.main.execute') as mock_exec, \
+         patch('database.api.main.invalidate_user_insights', side_effect=RuntimeError('warehouse down')), \
+         patch('database.api.main.load_user_history', return_value=0):
+        response = TestClient(api.app).post('/transactions', json=txn)
+
+    assert response.status_code == 200
+    assert response.json()['status'] == 'ok'
+    assert mock_exec.call_count == 1
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Insights Tests...")
+
+    print("\n1. Testing fresh read...")
+    test_fresh_entry_served_from_store()
+    print("   ✅ Fresh entry is one key lookup")
+
+    print("\n2. Testing stale read...")
+    test_stale_entry_recomputed()
+    print("   ✅ Stale entry recomputed and stored")
+
+    print("\n3. Testing invalidation...")
+    test_invalidation_parameterized()
+    print("   ✅ Invalidation parameterized")
+
+    print("\n4. Testing insight SQL...")
+    test_insight_queries_use_summary_columns()
+    print("   ✅ Insight SQL matches rollup columns")
+
+    print("\n5. Testing write with failed invalidation...")
+    test_transaction_write_survives_invalidation_error()
+    print("   ✅ Committed write still returns ok")
+
+    print("\n✅ All insights tests passed!")
@@ -0,0 +1,218 @@
+"""
+Tests for the background weekly analysis job queue (database/api/jobs.py)
+
+Tests that jobs persist with their event log, run on a bounded worker pool,
+can be resumed from the last event id, and are exposed through the API.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+
+from database.api import main as api
+from database.api.jobs import JobQueue, JobStore
+
+
+def fake_source(gate=None, running=None):
+    """Analysis events for a job; waits on `gate` after 'start' if given."""
+    async def source(user_id, week_start, refresh):
+        if running is not None:
+            running['now'] += 1
+            running['max'] = max(running['max'], running['now'])
+        try:
+            yield {'event': 'start', 'user_id': user_id}
+            if gate is not None:
+                await gate.wait()
+            yield {'event': 'found', 'savings': 13.0}
+            yield {'event': 'complete', 'total_savings': 13.0, 'report_id': f'r-{user_id}'}
+        finally:
+            if running is not None:
+                running['now'] -= 1
+    return source
+
+
+# Test 1: Jobs and events survive a new store (process restart)
+def test_store_persists_jobs_and_events():
+    """
+    Verify job rows and the event log are read back from the SQLite file.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.sqlite3')
+        store = JobStore(path)
+        job = store.create('u1', '2024-01-22')
+        assert store.append_event(job['job_id'], {'event': 'start'}) == 0
+        assert store.append_event(job['job_id'], {'event': 'found'}) == 1
+        store.update(job['job_id'], status='running')
+
+        reopened = JobStore(path)
+        assert reopened.get(job['job_id'])['status'] == 'running'
+        assert reopened.events_after(job['job_id'], 0) == [(1, {'event': 'found'})]
+        assert [j['job_id'] for j in reopened.unfinished()] == [job['job_id']]
+
+
+# Test 2: Bounded workers, dedupe per (user, week), resume after an event id
+def test_queue_runs_jobs_with_bounded_workers():
+    """
+    Verify one worker runs jobs one at a time, duplicate submits share a job,
+    and a subscriber resuming after event 0 gets the rest live.
+    """
+    async def run(path):
+        gate, running = asyncio.Event(), {'now': 0, 'max': 0}
+        queue = JobQueue(JobStore(path), fake_source(gate, running), workers=1)
+
+        first = await queue.submit('u1', '2024-01-22')
+        assert (await queue.submit('u1', '2024-01-22'))['job_id'] == first['job_id']
+        second = await queue.submit('u2', '2024-01-22')
+
+        resumed = asyncio.create_task(_collect(queue, first['job_id'], 0))
+        await asyncio.sleep(0.05)
+        assert queue.store.get(second['job_id'])['status'] == 'queued', "Only one worker"
+        gate.set()
+
+        events = await resumed
+        await asyncio.wait_for(queue._queue.join(), 1)
+        await queue.stop()
+        return running, events, queue.store.get(first['job_id']), queue.store.get(second['job_id'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        running, events, first, second = asyncio.run(run(os.path.join(tmp, 'jobs.sqlite3')))
+
+    assert running['max'] == 1
+    assert events == [(1, 'found'), (2, 'complete')]
+    assert first['status'] == 'done' and first['report_id'] == 'r-u1'
+    assert second['status'] == 'done'
+
+
+async def _collect(queue, job_id, last_event_id=-1):
+    return [(i, e['event']) async for i, e in queue.events(job_id, last_event_id)]
+
+
+# Test 3: Unfinished jobs are re-queued when a new queue starts
+def test_unfinished_jobs_requeued():
+    """
+    Verify a job left 'running' by a dead process completes after restart.
+    """
+    async def run(path):
+        store = JobStore(path)
+        job = store.create('u1', '2024-01-22')
+        store.update(job['job_id'], status='running')
+
+        queue = JobQueue(JobStore(path), fake_source(), workers=2)
+        queue.start()
+        events = await asyncio.wait_for(_collect(queue, job['job_id']), 1)
+        await queue.stop()
+        return events, queue.store.get(job['job_id'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        events, job = asyncio.run(run(os.path.join(tmp, 'jobs.sqlite3')))
+
+    assert [e for _, e in events] == ['start', 'found', 'complete']
+    assert job['status'] == 'done'
+
+
+# Test 4: POST a job, poll it, re-subscribe with Last-Event-ID
+def test_job_endpoints():
+    """
+    Verify the API returns a job id, polling reaches 'done', and the SSE
+    stream resumes after the Last-Event-ID header with id: lines.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(JobStore(os.path.join(tmp, 'jobs.sqlite3')), fake_source())
+        with patch('database.api.main.get_job_queue', return_value=queue), \
+             TestClient(api.app) as client:
+            created = client.post('/api/user/u1/weekly_alternatives/jobs?week=2024-01-22')
+            assert created.status_code == 202
+            job_id = created.json()['job_id']
+
+            for _ in range(50):
+                job = client.get(f'/api/jobs/{job_id}').json()
+                if job['status'] == 'done':
+                    break
+                time.sleep(0.02)
+            assert job['status'] == 'done'
+            assert job['result']['event'] == 'complete'
+
+            stream = client.get(f'/api/jobs/{job_id}/stream', headers={'Last-Event-ID': '0'})
+            assert client.get('/api/jobs/missing').status_code == 404
+            assert client.post('/api/user/u1/weekly_alternatives/jobs?week=bad').status_code == 400
+
+    messages = [m for m in stream.text.split('\n\n') if m]
+    assert [m.split('\n')[0] for m in messages] == ['id: 1', 'id: 2']
+    assert json.loads(messages[-1].split('data: ')[1])['report_id'] == 'r-u1'
+
+
+# Test 5: A re-run after restart replaces its events; refresh is not deduped away
+def test_restarted_job_and_refresh_submit():
+    """
+    Verify a job re-run after a restart does not serve its old events again
+    (ids keep increasing), last_event returns the final event, and
+    refresh=True does not reuse an active plain job.
+    """
+    async def run(path):
+        store = JobStore(path)
+        job = store.create('u1', '2024-01-22')
+        store.append_event(job['job_id'], {'event': 'start'})
+        store.append_event(job['job_id'], {'event': 'found'})
+        store.update(job['job_id'], status='running')
+
+        queue = JobQueue(JobStore(path), fake_source(), workers=1)
+        queue.start()
+        events = await asyncio.wait_for(_collect(queue, job['job_id']), 1)
+        resumed = await asyncio.wait_for(_collect(queue, job['job_id'], 1), 1)
+
+        gate = asyncio.Event()
+        queue.source = fake_source(gate)
+        plain = await queue.submit('u2', '2024-01-22')
+        refreshed = await queue.submit('u2', '2024-01-22', refresh=True)
+        again = await queue.submit('u2', '2024-01-22', refresh=True)
+        gate.set()
+        await asyncio.wait_for(queue._queue.join(), 1)
+        await queue.stop()
+        return events, resumed, queue.store.last_event(job['job_id']), plain, refreshed, again
+
+    with tempfile.TemporaryDirectory() as tmp:
+        events, resumed, last, plain, refreshed, again = asyncio.run(run(os.path.join(tmp, 'jobs.sqlite3')))
+
+    assert events == [(2, 'restarted'), (3, 'start'), (4, 'found'), (5, 'complete')]
+    assert resumed == events, "A client resuming after the old events sees the re-run once"
+    assert last[0] == 5 and last[1]['event'] == 'complete'
+    assert refreshed['job_id'] != plain['job_id'] and refreshed['refresh']
+    assert again['job_id'] == refreshed['job_id']
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Analysis Job Queue Tests...")
+
+    print("\n1. Testing persistence...")
+    test_store_persists_jobs_and_events()
+    print("   ✅ Jobs and events persisted")
+
+    print("\n2. Testing worker pool...")
+    test_queue_runs_jobs_with_bounded_workers()
+    print("   ✅ Bounded workers, deduped submits, resumable events")
+
+    print("\n3. Testing restart recovery...")
+    test_unfinished_jobs_requeued()
+    print("   ✅ Unfinished jobs re-queued")
+
+    print("\n4. Testing endpoints...")
+    test_job_endpoints()
+    print("   ✅ POST / poll / resumable SSE")
+
+    print("\n5. Testing restart and refresh...")
+    test_restarted_job_and_refresh_submit()
+    print("   ✅ Re-runs don't duplicate events, refresh not deduped away")
+
+    print("\n✅ All job queue tests passed!")
@@ -0,0 +1,162 @@
+"""
+Tests for startup warm-up, readiness and the Snowflake connection pool
+
+Tests that pooled connections are reused (and broken ones discarded), that
+the app warms up in its lifespan and reports it through /ready, and that the
+streaming suggester module is only loaded once per process.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import Mock, patch
+
+# Add repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+
+from database.api import db
+from database.api import main as api
+from database.api.jobs import JobQueue, JobStore
+
+
+def fake_connection():
+    conn = Mock()
+    conn.is_closed.return_value = False
+    return conn
+
+
+def reset_warmup():
+    api.warmup_state.update(started_at=None, finished_at=None,
+                            steps={name: {'status': 'pending'} for name in api.WARMUP_STEPS})
+
+
+def wait_ready(client):
+    for _ in range(100):
+        response = client.get('/ready')
+        if api.warmup_state['finished_at']:
+            return response
+        time.sleep(0.02)
+    return response
+
+
+# Test 1: Connections are reused, broken ones discarded
+def test_pool_reuses_connections():
+    """
+    Verify get_conn() hands back the same connection, and a connection that
+    raised during use, was closed by the server or sat idle too long is not
+    reused.
+    """
+    pool = db.ConnectionPool(size=2)
+    with patch.object(db, 'pool', pool), \
+         patch.object(db.sfc, 'connect', side_effect=lambda **kw: fake_connection()):
+        assert db.init_pool(warm=1) == 1
+        with db.get_conn() as first:
+            pass
+        with db.get_conn() as second:
+            pass
+        assert first is second and pool.opened == 1
+
+        try:
+            with db.get_conn() as broken:
+                raise RuntimeError('statement failed')
+        except RuntimeError:
+            pass
+        broken.close.assert_called_once()
+
+        with db.get_conn() as conn:
+            pass
+        conn.is_closed.return_value = True
+        with db.get_conn() as fresh:
+            pass
+        assert fresh is not conn
+        assert pool.opened == 3
+
+        db.close_pool()
+        assert pool.stats()['idle'] == 0
+
+    # A connection idle past max_idle may have an expired session: not reused
+    pool = db.ConnectionPool(size=2, max_idle=60)
+    with patch.object(db, 'pool', pool), \
+         patch.object(db.sfc, 'connect', side_effect=lambda **kw: fake_connection()), \
+         patch.object(db.time, 'monotonic', return_value=1000.0) as clock:
+        with db.get_conn() as idle:
+            pass
+        clock.return_value = 1061.0
+        with db.get_conn() as fresh:
+            pass
+        assert fresh is not idle and pool.stats()['expired'] == 1
+        idle.close.assert_called_once()
+
+
+# Test 2: Lifespan warms everything up and /ready flips to 200
+def test_ready_after_warmup():
+    """
+    Verify /ready is 503 before warm-up, 200 after, with every step "ok"
+    and the job workers started.
+    """
+    reset_warmup()
+    assert TestClient(api.app).get('/ready').status_code == 503
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(JobStore(os.path.join(tmp, 'jobs.sqlite3')), Mock())
+        with patch('database.api.main._warm_db', return_value={'idle': 2}), \
+             patch('database.api.main.warm_report_cache', return_value=7) as mock_warm, \
+             patch('database.api.main.get_job_queue', return_value=queue), \
+             TestClient(api.app) as client:
+            response = wait_ready(client)
+            started = queue.started
+
+    body = response.json()
+    assert response.status_code == 200 and body['ready']
+    assert {name: step['status'] for name, step in body['steps'].items()} == {
+        name: 'ok' for name in api.WARMUP_STEPS}
+    assert body['steps']['report_cache']['detail'] == {'reports': 7}
+    assert mock_warm.call_args[0] == (api._last_week_start(),)
+    assert started, "Job workers start during warm-up"
+    assert api._load_stream_module() is api._load_stream_module()
+
+
+# Test 3: A failed database step keeps the app not ready
+def test_not_ready_when_db_fails():
+    """
+    Verify a Snowflake failure leaves /ready at 503 with the error and skips
+    the report cache warm-up.
+    """
+    reset_warmup()
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(JobStore(os.path.join(tmp, 'jobs.sqlite3')), Mock())
+        with patch('database.api.main._warm_db', side_effect=RuntimeError('login failed')), \
+             patch('database.api.main.get_job_queue', return_value=queue), \
+             TestClient(api.app) as client:
+            response = wait_ready(client)
+
+    body = response.json()
+    assert response.status_code == 503 and not body['ready']
+    assert body['steps']['db_pool'] == {'status': 'failed', 'error': 'login failed',
+                                        'ms': body['steps']['db_pool']['ms']}
+    assert body['steps']['report_cache']['status'] == 'skipped'
+    reset_warmup()
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Startup Warm-up Tests...")
+
+    print("\n1. Testing connection pool...")
+    test_pool_reuses_connections()
+    print("   ✅ Connections reused, broken ones discarded")
+
+    print("\n2. Testing readiness after warm-up...")
+    test_ready_after_warmup()
+    print("   ✅ /ready flips to 200 once warm")
+
+    print("\n3. Testing failed warm-up...")
+    test_not_ready_when_db_fails()
+    print("   ✅ Failed database keeps the app not ready")
+
+    print("\n✅ All startup warm-up tests passed!")
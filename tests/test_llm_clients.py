@@ -0,0 +1,150 @@
+"""
+Tests for the shared Dedalus client provider (src/services/llm_clients.py)
+
+Tests that one client/runner is reused per event loop, that in-flight calls
+are capped, and that per-model rate limits apply only to their model.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import Mock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services import llm_clients
+from services.llm_clients import LLMClients, parse_model_limits
+
+
+# Test 1: LLM_MODEL_LIMITS parsing
+def test_parse_model_limits():
+    """
+    Verify "model=rpm:tpm" entries, empty/zero values and malformed input.
+    """
+    assert parse_model_limits('openai/gpt-4o-mini=500:200000, openai/gpt-5-mini=100:') == {
+        'openai/gpt-4o-mini': (500.0, 200000.0),
+        'openai/gpt-5-mini': (100.0, None),
+    }
+    assert parse_model_limits(None) == {}
+    try:
+        parse_model_limits('500:1000')
+        assert False, "Entry without a model should fail"
+    except ValueError:
+        pass
+
+
+# Test 2: One client and runner per event loop
+def test_client_reused_per_loop():
+    """
+    Verify repeated runner() calls share one client, and a new event loop
+    gets a fresh one (httpx connections are loop-bound).
+    """
+    clients = LLMClients()
+
+    async def runners():
+        return clients.runner(), clients.runner()
+
+    with patch.object(llm_clients, 'AsyncDedalus') as client_class, \
+         patch.object(llm_clients, 'DedalusRunner', side_effect=lambda client: Mock(client=client)):
+        first, second = asyncio.run(runners())
+        third, _ = asyncio.run(runners())
+
+    assert first is second
+    assert third is not first
+    assert client_class.call_count == 2 and clients.clients_created == 2
+    assert client_class.call_args.kwargs['http_client'] is not None, "Pooled httpx client"
+
+
+# Test 3: A client replaced for a new loop is closed
+def test_rebind_closes_old_client():
+    """
+    Verify the client built on a finished loop is closed when a new loop
+    rebinds the provider, and aclose() closes the current one.
+
+    Expected: first client closed during the second run, second on aclose().
+    """
+    clients = LLMClients()
+    built = []
+
+    class FakeClient:
+        closed = False
+
+        async def close(self):
+            self.closed = True
+
+    def build():
+        built.append(FakeClient())
+        return built[-1]
+
+    async def use():
+        clients.client()
+        await asyncio.sleep(0)
+
+    async def use_and_close():
+        await use()
+        assert built[0].closed, "Old client closed on rebind"
+        assert not built[1].closed
+        await clients.aclose()
+
+    with patch.object(clients, '_build_client', side_effect=build):
+        asyncio.run(use())
+        asyncio.run(use_and_close())
+
+    assert len(built) == 2 and built[1].closed
+
+
+# Test 4: Concurrency cap and per-model limits
+def test_call_limits():
+    """
+    Verify at most max_concurrency calls run at once, and only the limited
+    model waits on its own RPM budget.
+
+    Expected: peak of 2 in flight for 6 calls; gpt-5-mini limiter consulted,
+              gpt-4o-mini only passes the global limiter.
+    """
+    clients = LLMClients(max_concurrency=2, model_limits={'openai/gpt-5-mini': (600, None)})
+    peak = {'now': 0, 'max': 0}
+
+    async def one(model):
+        async with clients.call(model, 'prompt') as call:
+            peak['now'] += 1
+            peak['max'] = max(peak['max'], peak['now'])
+            await asyncio.sleep(0.01)
+            peak['now'] -= 1
+            call.record_usage(100)
+            return len(call.limiters)
+
+    async def run():
+        return await asyncio.gather(*[one('openai/gpt-4o-mini') for _ in range(5)], one('openai/gpt-5-mini'))
+
+    limiter_counts = asyncio.run(run())
+
+    assert peak['max'] == 2
+    assert limiter_counts == [1, 1, 1, 1, 1, 2]
+    assert clients.stats()['calls'] == 6 and clients.stats()['in_flight'] == 0
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Shared LLM Client Tests...")
+
+    print("\n1. Testing model limit parsing...")
+    test_parse_model_limits()
+    print("   ✅ LLM_MODEL_LIMITS parsed")
+
+    print("\n2. Testing client reuse...")
+    test_client_reused_per_loop()
+    print("   ✅ One client per event loop")
+
+    print("\n3. Testing rebind cleanup...")
+    test_rebind_closes_old_client()
+    print("   ✅ Replaced client closed")
+
+    print("\n4. Testing call limits...")
+    test_call_limits()
+    print("   ✅ Concurrency cap and per-model limits")
+
+    print("\n✅ All shared LLM client tests passed!")
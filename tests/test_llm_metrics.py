@@ -0,0 +1,206 @@
+"""
+Tests for LLM call metrics (src/services/llm_metrics.py)
+
+Tests that tracked calls land in per-site histograms with tokens, outcome
+and cost, that SDK retries and time to first byte are picked up by the
+shared client's httpx hooks, and that reports count the calls they made.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dedalus_labs import AsyncDedalus
+
+from services import llm_metrics, weekly_suggester
+from services.llm_clients import LLMClients
+from services.llm_metrics import (
+    LLMMetrics, count_llm_calls, merge_snapshots, parse_prices, track_llm_call,
+)
+from services.product_cache import ProductAlternativeCache
+
+ITEMS = [
+    {'item_name': 'Standing Desk', 'merchant': 'Amazon', 'price': 399.00, 'category': 'Furniture'},
+    {'item_name': 'Ring Video Doorbell 3', 'merchant': 'Amazon', 'price': 119.99, 'category': 'Electronics'},
+    {'item_name': 'Sony WH-1000XM4', 'merchant': 'Amazon', 'price': 348.00, 'category': 'Electronics'},
+]
+
+
+def fake_runner():
+    """Runner answering one finding per item named in the prompt."""
+    async def run(input, model):
+        response = Mock()
+        response.usage = None
+        response.final_output = json.dumps([
+            {'item_number': i + 1, 'item_name': item['item_name'], 'alternative_merchant': 'Best Buy',
+             'total_landed_cost': 100.00, 'total_savings': 19.99}
+            for i, item in enumerate(x for x in ITEMS if x['item_name'] in input)
+        ])
+        return response
+
+    runner = AsyncMock()
+    runner.run.side_effect = run
+    return runner
+
+
+def load_fake_server():
+    path = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'fake_llm_server.py')
+    spec = importlib.util.spec_from_file_location('fake_llm_server', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Test 1: Aggregation, outcomes and cost
+def test_tracked_calls_aggregate():
+    """
+    Verify calls are grouped per (site, model), failures keep their outcome,
+    usage beats estimates, and cost follows the price table.
+
+    Expected: 2 ok + 1 timeout + 1 error; 1M prompt tokens at $0.15.
+    """
+    metrics = LLMMetrics(parse_prices('openai/gpt-4o-mini=0.15:0.60'))
+    model = 'openai/gpt-4o-mini'
+
+    with track_llm_call('weekly_research', model, 'x' * 40, metrics=metrics) as call:
+        call.set_output({'usage': {'prompt_tokens': 1_000_000, 'completion_tokens': 0}})
+    with track_llm_call('weekly_research', model, 'x' * 40, metrics=metrics) as call:
+        call.set_output('four')  # No usage: estimated from prompt and text
+    for error in (asyncio.TimeoutError(), RuntimeError('boom')):
+        try:
+            with track_llm_call('weekly_item', model, metrics=metrics):
+                raise error
+        except (asyncio.TimeoutError, RuntimeError):
+            pass
+    with track_llm_call('coach', 'unknown-model', metrics=metrics):
+        pass
+
+    snapshot = metrics.snapshot(reset=True)
+    research = snapshot['sites']['weekly_research'][model]
+    item = snapshot['sites']['weekly_item'][model]
+
+    assert research['calls'] == 2 and research['outcomes']['ok'] == 2
+    assert research['prompt_tokens'] == 1_000_000 + 10 and research['completion_tokens'] == 1
+    assert research['cost_usd'] == 0.150002
+    assert research['histograms']['wall_seconds']['count'] == 2
+    assert item['outcomes'] == {'ok': 0, 'error': 1, 'timeout': 1, 'cancelled': 0}
+    assert snapshot['sites']['coach']['unknown-model']['unpriced_calls'] == 1
+    assert snapshot['calls'] == 5
+    assert metrics.snapshot()['calls'] == 0, "reset starts a new window"
+
+    # Worker/shard snapshots add up
+    merged = merge_snapshots([snapshot, snapshot, None])
+    merged_research = merged['sites']['weekly_research'][model]
+    assert merged['calls'] == 10 and merged_research['histograms']['wall_seconds']['count'] == 4
+    assert merged_research['cost_usd'] == 0.300004
+
+
+# Test 2: Retries and first byte through the httpx hooks
+def test_http_hooks_count_retries():
+    """
+    Verify the shared client installs the hooks, and a call retried by the
+    SDK against a failing fake server records every attempt.
+
+    Expected: 2 attempts (1 retry) and an error outcome; a good call gets a TTFT.
+    """
+    clients = LLMClients()
+
+    async def hooks():
+        return clients.client()._client.event_hooks
+
+    with patch.dict(os.environ, {'DEDALUS_API_KEY': 'fake-key'}):
+        installed = asyncio.run(hooks())
+    assert llm_metrics.on_http_request in installed['request']
+    assert llm_metrics.on_http_response in installed['response']
+
+    fake_server = load_fake_server()
+    metrics = LLMMetrics()
+
+    async def run(fake):
+        transport = httpx.ASGITransport(app=fake_server.create_app(fake))
+        client = AsyncDedalus(api_key='fake-key', base_url='http://fake-llm', max_retries=1,
+                              http_client=httpx.AsyncClient(transport=transport, event_hooks=installed))
+        with track_llm_call('coach', 'openai/gpt-4o-mini', metrics=metrics) as call:
+            response = await client.chat.completions.create(
+                model='openai/gpt-4o-mini', messages=[{'role': 'user', 'content': 'hi'}])
+            call.set_output(response)
+        return call
+
+    call = asyncio.run(run(fake_server.FakeLLM(latency='fixed:0')))
+    assert call.attempts == 1 and call.ttft is not None and call.prompt_tokens > 0
+
+    try:
+        asyncio.run(run(fake_server.FakeLLM(error_rate=1.0, error_statuses=[503])))
+        assert False, "All attempts fail"
+    except Exception as e:
+        assert getattr(e, 'status_code', None) == 503
+
+    stats = metrics.snapshot()['sites']['coach']['openai/gpt-4o-mini']
+    assert stats['calls'] == 2 and stats['retries'] == 1
+    assert stats['outcomes']['error'] == 1
+
+
+# Test 3: Reports count the calls they actually made
+def test_mcp_calls_counted():
+    """
+    Verify mcp_calls_made matches the calls made (not a constant), in batch
+    and per_item mode, and that the calls show up under their sites.
+
+    Expected: batch 1 call, per_item 3 calls, cache hits 0 calls.
+    """
+    metrics = LLMMetrics()
+
+    def generate(mode, cache):
+        async def run():
+            with patch.object(llm_metrics, '_metrics', metrics), \
+                 patch('services.weekly_suggester.get_product_cache', return_value=cache), \
+                 patch('services.weekly_suggester.get_llm_clients',
+                       return_value=LLMClients(runner=fake_runner())):
+                with count_llm_calls() as outer:
+                    report = await weekly_suggester.generate_weekly_suggestions(
+                        'user', '2024-01-22', items=list(ITEMS), research_mode=mode)
+                return report, outer.calls
+        return asyncio.run(run())
+
+    batch, batch_calls = generate('batch', ProductAlternativeCache())
+    per_item, per_item_calls = generate('per_item', ProductAlternativeCache())
+    cache = ProductAlternativeCache()
+    generate('per_item', cache)
+    cached, cached_calls = generate('per_item', cache)
+
+    assert batch['mcp_calls_made'] == batch_calls == 1
+    assert per_item['mcp_calls_made'] == per_item_calls == 3
+    assert cached['mcp_calls_made'] == cached_calls == 0
+
+    sites = metrics.snapshot()['sites']
+    assert sites['weekly_research']['openai/gpt-4o-mini']['calls'] == 1
+    assert sites['weekly_item']['openai/gpt-4o-mini']['calls'] == 6
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running LLM Metrics Tests...")
+
+    print("\n1. Testing aggregation...")
+    test_tracked_calls_aggregate()
+    print("   ✅ Per-site outcomes, tokens and cost")
+
+    print("\n2. Testing httpx hooks...")
+    test_http_hooks_count_retries()
+    print("   ✅ Retries and time to first byte recorded")
+
+    print("\n3. Testing call counting...")
+    test_mcp_calls_counted()
+    print("   ✅ mcp_calls_made reflects calls made")
+
+    print("\n✅ All LLM metrics tests passed!")
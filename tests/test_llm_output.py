@@ -0,0 +1,281 @@
+"""
+Tests for LLM output parsing (src/services/llm_output.py)
+
+Tests that finding objects are recognized as soon as they close in a chunked
+stream, that the stream yields "found" events progressively, and that whole
+responses are extracted and schema-validated robustly.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+from unittest.mock import Mock, AsyncMock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.llm_output import (
+    IncrementalArrayParser,
+    parse_objects,
+    FINDING_SCHEMA,
+)
+from services import weekly_suggester_stream
+from services.llm_clients import LLMClients
+
+
+FINDINGS = [
+    {'item_number': 1, 'item_name': 'Ring Video Doorbell 3 {"gen": 3}', 'total_savings': 13.0,
+     'notes': 'Escaped \\" quote and ] bracket'},
+    {'item_number': 2, 'item_name': 'Standing Desk', 'total_savings': 40.0,
+     'tags': [{'k': 'v'}, [1, 2]]},
+]
+
+RESPONSE = ("Here is what I found (see [1]):\n```json\n"
+            + json.dumps(FINDINGS, indent=2)
+            + "\n```\nLet me know if you need {more} help!")
+
+
+# Test 1: Same objects for any chunking
+def test_parser_chunk_boundaries():
+    """
+    Verify objects are recovered regardless of where chunks split, with
+    braces/brackets/quotes inside strings and prose around the array.
+    """
+    for size in (1, 2, 3, 7, 64, len(RESPONSE)):
+        parser = IncrementalArrayParser()
+        objects = []
+        for i in range(0, len(RESPONSE), size):
+            objects.extend(parser.feed(RESPONSE[i:i + size]))
+        assert objects == FINDINGS, f"chunk size {size}"
+        assert parser.done
+
+
+# Test 2: Each object is emitted by the chunk that closes it
+def test_parser_emits_on_close():
+    """
+    Verify the first finding is available before the array is complete, and
+    a malformed object is skipped without losing the next one.
+    """
+    parser = IncrementalArrayParser()
+    assert parser.feed('[{"item_name": "A", "total_savings": 11') == []
+    assert parser.feed('.5}, {"item_name": ') == [{'item_name': 'A', 'total_savings': 11.5}]
+    assert parser.feed('oops}, {"item_name": "C"}') == [{'item_name': 'C'}]
+    assert parser.errors == 1
+    assert not parser.done
+
+
+# Test 3: Stream yields "found" before the response finishes
+def test_stream_found_events_are_progressive():
+    """
+    Verify the first "found" event precedes the last progress chunk.
+    """
+    items = [{'item_name': 'Ring Video Doorbell 3', 'merchant': 'Amazon', 'price': 119.99,
+              'category': 'Electronics'}]
+
+    class StreamingRunner:
+        """DedalusRunner.run(stream=True) shape: ChatCompletionChunk-like objects."""
+
+        def __init__(self, client):
+            pass
+
+        async def _chunks(self):
+            yield Mock(choices=[Mock(delta=Mock(content=''))])  # role chunk
+            for i in range(0, len(RESPONSE), 16):
+                yield Mock(choices=[Mock(delta=Mock(content=RESPONSE[i:i + 16]))])
+            yield Mock(choices=[])
+
+        def run(self, input, model, stream=False):
+            assert stream, "The stream service must ask for a streamed response"
+            return self._chunks()
+
+    async def collect():
+        with patch.object(weekly_suggester_stream.suggester, 'fetch_top_items', return_value=items), \
+             patch.object(weekly_suggester_stream, 'get_llm_clients', return_value=LLMClients(runner=StreamingRunner(None))):
+            return [e async for e in weekly_suggester_stream.generate_weekly_suggestions_stream('u', '2024-01-22')]
+
+    events = asyncio.run(collect())
+    kinds = [e['event'] for e in events]
+
+    found = [i for i, kind in enumerate(kinds) if kind == 'found']
+    last_progress = max(i for i, kind in enumerate(kinds) if kind == 'progress')
+    assert len(found) == 2
+    assert found[0] < last_progress, "First finding should arrive mid-stream"
+    assert events[-1]['event'] == 'complete'
+    assert events[-1]['total_savings'] == 53.0
+
+
+# Test 4: Whole-response extraction picks the right array
+def test_parse_objects_extraction():
+    """
+    Verify prose brackets, code fences, trailing commas and truncation.
+    """
+    text = 'Checked [3] stores.\n```json\n[{"item_name": "A", "total_savings": 12,},]\n```\nAlso [1, 2]'
+    assert parse_objects(text, FINDING_SCHEMA) == [{'item_name': 'A', 'total_savings': 12.0}]
+
+    truncated = '[{"item_name": "A", "total_savings": 12}, {"item_name": "B", "total_sa'
+    assert [f['item_name'] for f in parse_objects(truncated, FINDING_SCHEMA)] == ['A']
+
+    assert parse_objects('[]', FINDING_SCHEMA) == []
+    assert parse_objects('I could not find anything.', FINDING_SCHEMA) is None
+
+
+# Test 5: Schema validation coerces or drops objects
+def test_schema_validation():
+    """
+    Verify numeric strings are coerced, bad optional fields are nulled, and
+    objects missing required fields are dropped.
+    """
+    text = json.dumps([
+        {'item_name': 'A', 'total_savings': '$1,012.50', 'item_number': 2.0, 'url': ['x']},
+        {'item_name': 'B'},
+        {'item_name': 'C', 'total_savings': True},
+        'not an object',
+    ])
+    assert parse_objects(text, FINDING_SCHEMA) == [
+        {'item_name': 'A', 'total_savings': 1012.5, 'item_number': 2, 'url': None},
+    ]
+
+
+def load_categorization():
+    """Load src/categorization-model.py (not an importable module name)."""
+    path = os.path.join(os.path.dirname(__file__), '..', 'src', 'categorization-model.py')
+    spec = importlib.util.spec_from_file_location('categorization_model', path)
+    categorization = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(categorization)
+    return categorization
+
+
+# Test 6: Categorization keeps good results when others are malformed
+def test_categorize_products_batch_partial():
+    """
+    Verify results are matched by item_number and only bad items default.
+
+    Expected: item 1 from the model, item 2 (malformed) defaulted, item 3
+              from the model even though it came first.
+    """
+    categorization = load_categorization()
+
+    response = Mock()
+    response.final_output = """```json
+[
+  {"item_number": 3, "category": "Groceries", "confidence": 0.9, "reason": "food", "ask_user": false},
+  {"item_number": 1, "category": "Electronics", "confidence": "0.4"},
+  {"item_number": 2, "confidence": 0.8},
+]
+```"""
+    runner = AsyncMock()
+    runner.run.return_value = response
+    products = [{'name': 'Echo Dot', 'price': 49.99}, {'name': '???', 'price': 5.0},
+                {'name': 'Bananas', 'price': 1.99}]
+
+    results = asyncio.run(categorization.categorize_products_batch(runner, products))
+
+    assert [r['category'] for r in results] == ['Electronics', 'Miscellaneous', 'Groceries']
+    assert results[0]['ask_user'] is True, "Low confidence asks the user"
+    assert results[1]['ask_user'] is True and results[1]['confidence'] == 0.0
+    assert results[2]['ask_user'] is False
+
+
+# Test 7: Chunked, concurrent categorization
+def test_categorize_products_chunked():
+    """
+    Verify products are split into bounded chunks run concurrently, a failed
+    chunk is retried on its own, and results come back in product order.
+
+    Expected: 10 products -> chunks of 4/4/2, at most 2 calls at once; the
+              chunk failing once succeeds on retry, the always-unparseable
+              chunk defaults only its own products; retry delays double
+              (with jitter) and retries < 0 is rejected.
+    """
+    categorization = load_categorization()
+    products = [{'name': f'Product {n}', 'price': float(n)} for n in range(1, 11)]
+    attempts = {}
+    in_flight = {'now': 0, 'max': 0}
+
+    async def run(input, model):
+        first = int(input.split('1. Product ')[1].split(' ')[0])
+        attempts[first] = attempts.get(first, 0) + 1
+        in_flight['now'] += 1
+        in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        await asyncio.sleep(0.01)
+        in_flight['now'] -= 1
+        if first == 1 and attempts[first] == 1:
+            raise RuntimeError('rate limited')
+        response = Mock()
+        response.usage = None
+        if first == 9:
+            response.final_output = 'Sorry, I cannot help with that.'
+            return response
+        names = [int(part.split(' ')[0]) for part in input.split('. Product ')[1:]]
+        # Answer in reverse order: reassembly goes by item_number
+        response.final_output = json.dumps([
+            {'item_number': i + 1, 'category': f'Category {n}', 'confidence': 0.9,
+             'reason': 'test', 'ask_user': False}
+            for i, n in reversed(list(enumerate(names)))
+        ])
+        return response
+
+    runner = AsyncMock()
+    runner.run.side_effect = run
+
+    assert [len(c) for _, c in categorization.chunk_products(products, max_items=4)] == [4, 4, 2]
+    assert len(categorization.chunk_products(products, max_items=100, max_tokens=1)) == 10
+
+    with patch.object(categorization, 'get_llm_clients', return_value=LLMClients(runner=runner)):
+        results = asyncio.run(categorization.categorize_products(
+            runner, products, chunk_size=4, concurrency=2, retries=1, retry_backoff=0.01))
+
+    assert [r['item_number'] for r in results] == list(range(1, 11))
+    assert [r['category'] for r in results[:8]] == [f'Category {n}' for n in range(1, 9)]
+    assert all(r['category'] == 'Miscellaneous' and r['ask_user'] for r in results[8:])
+    assert results[9]['reason'] == 'Failed to parse batch response'
+    assert attempts == {1: 2, 5: 1, 9: 2}
+    assert in_flight['max'] == 2
+
+    # Retries back off exponentially with jitter; negative retries are rejected
+    for attempt in range(4):
+        assert 0.5 * 2 ** attempt <= categorization.retry_delay(attempt, backoff=1.0) <= 2 ** attempt
+    try:
+        asyncio.run(categorization.categorize_products(runner, products, retries=-1))
+        assert False, "retries=-1 should be rejected"
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running LLM Output Parsing Tests...")
+
+    print("\n1. Testing chunk boundaries...")
+    test_parser_chunk_boundaries()
+    print("   ✅ Objects recovered for any chunking")
+
+    print("\n2. Testing emit on close...")
+    test_parser_emits_on_close()
+    print("   ✅ Objects emitted as they close")
+
+    print("\n3. Testing progressive stream...")
+    test_stream_found_events_are_progressive()
+    print("   ✅ found events arrive mid-stream")
+
+    print("\n4. Testing extraction...")
+    test_parse_objects_extraction()
+    print("   ✅ Right array extracted from messy output")
+
+    print("\n5. Testing schema validation...")
+    test_schema_validation()
+    print("   ✅ Objects coerced or dropped")
+
+    print("\n6. Testing categorization parsing...")
+    test_categorize_products_batch_partial()
+    print("   ✅ Partial categorization results kept")
+
+    print("\n7. Testing chunked categorization...")
+    test_categorize_products_chunked()
+    print("   ✅ Chunks run concurrently, failed chunk retried")
+
+    print("\n✅ All LLM output parsing tests passed!")
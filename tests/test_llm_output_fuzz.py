@@ -0,0 +1,124 @@
+"""
+Fuzz and benchmark tests for LLM output parsing (src/services/llm_output.py)
+
+Feeds randomly mangled model outputs and large pathological inputs through
+the extractor and the incremental parser. Checks they never raise, never
+invent objects, and stay linear-time.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.llm_output import IncrementalArrayParser, parse_objects, FINDING_SCHEMA
+
+SEED = 20240122
+PROSE = ['Sure! ', 'Here are the results [1]: ', 'I searched {Best Buy, Target}. ',
+         'Prices "as of today". ', '\n```json\n', '\n```\n', 'Note: } ] stray closers. ']
+
+
+def random_finding(rng, i):
+    return {
+        'item_number': i,
+        'item_name': rng.choice(['Ring Doorbell', 'Desk "Pro" 60\\"', 'Sony {XM4}', 'Cable [2m]']),
+        'total_savings': round(rng.uniform(10, 200), 2),
+        'url': 'https://example.com/p?id=%d' % rng.randint(1, 10**6),
+    }
+
+
+def mangle(rng, text):
+    """Apply random LLM-style damage to a JSON array response; returns (text, damage)."""
+    damage = rng.choice(['trailing_comma', 'truncate', 'prose', 'fence', 'garbage', 'none'])
+    if damage == 'trailing_comma':
+        # Objects end with the url string, so '"}' only occurs at object ends
+        text = text.replace('"}', '",}')
+        text = text[:-1] + ',]' if text.endswith(']') else text
+    elif damage == 'truncate':
+        text = text[:rng.randint(0, len(text))]
+    elif damage == 'prose':
+        text = rng.choice(PROSE) + text + rng.choice(PROSE)
+    elif damage == 'fence':
+        text = '```json\n' + text + '\n```'
+    elif damage == 'garbage':
+        pos = rng.randint(0, len(text))
+        text = text[:pos] + rng.choice(['{', '[', '"', '\\', '}', ']', ',']) + text[pos:]
+    return text, damage
+
+
+# Test 1: Random damage never raises or invents findings
+def test_fuzz_mangled_outputs():
+    """
+    Verify 2000 mangled responses parse without exceptions and every
+    returned finding is one the model actually wrote (garbage characters
+    may land inside a string, so only types are checked for those).
+    """
+    rng = random.Random(SEED)
+    for _ in range(2000):
+        findings = [random_finding(rng, i) for i in range(1, rng.randint(0, 6) + 1)]
+        names = {f['item_name'] for f in findings}
+        text, damage = mangle(rng, json.dumps(findings, indent=rng.choice([None, 2])))
+        if damage == 'garbage':
+            names = None
+
+        result = parse_objects(text, FINDING_SCHEMA)
+        assert result is None or isinstance(result, list)
+        for obj in result or []:
+            assert isinstance(obj['item_name'], str) and isinstance(obj['total_savings'], float)
+            assert names is None or obj['item_name'] in names, f"Invented object from {text!r}"
+
+        parser = IncrementalArrayParser(schema=FINDING_SCHEMA)
+        streamed = []
+        pos = 0
+        while pos < len(text):
+            step = rng.randint(1, 40)
+            streamed.extend(parser.feed(text[pos:pos + step]))
+            pos += step
+        assert names is None or all(obj['item_name'] in names for obj in streamed)
+
+
+# Test 2: Pathological inputs stay fast
+def test_benchmark_large_malformed_outputs():
+    """
+    Verify ~1MB inputs that make a greedy `\\[.*\\]` regex backtrack are
+    handled in well under a second each.
+    """
+    finding = json.dumps({'item_name': 'Ring Doorbell', 'total_savings': 12.5})
+    cases = {
+        'unclosed openers': '[{' * 500_000,
+        'many small arrays': '[1] ' * 250_000,
+        'huge truncated array': '[' + ', '.join([finding] * 20_000) + ', {"item_name": "cut',
+        'deep nesting': '[' * 300_000 + ']' * 300_000,
+        'long string': '[{"item_name": "' + 'x\\"' * 300_000 + '", "total_savings": 11}]',
+    }
+    for name, text in cases.items():
+        start = time.perf_counter()
+        parse_objects(text, FINDING_SCHEMA)
+        IncrementalArrayParser(schema=FINDING_SCHEMA).feed(text)
+        elapsed = time.perf_counter() - start
+        assert elapsed < 2.0, f"{name}: {elapsed:.2f}s for {len(text)} chars"
+
+    # Truncated output keeps every complete finding
+    truncated = cases['huge truncated array']
+    assert len(parse_objects(truncated, FINDING_SCHEMA)) == 20_000
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running LLM Output Fuzz/Benchmark Tests...")
+
+    print("\n1. Fuzzing mangled outputs...")
+    test_fuzz_mangled_outputs()
+    print("   ✅ No exceptions, no invented findings")
+
+    print("\n2. Benchmarking pathological inputs...")
+    test_benchmark_large_malformed_outputs()
+    print("   ✅ Linear-time on large malformed outputs")
+
+    print("\n✅ All fuzz/benchmark tests passed!")
@@ -0,0 +1,159 @@
+"""
+Tests for the streaming overspending detector (database/api/overspending.py)
+
+Tests that the in-process rolling window matches SQL_FIND_OVERSPENDING:
+previous 4 weeks with spending, sample stddev, 1.5x threshold.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import os
+import statistics
+import sys
+from unittest.mock import patch
+
+# Add repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database.api.overspending import OverspendingDetector, load_user_history
+
+
+# Mondays of consecutive weeks
+WEEKS = ['2024-01-01', '2024-01-08', '2024-01-15', '2024-01-22', '2024-01-29', '2024-02-05']
+
+
+# Test 1: Event fires the moment the week crosses the threshold
+def test_event_on_threshold_crossing():
+    """
+    Verify an event is emitted by the purchase that crosses 1.5x the average.
+
+    Expected: baseline avg 20, alert once total exceeds 30, only once.
+    """
+    detector = OverspendingDetector()
+    for week in WEEKS[:4]:
+        assert detector.ingest('u1', 'Coffee', week, 20.0) is None
+
+    assert detector.ingest('u1', 'Coffee', WEEKS[4], 25.0) is None, "25 is below 30"
+    event = detector.ingest('u1', 'Coffee', WEEKS[4], 10.0)
+    assert event is not None, "35 crosses 30"
+    assert event['week_start'] == WEEKS[4]
+    assert event['total_spend'] == 35.0
+    assert event['avg_last_4_weeks'] == 20.0
+    assert event['z_score'] is None, "Zero stddev gives no z-score, like NULLIF"
+
+    assert detector.ingest('u1', 'Coffee', WEEKS[4], 5.0) is None, "Alert once per crossing"
+    assert detector.recent_events('u1') == [event]
+
+
+# Test 2: Rolling moments match sample mean/stddev over the last 4 weeks
+def test_moments_match_sql_window():
+    """
+    Verify the ring buffer evicts old weeks and z-score uses sample stddev.
+    """
+    totals = [100.0, 10.0, 20.0, 30.0, 40.0]   # first week falls out of the window
+    detector = OverspendingDetector()
+    for week, total in zip(WEEKS, totals):
+        detector.ingest('u1', 'Dining', week, total)
+
+    event = detector.ingest('u1', 'Dining', WEEKS[5], 60.0)
+
+    baseline = totals[1:]
+    expected_z = (60.0 - statistics.mean(baseline)) / statistics.stdev(baseline)
+    assert event['avg_last_4_weeks'] == round(statistics.mean(baseline), 2)
+    assert event['z_score'] == round(expected_z, 2)
+
+
+# Test 3: Categories and users are independent; listeners get events
+def test_partitions_and_listeners():
+    """
+    Verify (user, category) windows do not mix and subscribers are called.
+    """
+    received = []
+    detector = OverspendingDetector()
+    detector.subscribe(received.append)
+
+    detector.ingest('u1', 'Coffee', WEEKS[0], 10.0)
+    detector.ingest('u2', 'Coffee', WEEKS[0], 100.0)
+    detector.ingest('u1', 'Groceries', WEEKS[0], 100.0)
+
+    assert detector.ingest('u1', 'Coffee', WEEKS[1], 16.0) is not None
+    assert detector.ingest('u2', 'Coffee', WEEKS[1], 16.0) is None
+    assert [e['user_id'] for e in received] == ['u1']
+
+
+# Test 4: Seeding from the rollup table does not re-alert
+def test_seed_from_history():
+    """
+    Verify history is loaded with one parameterized query and a week that
+    was already over the threshold does not emit again.
+    """
+    rows = [
+        {'CATEGORY': 'Coffee', 'WEEK_START': WEEKS[0], 'TOTAL_SPEND': 10},
+        {'CATEGORY': 'Coffee', 'WEEK_START': WEEKS[1], 'TOTAL_SPEND': 40},
+    ]
+    detector = OverspendingDetector()
+    with patch('database.api.overspending.fetch_all', return_value=rows) as mock_fetch:
+        assert load_user_history(detector, 'u1') == 1
+
+    assert mock_fetch.call_args[0][1][0] == 'u1', "User id should be a bound parameter"
+    assert detector.is_seeded('u1')
+    assert detector.ingest('u1', 'Coffee', WEEKS[1], 1.0) is None, "Already over before seeding"
+    assert detector.ingest('u1', 'Coffee', WEEKS[2], 40.0) is not None, "New week vs avg 25.5"
+
+    with patch('database.api.overspending.fetch_all') as mock_fetch:
+        assert load_user_history(detector, 'u1') == 0
+    assert not mock_fetch.called, "No query once seeded"
+
+
+# Test 5: Seeding merges live spend, once; idle users are evicted
+def test_seed_merges_and_evicts():
+    """
+    Verify spend ingested before the history arrives is kept, a second
+    seed is dropped, and the least recently active user is evicted.
+
+    Expected: live 20 + history 5 in the current week, then 6 more crosses
+              the avg-20 baseline at 31.
+    """
+    detector = OverspendingDetector(max_users=2)
+    detector.ingest('u1', 'Coffee', WEEKS[4], 20.0)
+
+    history = {'Coffee': [(WEEKS[2], 20.0), (WEEKS[3], 20.0), (WEEKS[4], 5.0)]}
+    assert detector.seed_user('u1', history)
+    assert not detector.seed_user('u1', {'Coffee': [(WEEKS[4], 500.0)]}), "Seeded once"
+
+    event = detector.ingest('u1', 'Coffee', WEEKS[4], 6.0)
+    assert event is not None and event['total_spend'] == 31.0, "Live spend survives seeding"
+
+    detector.ingest('u2', 'Coffee', WEEKS[0], 5.0)
+    detector.ingest('u1', 'Coffee', WEEKS[4], 1.0)   # u1 active again
+    detector.ingest('u3', 'Coffee', WEEKS[0], 5.0)   # evicts u2
+    assert detector.is_seeded('u1')
+    detector.ingest('u4', 'Coffee', WEEKS[0], 5.0)   # evicts u1
+    assert not detector.is_seeded('u1') and detector.recent_events('u1') == []
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Overspending Detector Tests...")
+
+    print("\n1. Testing threshold crossing...")
+    test_event_on_threshold_crossing()
+    print("   ✅ Event fires on crossing")
+
+    print("\n2. Testing rolling moments...")
+    test_moments_match_sql_window()
+    print("   ✅ Moments match SQL window")
+
+    print("\n3. Testing partitions...")
+    test_partitions_and_listeners()
+    print("   ✅ Windows independent, listeners called")
+
+    print("\n4. Testing seeding...")
+    test_seed_from_history()
+    print("   ✅ Seeding does not re-alert")
+
+    print("\n5. Testing merge and eviction...")
+    test_seed_merges_and_evicts()
+    print("   ✅ Live spend kept, idle users evicted")
+
+    print("\n✅ All overspending detector tests passed!")
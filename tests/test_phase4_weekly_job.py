@@ -6,9 +6,13 @@ Tests the weekly suggestions job script that generates reports for all users.
 Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
 """
 
+import asyncio
+import importlib.util
 import json
 import os
+import tempfile
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
 
 # Test 1: Week calculation logic
@@ -253,6 +257,63 @@ def test_processing_time_tracking():
     assert 'processing_seconds' in code or '(end_time - start_time)' in code, "Should calculate duration"
 
 
+# Test 15: Bounded concurrency with rate limit and timeouts
+def test_concurrent_worker_pool():
+    """
+    Verify process_users runs users under the concurrency bound, fails a
+    user that times out without writing its report, and returns results
+    and checkpoints per user.
+
+    Expected: at most 2 in flight, slow user 'failed' and never written,
+              the others 'done' once their reports are flushed.
+    """
+    script_path = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'generate_weekly_suggestions.py')
+    spec = importlib.util.spec_from_file_location('generate_weekly_suggestions', script_path)
+    job = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(job)
+
+    users = ['u1', 'u2', 'slow', 'u3', 'u4']
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_generate(user_id, week_start, top_n=5, items=None):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        try:
+            await asyncio.sleep(5 if user_id == 'slow' else 0.05)
+        finally:
+            in_flight -= 1
+        return {'user_id': user_id, 'findings': [], 'items_analyzed': 1, 'error': None}
+
+    class FakeWriter:
+        def __init__(self):
+            self.pending = []
+
+        def add(self, user_id, week_start, report):
+            report['report_id'] = f'r-{user_id}'
+            self.pending.append((user_id, week_start, report))
+            return report['report_id']
+
+    writer = FakeWriter()
+    with tempfile.TemporaryDirectory() as log_dir:
+        checkpoint = job.JobCheckpoint('2024-01-22', log_dir=log_dir)
+        with patch.object(job.suggester, 'generate_weekly_suggestions', side_effect=fake_generate):
+            results = asyncio.run(job.process_users(
+                users, '2024-01-22', concurrency=2, timeout=0.5, writer=writer, checkpoint=checkpoint
+            ))
+        checkpoint.record_flushed(writer.pending)
+        checkpoint.close()
+
+    assert max_in_flight <= 2, "Concurrency bound exceeded"
+    assert [r['user_id'] for r in results] == users, "One result per user, in order"
+    slow = results[users.index('slow')]
+    assert not slow['success'] and 'timed out' in slow['error']
+    assert all(r['success'] for r in results if r['user_id'] != 'slow')
+    assert 'slow' not in [user_id for user_id, _, _ in writer.pending], "Timed-out user must not be written"
+    assert checkpoint.status == {'u1': 'done', 'u2': 'done', 'slow': 'failed', 'u3': 'done', 'u4': 'done'}
+
+
 if __name__ == '__main__':
     # Run tests manually
     print("Running Phase 4 Weekly Job Tests...")
@@ -313,4 +374,8 @@ if __name__ == '__main__':
     test_processing_time_tracking()
     print("   ✅ Processing time tracked")
 
+    print("\n15. Testing concurrent worker pool...")
+    test_concurrent_worker_pool()
+    print("   ✅ Bounded concurrency, rate limit and timeouts")
+
     print("\n✅ All Phase 4 tests passed!")
@@ -131,15 +131,16 @@ def test_dedalus_streaming_attempt():
     """
     Verify that code attempts to use Dedalus streaming if available.
 
-    Expected: Should check for run_stream method and fall back if not available.
+    Expected: Should call runner.run(..., stream=True) and fall back if the
+    runner returns a single (awaitable) response.
     """
     stream_path = os.path.join(os.path.dirname(__file__), '..', 'src', 'services', 'weekly_suggester_stream.py')
 
     with open(stream_path, 'r') as f:
         code = f.read()
 
-    assert 'run_stream' in code, "Should attempt to use run_stream"
-    assert 'hasattr' in code or 'try:' in code, "Should have fallback mechanism"
+    assert 'stream=True' in code, "Should ask DedalusRunner for a streamed response"
+    assert 'isawaitable' in code, "Should have fallback mechanism"
 
 
 # Test 9: Progress tracking
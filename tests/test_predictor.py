@@ -0,0 +1,269 @@
+"""
+Tests for the behavioral predictor (database/api/predictor.py)
+
+Tests the interval-based next-purchase predictor, including the
+bounded-history and exponential-decay modes.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database.api.predictor import predict_next_purchases, predict_levels, _average_interval
+
+
+def _rows(item_name, category, start, gaps_days, merchant='Starbucks'):
+    """Build PURCHASE_ITEMS_TEST-shaped rows from a list of day gaps."""
+    def row(ts):
+        return {'ITEM_NAME': item_name, 'CATEGORY': category, 'MERCHANT': merchant, 'TS': ts}
+
+    rows = [row(start)]
+    ts = start
+    for gap in gaps_days:
+        ts = ts + timedelta(days=gap)
+        rows.append(row(ts))
+    return rows
+
+
+# Test 1: Default mode averages every interval
+def test_default_mode_uses_full_history():
+    """
+    Verify that without options every interval is weighted equally.
+
+    Expected: gaps of 10, 10, 1, 1 days → 5.5 day average.
+    """
+    start = datetime(2024, 1, 1)
+    rows = _rows('Latte', 'Coffee', start, [10, 10, 1, 1])
+
+    with patch('database.api.predictor.fetch_all', return_value=rows):
+        preds = predict_next_purchases('u1', limit=5)
+
+    assert len(preds) == 1
+    last = rows[-1]['TS']
+    assert preds[0]['next_time'] == last + timedelta(days=5.5)
+    assert preds[0]['samples'] == 5
+
+
+# Test 2: Bounded history only looks at the last N intervals
+def test_bounded_history_uses_last_intervals():
+    """
+    Verify that max_intervals trims each group to its most recent window.
+
+    Expected: with max_intervals=2 only the two 1-day gaps count.
+    """
+    start = datetime(2024, 1, 1)
+    rows = _rows('Latte', 'Coffee', start, [10, 10, 1, 1])
+
+    with patch('database.api.predictor.fetch_all', return_value=rows):
+        preds = predict_next_purchases('u1', limit=5, max_intervals=2)
+
+    last = rows[-1]['TS']
+    assert preds[0]['next_time'] == last + timedelta(days=1)
+    assert preds[0]['samples'] == 3, "Window should hold N+1 timestamps"
+
+
+# Test 3: Bounded history is pushed down to SQL
+def test_bounded_history_pushed_to_sql():
+    """
+    Verify that the window is applied in the warehouse query.
+
+    Expected: QUALIFY DENSE_RANK() ... <= N+1 only when max_intervals is set.
+    """
+    with patch('database.api.predictor.fetch_all', return_value=[]) as mock_fetch:
+        predict_next_purchases('u1', max_intervals=4)
+        bounded_sql = mock_fetch.call_args[0][0]
+        predict_next_purchases('u1')
+        full_sql = mock_fetch.call_args[0][0]
+
+    assert 'QUALIFY DENSE_RANK()' in bounded_sql
+    assert 'ROW_NUMBER' not in bounded_sql, "Rank visits (timestamps), not item rows"
+    assert '<= 5' in bounded_sql
+    assert 'QUALIFY' not in full_sql
+    assert mock_fetch.call_args[0][1] == ('u1',), "User ID must stay parameterized"
+
+
+# Test 4: Decayed average favors recent intervals
+def test_decayed_average():
+    """
+    Verify the exponentially decayed interval average.
+
+    Expected: newest interval weight 1, previous weight decay.
+    """
+    assert _average_interval([10.0, 10.0]) == 10.0
+    assert _average_interval([10.0, 1.0], decay=1.0) == 5.5
+    # (1*1 + 0.5*10) / 1.5 = 4.0
+    assert _average_interval([10.0, 1.0], decay=0.5) == 4.0
+
+
+# Test 5: Invalid options are rejected
+def test_invalid_options_rejected():
+    """
+    Verify that out-of-range options raise ValueError before querying.
+    """
+    for kwargs in ({'max_intervals': 0}, {'decay': 0.0}, {'decay': 1.5}):
+        try:
+            predict_next_purchases('u1', **kwargs)
+            assert False, f"Should reject {kwargs}"
+        except ValueError:
+            pass
+
+
+# Test 6: All levels come from one history fetch
+def test_levels_single_pass():
+    """
+    Verify item, category and merchant predictions share one query.
+
+    Expected: one fetch_all call; a latte and a muffin bought in the same
+    order count as one Coffee / Starbucks visit.
+    """
+    start = datetime(2024, 1, 1)
+    rows = sorted(
+        _rows('Latte', 'Coffee', start, [2, 2, 2])
+        + _rows('Muffin', 'Coffee', start, [2, 2, 2]),
+        key=lambda r: r['TS'],
+    )
+
+    with patch('database.api.predictor.fetch_all', return_value=rows) as mock_fetch:
+        result = predict_levels('u1', ['item', 'category', 'merchant'], limit=5)
+
+    assert mock_fetch.call_count == 1, "Should scan history once"
+    assert 'MERCHANT' in mock_fetch.call_args[0][0], "Should select merchant"
+
+    assert {p['item'] for p in result['item']} == {'Latte', 'Muffin'}
+    assert len(result['category']) == 1
+    coffee = result['category'][0]
+    assert coffee['category'] == 'Coffee' and coffee['level'] == 'category'
+    assert coffee['samples'] == 4, "Same-order items should collapse to one visit"
+    assert coffee['next_time'] == rows[-1]['TS'] + timedelta(days=2)
+    assert result['merchant'][0]['merchant'] == 'Starbucks'
+
+
+# Test 7: Bounded history covers every requested level in SQL
+def test_levels_bounded_sql():
+    """
+    Verify the QUALIFY push-down keeps rows needed by any requested level.
+    """
+    with patch('database.api.predictor.fetch_all', return_value=[]) as mock_fetch:
+        predict_levels('u1', ['item', 'merchant'], max_intervals=3)
+
+    sql = mock_fetch.call_args[0][0]
+    assert 'PARTITION BY ITEM_NAME, CATEGORY' in sql
+    assert 'PARTITION BY MERCHANT' in sql
+    assert 'PARTITION BY CATEGORY\n' not in sql, "Unrequested level should not be partitioned"
+    assert ' OR ' in sql
+
+
+# Test 8: Unknown levels are rejected
+def test_unknown_level_rejected():
+    """
+    Verify that an unknown level raises ValueError.
+    """
+    try:
+        predict_next_purchases('u1', level='brand')
+        assert False, "Should reject unknown level"
+    except ValueError as e:
+        assert 'brand' in str(e)
+
+
+# Test 9: Bounded history counts multi-item orders as one visit
+def test_bounded_history_multi_item_orders():
+    """
+    Verify history=N at category level keeps N intervals when every order
+    holds several items sharing one TS.
+
+    Expected: the window ranks distinct timestamps, and the 3 most recent
+    orders of 3 items each give 2 intervals (3 samples) for max_intervals=2.
+    """
+    start = datetime(2024, 1, 1)
+    rows = sorted(
+        _rows('Latte', 'Coffee', start, [10, 1, 1])
+        + _rows('Muffin', 'Coffee', start, [10, 1, 1])
+        + _rows('Bagel', 'Coffee', start, [10, 1, 1]),
+        key=lambda r: r['TS'],
+    )
+    # What the warehouse returns for DENSE_RANK() <= 3: all items of the last 3 orders
+    last_orders = sorted({r['TS'] for r in rows})[-3:]
+    trimmed = [r for r in rows if r['TS'] in last_orders]
+
+    with patch('database.api.predictor.fetch_all', return_value=trimmed) as mock_fetch:
+        result = predict_levels('u1', ['category'], max_intervals=2)
+
+    sql = mock_fetch.call_args[0][0]
+    assert 'DENSE_RANK() OVER' in sql and '<= 3' in sql
+    coffee = result['category'][0]
+    assert coffee['samples'] == 3, "9 item rows are 3 visits"
+    assert coffee['next_time'] == last_orders[-1] + timedelta(days=1)
+
+
+# Test 10: Item level keeps counting every row
+def test_item_level_counts_repeated_rows():
+    """
+    Verify the default item-level prediction is unchanged for an item
+    bought twice in one order: both rows count as samples.
+
+    Expected: 4 rows (two sharing a TS) → 4 samples, 10-day average.
+    """
+    start = datetime(2024, 1, 1)
+    rows = _rows('Latte', 'Coffee', start, [10, 10])
+    rows.append(dict(rows[-1]))  # second Latte in the last order
+
+    with patch('database.api.predictor.fetch_all', return_value=rows):
+        preds = predict_next_purchases('u1')
+        coffee = predict_levels('u1', ['category'])['category'][0]
+
+    assert preds[0]['samples'] == 4
+    assert preds[0]['next_time'] == rows[-1]['TS'] + timedelta(days=10)
+    assert coffee['samples'] == 3, "Same order is one visit at category level"
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Predictor Tests...")
+
+    print("\n1. Testing default mode...")
+    test_default_mode_uses_full_history()
+    print("   ✅ Full history averaged")
+
+    print("\n2. Testing bounded history...")
+    test_bounded_history_uses_last_intervals()
+    print("   ✅ Only the last N intervals used")
+
+    print("\n3. Testing SQL push-down...")
+    test_bounded_history_pushed_to_sql()
+    print("   ✅ Window applied in SQL")
+
+    print("\n4. Testing decayed average...")
+    test_decayed_average()
+    print("   ✅ Recent intervals weigh more")
+
+    print("\n5. Testing option validation...")
+    test_invalid_options_rejected()
+    print("   ✅ Invalid options rejected")
+
+    print("\n6. Testing single-pass levels...")
+    test_levels_single_pass()
+    print("   ✅ Item, category and merchant from one scan")
+
+    print("\n7. Testing bounded SQL for levels...")
+    test_levels_bounded_sql()
+    print("   ✅ Window covers every requested level")
+
+    print("\n8. Testing unknown level...")
+    test_unknown_level_rejected()
+    print("   ✅ Unknown level rejected")
+
+    print("\n9. Testing multi-item orders...")
+    test_bounded_history_multi_item_orders()
+    print("   ✅ Orders ranked as visits")
+
+    print("\n10. Testing item-level samples...")
+    test_item_level_counts_repeated_rows()
+    print("   ✅ Item level counts every purchase")
+
+    print("\n✅ All predictor tests passed!")
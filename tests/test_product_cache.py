@@ -0,0 +1,182 @@
+"""
+Tests for the cross-user product alternative cache (src/services/product_cache.py)
+
+Tests that researched products are reused across users, re-priced per user,
+and that only uncached items are sent to Dedalus.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+from unittest.mock import Mock, patch, AsyncMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.llm_clients import LLMClients
+from services.product_cache import ProductAlternativeCache, product_key
+from services.weekly_suggester import generate_weekly_suggestions, match_findings_to_items
+
+
+DOORBELL = {'item_name': 'Ring Video Doorbell 3', 'merchant': 'Amazon', 'price': 119.99,
+            'external_id': 'B08N5NQ869'}
+
+BESTBUY_FINDING = {
+    'item_number': 1, 'item_name': 'Ring Video Doorbell 3',
+    'original_price': 119.99, 'original_merchant': 'Amazon',
+    'alternative_merchant': 'Best Buy', 'total_landed_cost': 106.99,
+    'total_savings': 13.00, 'url': 'https://www.bestbuy.com/...',
+}
+
+
+def db_row(name, price, external_id=None):
+    return {'ITEM_NAME': name, 'MERCHANT': 'Amazon', 'PRICE': price, 'CATEGORY': 'Electronics',
+            'SUBCATEGORY': None, 'PURCHASED_AT': datetime(2024, 1, 27), 'ITEM_ID': name,
+            'EXTERNAL_ID': external_id}
+
+
+# Test 1: Product identity prefers external_id, falls back to normalized name
+def test_product_key():
+    """
+    Verify ASIN keys and punctuation/case-insensitive name keys.
+    """
+    assert product_key(DOORBELL) == 'id:B08N5NQ869'
+    assert product_key({'item_name': 'Ring  Video-Doorbell 3!'}) == 'name:ring video doorbell 3'
+    assert product_key({'item_name': 'Unknown'}) is None
+
+
+# Test 2: Findings are re-priced for each user
+def test_cached_findings_repriced():
+    """
+    Verify savings come from the user's own price and user fields don't leak.
+
+    Expected: user who paid 129.99 saves 23.00; user who paid 112.00 gets
+              nothing (6.01 < $10 threshold).
+    """
+    cache = ProductAlternativeCache()
+    cache.store(DOORBELL, [BESTBUY_FINDING])
+
+    from services.product_cache import apply_to_item
+    other_user = dict(DOORBELL, price=129.99, merchant='Target')
+    hits = cache.lookup([other_user])
+    finding = apply_to_item(hits[0], other_user, 3)[0]
+    assert finding['total_savings'] == 23.00
+    assert finding['original_merchant'] == 'Target'
+    assert finding['item_number'] == 3
+
+    cheaper_user = dict(DOORBELL, price=112.00)
+    assert apply_to_item(cache.lookup([cheaper_user])[0], cheaper_user, 1) == []
+
+
+# Test 3: Negative results and TTL
+def test_negative_results_and_ttl():
+    """
+    Verify "no alternative" is reused only for users who paid no more, and
+    entries expire after the TTL.
+    """
+    cache = ProductAlternativeCache(ttl_seconds=3600)
+    cache.store(DOORBELL, [])
+
+    assert cache.lookup([DOORBELL]) == {0: []}
+    assert cache.lookup([dict(DOORBELL, price=150.00)]) == {}, "Paid more: research again"
+
+    with patch('services.product_cache.time.time', return_value=10**12):
+        assert cache.lookup([DOORBELL]) == {}, "Stale prices are not reused"
+
+
+# Test 4: Only uncached items are sent to Dedalus
+def test_only_uncached_items_researched():
+    """
+    Verify a second user with the same product skips the LLM, and a mixed
+    basket only sends the new product.
+    """
+    cache = ProductAlternativeCache()
+    response = Mock()
+    response.final_output = json.dumps([BESTBUY_FINDING])
+    runner = AsyncMock()
+    runner.run.return_value = response
+
+    async def run(rows):
+        with patch('services.weekly_suggester.fetch_all', return_value=rows), \
+             patch('services.weekly_suggester.get_product_cache', return_value=cache), \
+             patch('services.weekly_suggester.get_llm_clients', return_value=LLMClients(runner=runner)):
+            return await generate_weekly_suggestions('user', '2024-01-22', top_n=5)
+
+    first = asyncio.run(run([db_row('Ring Video Doorbell 3', 119.99, 'B08N5NQ869')]))
+    assert runner.run.call_count == 1
+    assert first['total_potential_savings'] == 13.00
+
+    second = asyncio.run(run([db_row('Ring Video Doorbell 3', 119.99, 'B08N5NQ869')]))
+    assert runner.run.call_count == 1, "Cached product should not call Dedalus"
+    assert second['mcp_calls_made'] == 0
+    assert second['findings'][0]['total_savings'] == 13.00
+
+    response.final_output = '[]'
+    mixed = asyncio.run(run([db_row('Standing Desk', 399.00),
+                             db_row('Ring Video Doorbell 3', 119.99, 'B08N5NQ869')]))
+    prompt = runner.run.call_args.kwargs['input']
+    assert 'Standing Desk' in prompt and 'Ring Video Doorbell' not in prompt
+    assert [f['item_number'] for f in mixed['findings']] == [2], "Cached finding keeps user's position"
+    assert mixed['items_from_cache'] == 1
+
+
+# Test 5: Findings are matched by name when item_number is missing
+def test_unmatched_findings_kept():
+    """
+    Verify findings without item_number match the closest receipt line, and
+    a finding matching no item stays in the report without being cached.
+    """
+    items = [dict(DOORBELL), {'item_name': 'Standing Desk', 'merchant': 'Amazon', 'price': 399.00}]
+    fuzzy = dict(BESTBUY_FINDING, item_name='Ring Video Doorbell 3 (2nd Gen) Satin Nickel')
+    del fuzzy['item_number']
+    stray = {'item_name': 'Apple AirPods Pro', 'total_landed_cost': 189.99, 'total_savings': 60.0}
+    assert match_findings_to_items([fuzzy, stray], items) == {0: [fuzzy], None: [stray]}
+
+    cache = ProductAlternativeCache()
+    response = Mock()
+    response.final_output = json.dumps([stray])
+    runner = AsyncMock()
+    runner.run.return_value = response
+
+    async def run():
+        with patch('services.weekly_suggester.fetch_all',
+                   return_value=[db_row('Ring Video Doorbell 3', 119.99), db_row('Standing Desk', 399.00)]), \
+             patch('services.weekly_suggester.get_product_cache', return_value=cache), \
+             patch('services.weekly_suggester.get_llm_clients', return_value=LLMClients(runner=runner)):
+            return await generate_weekly_suggestions('user', '2024-01-22', top_n=5)
+
+    report = asyncio.run(run())
+    assert [f['item_name'] for f in report['findings']] == ['Apple AirPods Pro']
+    assert report['total_potential_savings'] == 60.0
+    assert cache.lookup(items) == {}, "Unmatched findings must not be cached (nor negatives for the batch)"
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Product Cache Tests...")
+
+    print("\n1. Testing product identity...")
+    test_product_key()
+    print("   ✅ external_id and normalized name keys")
+
+    print("\n2. Testing re-pricing...")
+    test_cached_findings_repriced()
+    print("   ✅ Savings recomputed per user")
+
+    print("\n3. Testing negative results and TTL...")
+    test_negative_results_and_ttl()
+    print("   ✅ Negative results and TTL respected")
+
+    print("\n4. Testing research skipping...")
+    test_only_uncached_items_researched()
+    print("   ✅ Only uncached items sent to Dedalus")
+
+    print("\n5. Testing unmatched findings...")
+    test_unmatched_findings_kept()
+    print("   ✅ Fuzzy-matched or kept uncached")
+
+    print("\n✅ All product cache tests passed!")
@@ -0,0 +1,94 @@
+"""
+Tests for the process-wide LLM rate limiter (src/services/rate_limit.py)
+
+Tests request and token budgets shared by concurrent workers.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.rate_limit import AsyncRateLimiter, estimate_tokens
+
+
+# Test 1: Unlimited limiter never waits
+def test_unlimited_limiter_is_free():
+    """
+    Verify a limiter without limits returns immediately.
+    """
+    limiter = AsyncRateLimiter()
+
+    async def run():
+        for _ in range(100):
+            await limiter.acquire(10_000)
+
+    asyncio.run(run())
+    assert limiter.waited_seconds == 0.0
+    assert estimate_tokens('x' * 400) == 100
+
+
+# Test 2: Requests per minute is enforced across coroutines
+def test_requests_per_minute_enforced():
+    """
+    Verify the (N+1)th request in a burst waits for the bucket to refill.
+
+    Expected: 2 rpm allows a burst of 2; the 3rd request waits ~30s.
+    """
+    limiter = AsyncRateLimiter(requests_per_minute=2)
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        # Advance the bucket clock instead of sleeping
+        limiter.requests.updated -= seconds
+
+    async def run():
+        await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+    with patch('services.rate_limit.asyncio.sleep', side_effect=fake_sleep):
+        asyncio.run(run())
+
+    assert len(sleeps) >= 1, "Third request should wait"
+    assert abs(sum(sleeps) - 30.0) < 0.5, "2 rpm refills one request every 30s"
+
+
+# Test 3: Token usage is reconciled after the call
+def test_token_usage_reconciled():
+    """
+    Verify under-estimated calls are charged and over-estimates returned.
+    """
+    limiter = AsyncRateLimiter(tokens_per_minute=1000)
+
+    asyncio.run(limiter.acquire(300))
+    assert round(limiter.tokens.available) == 700
+
+    limiter.record_usage(actual_tokens=500, reserved_tokens=300)
+    assert round(limiter.tokens.available) == 500
+
+    limiter.record_usage(actual_tokens=100, reserved_tokens=300)
+    assert round(limiter.tokens.available) == 700
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Rate Limit Tests...")
+
+    print("\n1. Testing unlimited limiter...")
+    test_unlimited_limiter_is_free()
+    print("   ✅ No limits, no waiting")
+
+    print("\n2. Testing requests per minute...")
+    test_requests_per_minute_enforced()
+    print("   ✅ RPM enforced across coroutines")
+
+    print("\n3. Testing token reconciliation...")
+    test_token_usage_reconciled()
+    print("   ✅ Token usage reconciled")
+
+    print("\n✅ All rate limit tests passed!")
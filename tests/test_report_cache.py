@@ -0,0 +1,165 @@
+"""
+Tests for the parsed-report LRU cache (database/api/suggestions.py)
+
+Tests that cached reports are validated against updated_at, invalidated by
+upsert_weekly_report, and reused by the history listing.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import json
+import os
+import sys
+from datetime import date, datetime
+from unittest.mock import patch
+
+# Add repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database.api import suggestions
+from database.api.suggestions import (
+    get_weekly_report,
+    get_recent_reports,
+    get_report_summaries,
+    clear_report_cache,
+)
+
+
+T1 = datetime(2024, 1, 27, 10, 30)
+T2 = datetime(2024, 1, 28, 9, 0)
+
+
+def report_row(week, updated_at, savings=10.0):
+    return {
+        'REPORT_ID': f'r-{week}',
+        'WEEK_START': date.fromisoformat(week),
+        'REPORT_JSON': json.dumps({'week_start': week, 'total_potential_savings': savings,
+                                   'findings': [{'item': 'Milk', 'alternatives': []}]}),
+        'CREATED_AT': T1,
+        'UPDATED_AT': updated_at,
+    }
+
+
+# Test 1: Second read is validated by metadata, not re-parsed
+def test_cache_hit_uses_metadata_query():
+    """
+    Verify a repeated read issues only the metadata query.
+
+    Expected: 1st call full query, 2nd call metadata query without report_json;
+    mutating a returned report (including nested findings) leaves the cache intact.
+    """
+    clear_report_cache()
+    with patch('database.api.suggestions.fetch_all') as mock_fetch:
+        mock_fetch.return_value = [report_row('2024-01-22', T1)]
+        first = get_weekly_report('u1', '2024-01-22')
+
+        mock_fetch.return_value = [{'REPORT_ID': 'r-2024-01-22', 'UPDATED_AT': T1}]
+        second = get_weekly_report('u1', '2024-01-22')
+
+    assert first == second
+    assert mock_fetch.call_count == 2
+    assert 'report_json' in mock_fetch.call_args_list[0][0][0]
+    assert 'report_json' not in mock_fetch.call_args_list[1][0][0], "Hit should not read report_json"
+
+    second['extra'] = True
+    with patch('database.api.suggestions.fetch_all',
+               return_value=[{'REPORT_ID': 'r', 'UPDATED_AT': T1}]):
+        assert 'extra' not in get_weekly_report('u1', '2024-01-22'), "Callers must not mutate the cache"
+
+    # Nested findings are copied too, both from a miss and from a hit
+    first['findings'][0]['item'] = 'changed'
+    second['findings'].append({'item': 'Eggs'})
+    with patch('database.api.suggestions.fetch_all',
+               return_value=[{'REPORT_ID': 'r', 'UPDATED_AT': T1}]):
+        cached = get_weekly_report('u1', '2024-01-22')
+    assert cached['findings'] == [{'item': 'Milk', 'alternatives': []}]
+
+
+# Test 2: Newer updated_at and upsert both invalidate
+def test_cache_invalidation():
+    """
+    Verify a changed updated_at refetches and upsert drops the cached week.
+    """
+    clear_report_cache()
+    with patch('database.api.suggestions.fetch_all',
+               return_value=[report_row('2024-01-22', T1)]):
+        get_weekly_report('u1', '2024-01-22')
+
+    with patch('database.api.suggestions.fetch_all',
+               side_effect=[[{'REPORT_ID': 'r', 'UPDATED_AT': T2}],
+                            [report_row('2024-01-22', T2, savings=99.0)]]) as mock_fetch:
+        report = get_weekly_report('u1', '2024-01-22')
+    assert mock_fetch.call_count == 2, "Stale entry should be re-read"
+    assert report['total_potential_savings'] == 99.0
+
+    with patch('database.api.suggestions.execute'):
+        suggestions.upsert_weekly_report('u1', '2024-01-22', {'findings': []})
+    assert ('u1', '2024-01-22') not in suggestions._report_cache
+
+
+# Test 3: History reuses cached weeks and keeps order
+def test_history_reuses_cached_weeks():
+    """
+    Verify only uncached weeks are fetched with report_json.
+    """
+    clear_report_cache()
+    with patch('database.api.suggestions.fetch_all',
+               return_value=[report_row('2024-01-22', T1)]):
+        get_weekly_report('u1', '2024-01-22')
+
+    meta = [
+        {'WEEK_START': date(2024, 1, 29), 'UPDATED_AT': T2},
+        {'WEEK_START': date(2024, 1, 22), 'UPDATED_AT': T1},
+    ]
+    with patch('database.api.suggestions.fetch_all',
+               side_effect=[meta, [report_row('2024-01-29', T2)]]) as mock_fetch:
+        reports = get_recent_reports('u1', limit=2)
+
+    assert [r['report_id'] for r in reports] == ['r-2024-01-29', 'r-2024-01-22']
+    fetch_params = mock_fetch.call_args_list[1][0][1]
+    assert fetch_params == ('u1', '2024-01-29'), "Only the uncached week should be read"
+
+
+# Test 4: Summary projection skips report_json
+def test_summary_projection():
+    """
+    Verify fields=summary reads only scalar columns and keeps report keys.
+    """
+    rows = [{
+        'REPORT_ID': 'r1', 'WEEK_START': date(2024, 1, 22), 'WEEK_END': date(2024, 1, 29),
+        'TOTAL_ITEMS': 5, 'ITEMS_WITH_ALTS': 3, 'TOTAL_SAVINGS_USD': 42.5, 'UPDATED_AT': T1,
+    }]
+    with patch('database.api.suggestions.fetch_all', return_value=rows) as mock_fetch:
+        summaries = get_report_summaries('u1', limit=12)
+
+    sql, params = mock_fetch.call_args[0]
+    assert 'report_json' not in sql, "Summary must not select report_json"
+    assert params == ('u1', 12)
+    assert summaries == [{
+        'user_id': 'u1', 'report_id': 'r1', 'week_start': '2024-01-22', 'week_end': '2024-01-29',
+        'items_analyzed': 5, 'items_with_alternatives': 3,
+        'total_potential_savings': 42.5, 'updated_at': T1,
+    }]
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Report Cache Tests...")
+
+    print("\n1. Testing cache hit...")
+    test_cache_hit_uses_metadata_query()
+    print("   ✅ Cache hit validated by metadata query")
+
+    print("\n2. Testing invalidation...")
+    test_cache_invalidation()
+    print("   ✅ updated_at change and upsert invalidate")
+
+    print("\n3. Testing history reuse...")
+    test_history_reuses_cached_weeks()
+    print("   ✅ History reuses cached weeks")
+
+    print("\n4. Testing summary projection...")
+    test_summary_projection()
+    print("   ✅ Summary reads scalar columns only")
+
+    print("\n✅ All report cache tests passed!")
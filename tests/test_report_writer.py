@@ -0,0 +1,116 @@
+"""
+Tests for the buffered weekly report writer (database/api/report_writer.py)
+
+Tests that reports are flushed in multi-row MERGE batches and that a failed
+batch is retried without losing completed reports.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+# Add repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database.api.report_writer import ReportWriter
+from database.api.suggestions import upsert_weekly_reports
+
+
+def make_report(savings=1.0):
+    return {'findings': [], 'total_potential_savings': savings, 'items_analyzed': 1}
+
+
+# Test 1: Multi-row MERGE is parameterized and dedupes keys
+def test_bulk_upsert_single_merge():
+    """
+    Verify one MERGE carries every report and duplicate keys keep the last.
+
+    Expected: 2 source rows x 13 params, report_ids returned in input order
+              (the stored id for duplicate keys).
+    """
+    reports = [
+        ('u1', '2024-01-22', make_report(1.25)),
+        ("u2'; DROP TABLE x; --", '2024-01-22', make_report(2.0)),
+        ('u1', '2024-01-22', make_report(3.75)),
+    ]
+    with patch('database.api.suggestions.execute') as mock_exec:
+        ids = upsert_weekly_reports(reports)
+
+    assert mock_exec.call_count == 1, "All reports in one MERGE"
+    sql, params = mock_exec.call_args[0]
+    assert 'DROP TABLE' not in sql, "User input should NOT be in SQL string"
+    assert 'MERGE INTO' in sql and 'FROM VALUES' in sql
+    assert sql.count('%s') == len(params) == 2 * 13
+    assert len(ids) == 3
+    assert ids[0] == ids[2] == params[0], "Duplicates get the id actually stored for their key"
+    assert ids[1] == params[13]
+    assert 3.75 in params and 1.25 not in params, "Last report for a key wins"
+
+
+# Test 2: Flush every N reports
+def test_flush_by_batch_size():
+    """
+    Verify the writer flushes once the buffer reaches batch_size.
+    """
+    flushed = []
+    with patch('database.api.report_writer.upsert_weekly_reports') as mock_bulk:
+        writer = ReportWriter(batch_size=2, flush_interval=0, on_flush=flushed.append)
+        report_id = writer.add('u1', '2024-01-22', make_report())
+        assert mock_bulk.call_count == 0
+        writer.add('u2', '2024-01-22', make_report())
+        assert mock_bulk.call_count == 1
+        writer.add('u3', '2024-01-22', make_report())
+        writer.close()
+
+    assert mock_bulk.call_count == 2, "Tail flushed on close"
+    assert writer.written == 3 and writer.batches == 2
+    assert flushed[0][0][2]['report_id'] == report_id, "report_id assigned before flush"
+
+
+# Test 3: Failed batch is retried, then written per report
+def test_failed_batch_not_lost():
+    """
+    Verify a failing batch is retried and falls back to single upserts;
+    a report that still fails is kept in `failed`.
+    """
+    def single(user_id, week_start, report):
+        if user_id == 'bad':
+            raise RuntimeError('row rejected')
+        return report['report_id']
+
+    with patch('database.api.report_writer.upsert_weekly_reports',
+               side_effect=RuntimeError('batch failed')) as mock_bulk, \
+         patch('database.api.report_writer.upsert_weekly_report',
+               side_effect=single) as mock_single, \
+         patch('database.api.report_writer.time.sleep'):
+        writer = ReportWriter(batch_size=10, flush_interval=0, max_retries=2)
+        writer.add('u1', '2024-01-22', make_report())
+        writer.add('bad', '2024-01-22', make_report())
+        writer.close()
+
+    assert mock_bulk.call_count == 2, "Batch retried max_retries times"
+    assert mock_single.call_count == 2, "Then each report written on its own"
+    assert writer.written == 1
+    assert [f['user_id'] for f in writer.failed] == ['bad']
+    assert writer.failed[0]['report']['findings'] == [], "Failed report kept for re-submission"
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Report Writer Tests...")
+
+    print("\n1. Testing bulk MERGE...")
+    test_bulk_upsert_single_merge()
+    print("   ✅ One parameterized MERGE per batch")
+
+    print("\n2. Testing batch flush...")
+    test_flush_by_batch_size()
+    print("   ✅ Flushes every N reports")
+
+    print("\n3. Testing retry...")
+    test_failed_batch_not_lost()
+    print("   ✅ Failed batch retried without losing reports")
+
+    print("\n✅ All report writer tests passed!")
@@ -0,0 +1,179 @@
+"""
+Tests for the incremental spending rollups (database/api/rollups.py)
+
+Tests that refreshes are scoped to the (user, category, week) buckets and
+purchases touched by new or changed items.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import os
+import sys
+from datetime import datetime
+from unittest.mock import patch
+
+# Add repo root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database.api.rollups import (
+    week_start_of,
+    affected_spending_buckets,
+    affected_purchases,
+    spending_refresh_statements,
+    refresh_rollups_for_items,
+)
+
+
+SAMPLE_ITEMS = [
+    {'user_id': 'u1', 'purchase_id': 'p1', 'category': 'Coffee', 'subcategory': None,
+     'ts': datetime(2024, 1, 24, 8, 0)},   # Wednesday
+    {'user_id': 'u1', 'purchase_id': 'p1', 'category': 'Coffee', 'subcategory': None,
+     'ts': datetime(2024, 1, 24, 8, 0)},   # same order, same bucket
+    {'USER_ID': 'u1', 'PURCHASE_ID': 'p2', 'CATEGORY': 'Groceries', 'SUBCATEGORY': 'Dairy',
+     'TS': '2024-01-29T10:00:00Z'},        # next Monday, DB-style keys
+]
+
+
+# Test 1: Week start matches DATE_TRUNC('week')
+def test_week_start_is_monday():
+    """
+    Verify week_start_of returns the Monday of the week.
+    """
+    assert week_start_of(datetime(2024, 1, 24, 23, 59)) == '2024-01-22'
+    assert week_start_of(datetime(2024, 1, 22, 0, 0)) == '2024-01-22'
+    assert week_start_of('2024-01-28T10:00:00Z') == '2024-01-22'
+
+
+# Test 2: Only touched buckets and purchases are collected
+def test_affected_buckets_and_purchases():
+    """
+    Verify bucket and purchase collection dedupes and accepts DB-style keys.
+
+    Expected: 2 buckets, 2 purchases.
+    """
+    buckets = affected_spending_buckets(SAMPLE_ITEMS)
+    assert buckets == {
+        ('u1', 'Coffee', None, '2024-01-22'),
+        ('u1', 'Groceries', 'Dairy', '2024-01-29'),
+    }
+    assert affected_purchases(SAMPLE_ITEMS) == {('u1', 'p1'), ('u1', 'p2')}
+
+
+# Test 3: Refresh SQL is parameterized and bucket-scoped
+def test_refresh_statements_parameterized():
+    """
+    Verify that bucket values are bound, not formatted into SQL.
+
+    Expected: delete + insert, 4 params per bucket, no user data in SQL.
+    """
+    buckets = {("u1'; DROP TABLE x; --", 'Coffee', None, '2024-01-22')}
+    statements = spending_refresh_statements(buckets)
+
+    assert len(statements) == 2, "Should delete then re-insert"
+    for sql, params in statements:
+        assert 'DROP TABLE' not in sql, "User input should NOT be in SQL string"
+        assert sql.count('%s') == len(params) == 4
+        assert 'EQUAL_NULL' in sql, "NULL categories must still match their bucket"
+
+    insert_sql = statements[1][0]
+    assert "p.ts >= b.week_start" in insert_sql, "Should keep a range predicate for pruning"
+    group_by = insert_sql.split('GROUP BY')[1]
+    assert "DATE_TRUNC('week', p.ts), DATE_TRUNC('month', p.ts)" in group_by, \
+        "Group by expressions: a bare week_start resolves to the joined b.week_start"
+    assert 'week_start' not in group_by and 'month_start' not in group_by
+
+    # The stored procedure repeats the same insert
+    proc_path = os.path.join(os.path.dirname(__file__), '..', 'database', 'snowflake', '06_spending_rollups.sql')
+    with open(proc_path) as f:
+        proc_sql = f.read()
+    assert "GROUP BY p.user_id, p.category, p.subcategory, DATE_TRUNC('week', p.ts), DATE_TRUNC('month', p.ts);" in proc_sql
+    assert spending_refresh_statements(set()) == []
+
+
+# Test 4: Refresh runs in one transaction
+def test_refresh_runs_in_one_transaction():
+    """
+    Verify refresh_rollups_for_items issues all statements atomically.
+    """
+    with patch('database.api.rollups.execute_transaction') as mock_tx:
+        counts = refresh_rollups_for_items(SAMPLE_ITEMS)
+
+    assert counts == {'buckets': 2, 'purchases': 2}
+    assert mock_tx.call_count == 1
+    statements = mock_tx.call_args[0][0]
+    assert len(statements) == 7, "Summary, prediction txns and TRANSACTIONS: delete + insert each, then insights invalidation"
+    assert any('TRANSACTIONS' in sql and 'DELETE' in sql for sql, _ in statements)
+    assert 'user_insights' in statements[-1][0] and statements[-1][1] == ('u1',)
+
+
+# Test 5: The feed only bounds OCCURRED_AT when asked to
+def test_feed_days_optional():
+    """
+    Verify /feed without days= returns the latest rows with no cutoff, and
+    days= switches to the OCCURRED_AT range read.
+    """
+    from fastapi.testclient import TestClient
+    from database.api import main as api
+    from database.api import queries as Q
+
+    client = TestClient(api.app)
+    with patch.object(api, 'fetch_all', return_value=[]) as mock_fetch:
+        assert client.get('/feed', params={'user_id': 'u1'}).status_code == 200
+        sql, params = mock_fetch.call_args[0]
+        assert sql == Q.SQL_FEED and 'DATEADD' not in sql
+        assert params == {'user_id': 'u1', 'limit': 20}
+
+        assert client.get('/feed', params={'user_id': 'u1', 'days': 30}).status_code == 200
+        sql, params = mock_fetch.call_args[0]
+        assert sql == Q.SQL_FEED_SINCE and params['days'] == 30
+
+
+# Test 6: Stored procedures consume their stream inside the transaction
+def test_procedures_keep_ddl_outside_transaction():
+    """
+    Verify no DDL (which commits implicitly in Snowflake) runs between
+    BEGIN TRANSACTION and COMMIT, and the stream is read inside it.
+    """
+    sql_dir = os.path.join(os.path.dirname(__file__), '..', 'database', 'snowflake')
+    for name, stream in (('06_spending_rollups.sql', 'purchase_items_rollup_stream'),
+                         ('07_transactions_rollup.sql', 'purchase_items_txn_stream')):
+        with open(os.path.join(sql_dir, name)) as f:
+            proc_sql = f.read()
+        body = proc_sql.split('BEGIN TRANSACTION;')[1].split('COMMIT;')[0]
+        assert 'CREATE ' not in body.upper(), f"{name}: DDL would commit the transaction early"
+        assert f'FROM {stream}' in body, f"{name}: stream must be consumed inside the transaction"
+
+    # TRANSACTIONS is only defined by the rollup: re-running 04 leaves it alone
+    with open(os.path.join(sql_dir, '04_transactions_view.sql')) as f:
+        assert 'VIEW TRANSACTIONS' not in f.read().upper()
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Rollup Tests...")
+
+    print("\n1. Testing week start...")
+    test_week_start_is_monday()
+    print("   ✅ Week starts on Monday")
+
+    print("\n2. Testing affected buckets...")
+    test_affected_buckets_and_purchases()
+    print("   ✅ Only touched buckets collected")
+
+    print("\n3. Testing refresh SQL...")
+    test_refresh_statements_parameterized()
+    print("   ✅ Refresh SQL parameterized and scoped")
+
+    print("\n4. Testing transaction...")
+    test_refresh_runs_in_one_transaction()
+    print("   ✅ Refresh is atomic")
+
+    print("\n5. Testing feed cutoff...")
+    test_feed_days_optional()
+    print("   ✅ Feed cutoff only when days= is given")
+
+    print("\n6. Testing stored procedures...")
+    test_procedures_keep_ddl_outside_transaction()
+    print("   ✅ Stream consumed inside the transaction")
+
+    print("\n✅ All rollup tests passed!")
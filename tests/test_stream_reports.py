@@ -0,0 +1,206 @@
+"""
+Tests for serving stored reports through the streaming endpoint
+
+Tests that a fresh saved report is replayed as items_loaded/found/complete
+events without running the AI, and that live runs save their report.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+# Add repo root and src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastapi.testclient import TestClient
+
+from database.api import main as api
+from database.api.suggestions import report_is_fresh
+from services import weekly_suggester_stream
+from services.llm_clients import LLMClients
+
+
+REPORT = {
+    'report_id': 'r-123',
+    'week_start': '2024-01-22',
+    'findings': [
+        {'item_name': 'Ring Video Doorbell 3', 'original_price': 119.99, 'original_merchant': 'Amazon',
+         'alternative_merchant': 'Best Buy', 'total_landed_cost': 106.99, 'total_savings': 13.0},
+    ],
+    'total_potential_savings': 13.0,
+    'items_analyzed': 3,
+    'items_with_alternatives': 1,
+    'error': None,
+    'updated_at': datetime.now() - timedelta(hours=1),
+}
+
+
+# Test 1: Freshness rules
+def test_report_is_fresh():
+    """
+    Verify failed, missing and old reports are not served from the store.
+    """
+    assert report_is_fresh(REPORT)
+    assert not report_is_fresh(None)
+    assert not report_is_fresh(dict(REPORT, error='Dedalus timeout'))
+    assert not report_is_fresh(dict(REPORT, updated_at=datetime.now() - timedelta(days=30)))
+    assert report_is_fresh(dict(REPORT, updated_at=datetime.now().isoformat()))
+
+
+# Test 2: Endpoint replays a saved report without starting an analysis
+def test_stream_serves_saved_report():
+    """
+    Verify the SSE burst is items_loaded, found, complete (cached) and no
+    analysis is started.
+    """
+    started = api.analysis_registry.started
+
+    with patch('database.api.main.get_weekly_report', return_value=dict(REPORT)) as mock_get:
+        client = TestClient(api.app)
+        response = client.get('/api/user/u1/weekly_alternatives/stream?week=2024-01-22')
+
+    events = [json.loads(line[len('data: '):]) for line in response.text.split('\n\n') if line]
+    assert [e['event'] for e in events] == ['items_loaded', 'found', 'complete']
+    assert all(e['cached'] for e in events)
+    assert events[1]['savings'] == 13.0
+    assert events[2]['report_id'] == 'r-123'
+    assert mock_get.call_args[0] == ('u1', '2024-01-22')
+    assert api.analysis_registry.started == started, "No AI run for a fresh report"
+
+
+# Test 3: Live runs save their report before 'complete'
+def test_live_run_saves_report():
+    """
+    Verify on_complete receives the full report and complete carries its id.
+    """
+    items = [{'item_name': 'Ring Video Doorbell 3', 'merchant': 'Amazon', 'price': 119.99,
+              'category': 'Electronics'}]
+    saved = []
+
+    class Runner:
+        def __init__(self, client):
+            pass
+
+        async def run(self, input, model, stream=False):
+            response = Mock()
+            response.final_output = json.dumps([{'item_name': 'Ring Video Doorbell 3', 'total_savings': 13.0}])
+            return response
+
+    async def save(report):
+        saved.append(report)
+        return 'r-new'
+
+    async def collect():
+        with patch.object(weekly_suggester_stream.suggester, 'fetch_top_items', return_value=items), \
+             patch.object(weekly_suggester_stream, 'get_llm_clients', return_value=LLMClients(runner=Runner(None))):
+            return [e async for e in weekly_suggester_stream.generate_weekly_suggestions_stream(
+                'u1', '2024-01-22', on_complete=save)]
+
+    events = asyncio.run(collect())
+
+    assert len(saved) == 1
+    assert saved[0]['week_end'] == '2024-01-29'
+    assert saved[0]['total_potential_savings'] == 13.0
+    assert saved[0]['items_analyzed'] == 1
+    assert events[-1]['event'] == 'complete' and events[-1]['report_id'] == 'r-new'
+
+
+# Test 4: An unparseable answer is saved as a failed run
+def test_unparseable_response_not_fresh():
+    """
+    Verify a non-JSON model answer ends in an error event and its saved
+    report carries the error, so it is regenerated instead of replayed.
+    """
+    items = [{'item_name': 'Ring Video Doorbell 3', 'merchant': 'Amazon', 'price': 119.99,
+              'category': 'Electronics'}]
+    saved = []
+
+    class Runner:
+        async def run(self, input, model, stream=False):
+            response = Mock()
+            response.final_output = "Sorry, I couldn't search the web right now."
+            return response
+
+    async def save(report):
+        saved.append(report)
+        return 'r-failed'
+
+    async def collect():
+        with patch.object(weekly_suggester_stream.suggester, 'fetch_top_items', return_value=items), \
+             patch.object(weekly_suggester_stream, 'get_llm_clients', return_value=LLMClients(runner=Runner())):
+            return [e async for e in weekly_suggester_stream.generate_weekly_suggestions_stream(
+                'u1', '2024-01-22', on_complete=save)]
+
+    events = asyncio.run(collect())
+
+    assert events[-1]['event'] == 'error' and events[-1]['report_id'] == 'r-failed'
+    assert 'complete' not in [e['event'] for e in events]
+    assert saved[0]['error'] and saved[0]['findings'] == []
+    assert not report_is_fresh(dict(saved[0], updated_at=datetime.now()))
+
+
+# Test 5: A failed refresh keeps the good report
+def test_failed_refresh_keeps_good_report():
+    """
+    Verify refresh=true with an unparseable answer does not overwrite a good
+    stored report, and the error event points at the report still stored.
+    """
+    items = [{'item_name': 'Ring Video Doorbell 3', 'merchant': 'Amazon', 'price': 119.99,
+              'category': 'Electronics'}]
+
+    class Runner:
+        async def run(self, input, model, stream=False):
+            response = Mock()
+            response.final_output = "Sorry, I couldn't search the web right now."
+            return response
+
+    async def collect(stored):
+        stream_module = api._load_stream_module()
+        with patch.object(stream_module.suggester, 'fetch_top_items', return_value=items), \
+             patch.object(stream_module, 'get_llm_clients', return_value=LLMClients(runner=Runner())), \
+             patch('database.api.main.get_weekly_report', return_value=stored), \
+             patch('database.api.main.upsert_weekly_report', return_value='r-failed') as mock_upsert:
+            events = [e async for e in api.weekly_analysis_events('u1', '2024-01-22', refresh=True)]
+        return events, mock_upsert
+
+    events, mock_upsert = asyncio.run(collect(dict(REPORT)))
+    assert events[-1]['event'] == 'error' and events[-1]['report_id'] == 'r-123'
+    mock_upsert.assert_not_called()
+
+    # Nothing good to protect: the failure is stored (and never fresh)
+    events, mock_upsert = asyncio.run(collect(None))
+    assert events[-1]['report_id'] == 'r-failed'
+    assert mock_upsert.call_args[0][2]['error']
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Stream Report Tests...")
+
+    print("\n1. Testing freshness...")
+    test_report_is_fresh()
+    print("   ✅ Only fresh, successful reports are served")
+
+    print("\n2. Testing saved report replay...")
+    test_stream_serves_saved_report()
+    print("   ✅ Saved report replayed without AI")
+
+    print("\n3. Testing live run persistence...")
+    test_live_run_saves_report()
+    print("   ✅ Live run saved on completion")
+
+    print("\n4. Testing unparseable response...")
+    test_unparseable_response_not_fresh()
+    print("   ✅ Failed run saved with its error, not served as fresh")
+
+    print("\n5. Testing failed refresh...")
+    test_failed_refresh_keeps_good_report()
+    print("   ✅ Good report kept when a refresh fails")
+
+    print("\n✅ All stream report tests passed!")
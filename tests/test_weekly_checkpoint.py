@@ -0,0 +1,82 @@
+"""
+Tests for weekly job checkpoint/resume (scripts/generate_weekly_suggestions.py)
+
+Tests that users are checkpointed as done only after their report is
+flushed, and that --resume skips done users and retries failed ones.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import importlib.util
+import json
+import os
+import tempfile
+
+script_path = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'generate_weekly_suggestions.py')
+spec = importlib.util.spec_from_file_location('generate_weekly_suggestions', script_path)
+job = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(job)
+
+
+# Test 1: Done only after flush, failures retried
+def test_checkpoint_records_flushed_reports():
+    """
+    Verify flushed reports are 'done', reports with an LLM error are 'failed'.
+    """
+    with tempfile.TemporaryDirectory() as log_dir:
+        checkpoint = job.JobCheckpoint('2024-01-22', log_dir=log_dir)
+        checkpoint.record_flushed([
+            ('u1', '2024-01-22', {'report_id': 'r1', 'error': None}),
+            ('u2', '2024-01-22', {'report_id': 'r2', 'error': 'Dedalus timeout'}),
+        ])
+        checkpoint.record('u3', 'failed', error='timed out after 300s')
+        checkpoint.close()
+
+        with open(checkpoint.path) as f:
+            lines = [json.loads(line) for line in f]
+
+    assert [(l['user_id'], l['status']) for l in lines] == [
+        ('u1', 'done'), ('u2', 'failed'), ('u3', 'failed'),
+    ]
+    assert lines[0]['report_id'] == 'r1'
+
+
+# Test 2: Resume skips done users, last status wins, torn line ignored
+def test_resume_skips_done_users():
+    """
+    Verify --resume loads only users whose last status is 'done'.
+    """
+    with tempfile.TemporaryDirectory() as log_dir:
+        first = job.JobCheckpoint('2024-01-22', log_dir=log_dir)
+        first.record('u1', 'done')
+        first.record('u2', 'failed')
+        first.record('u3', 'done')
+        first.record('u3', 'failed')
+        first.close()
+
+        # Simulate a crash mid-write
+        with open(first.path, 'a') as f:
+            f.write('{"user_id": "u4", "sta')
+
+        resumed = job.JobCheckpoint('2024-01-22', resume=True, log_dir=log_dir)
+        assert resumed.done_users() == {'u1'}
+        resumed.close()
+
+        fresh = job.JobCheckpoint('2024-01-22', resume=False, log_dir=log_dir)
+        fresh.close()
+        assert os.path.getsize(fresh.path) == 0, "A non-resume run starts a new checkpoint"
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Weekly Job Checkpoint Tests...")
+
+    print("\n1. Testing checkpoint records...")
+    test_checkpoint_records_flushed_reports()
+    print("   ✅ Done only after flush")
+
+    print("\n2. Testing resume...")
+    test_resume_skips_done_users()
+    print("   ✅ Resume skips done users")
+
+    print("\n✅ All checkpoint tests passed!")
@@ -0,0 +1,104 @@
+"""
+Tests for the week-level product dedupe pre-pass (src/services/weekly_suggester.py)
+
+Tests that identical products across users are researched once and fanned
+back out with each user's own savings.
+
+Following CLAUDE.MD Rule 2: Each step should contain tests to validate changes work.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import Mock, patch, AsyncMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.llm_clients import LLMClients
+from services.product_cache import ProductAlternativeCache
+from services.weekly_suggester import (
+    group_products,
+    prewarm_product_cache,
+    generate_weekly_suggestions,
+)
+
+
+def item(name, price, external_id=None, merchant='Amazon'):
+    return {'item_name': name, 'merchant': merchant, 'price': price, 'category': 'Electronics',
+            'external_id': external_id}
+
+
+ITEMS_BY_USER = {
+    'alice': [item('Ring Video Doorbell 3', 119.99, 'B08N5NQ869'), item('Standing Desk', 399.00)],
+    'bob': [item('Ring video doorbell 3', 129.99, merchant='Target')],
+    'carol': [item('Ring Video Doorbell 3', 119.99, 'B08N5NQ869'), item('standing desk!', 389.00)],
+}
+
+
+# Test 1: Same product across users is one group
+def test_group_products():
+    """
+    Verify ASIN and name matches collapse into one group per product.
+
+    Expected: 2 groups; doorbell researched at the highest price paid (129.99)
+              and reachable by both its id and name key.
+    """
+    groups = group_products(ITEMS_BY_USER)
+    assert len(groups) == 2
+    doorbell = next(g for g in groups if 'doorbell' in g['item']['item_name'].lower())
+    assert doorbell['buyers'] == 3
+    assert doorbell['item']['price'] == 129.99
+    assert set(doorbell['variants']) == {'id:B08N5NQ869', 'name:ring video doorbell 3'}
+
+
+# Test 2: Pre-pass researches each product once; users re-priced from cache
+def test_prewarm_researches_each_product_once():
+    """
+    Verify LLM calls scale with distinct products, not users x items.
+    """
+    cache = ProductAlternativeCache()
+    response = Mock()
+    response.final_output = json.dumps([{
+        'item_number': 1, 'item_name': 'Ring Video Doorbell 3',
+        'alternative_merchant': 'Best Buy', 'total_landed_cost': 106.99,
+        'total_savings': 23.00, 'url': 'https://www.bestbuy.com/...',
+    }])
+    runner = AsyncMock()
+    runner.run.return_value = response
+
+    async def run():
+        with patch('services.weekly_suggester.get_product_cache', return_value=cache), \
+             patch('services.weekly_suggester.get_llm_clients', return_value=LLMClients(runner=runner)):
+            stats = await prewarm_product_cache(ITEMS_BY_USER, concurrency=2, batch_size=5)
+            reports = {
+                user_id: await generate_weekly_suggestions(user_id, '2024-01-22', items=items)
+                for user_id, items in ITEMS_BY_USER.items()
+            }
+            return stats, reports
+
+    stats, reports = asyncio.run(run())
+
+    assert runner.run.call_count == 1, "Two distinct products fit in one batch"
+    assert stats['distinct_products'] == 2 and stats['researched'] == 2
+    assert all(r['mcp_calls_made'] == 0 for r in reports.values()), "Reports served from cache"
+    assert reports['alice']['total_potential_savings'] == 13.00
+    assert reports['bob']['total_potential_savings'] == 23.00
+    assert reports['bob']['findings'][0]['original_merchant'] == 'Target'
+    assert reports['carol']['findings'][0]['item_number'] == 1
+
+
+if __name__ == '__main__':
+    # Run tests manually
+    print("Running Weekly Dedupe Tests...")
+
+    print("\n1. Testing product grouping...")
+    test_group_products()
+    print("   ✅ Products grouped across users")
+
+    print("\n2. Testing pre-pass research...")
+    test_prewarm_researches_each_product_once()
+    print("   ✅ Each distinct product researched once")
+
+    print("\n✅ All dedupe tests passed!")
@@ -17,6 +17,7 @@ from unittest.mock import Mock, patch, MagicMock, AsyncMock
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+from services.llm_clients import LLMClients
 from services.weekly_suggester import (
     fetch_top_items,
     build_plan_prompt,
@@ -239,13 +240,12 @@ def test_generate_weekly_suggestions_ai_response():
             }
         ])
 
-        # Mock AsyncDedalus
+        # Mock the shared Dedalus runner
         mock_runner = AsyncMock()
         mock_runner.run.return_value = mock_ai_response
 
         with patch('services.weekly_suggester.fetch_all', return_value=mock_items), \
-             patch('services.weekly_suggester.DedalusRunner', return_value=mock_runner), \
-             patch('services.weekly_suggester.AsyncDedalus'):
+             patch('services.weekly_suggester.get_llm_clients', return_value=LLMClients(runner=mock_runner)):
 
             report = await generate_weekly_suggestions('test_user', '2024-01-22', top_n=5)
 
@@ -310,11 +310,11 @@ def test_generate_weekly_suggestions_api_error():
 
         # Mock Dedalus to raise exception
         with patch('services.weekly_suggester.fetch_all', return_value=mock_items), \
-             patch('services.weekly_suggester.DedalusRunner') as mock_runner_class:
+             patch('services.weekly_suggester.get_llm_clients') as mock_clients:
 
             mock_runner = AsyncMock()
             mock_runner.run.side_effect = Exception("API quota exceeded")
-            mock_runner_class.return_value = mock_runner
+            mock_clients.return_value = LLMClients(runner=mock_runner)
 
             report = await generate_weekly_suggestions('test_user', '2024-01-22', top_n=5)
 
@@ -377,8 +377,7 @@ def test_json_parsing_robustness():
         mock_runner.run.return_value = mock_ai_response
 
         with patch('services.weekly_suggester.fetch_all', return_value=mock_items), \
-             patch('services.weekly_suggester.DedalusRunner', return_value=mock_runner), \
-             patch('services.weekly_suggester.AsyncDedalus'):
+             patch('services.weekly_suggester.get_llm_clients', return_value=LLMClients(runner=mock_runner)):
 
             report = await generate_weekly_suggestions('test_user', '2024-01-22', top_n=5)
 